@@ -1,19 +1,24 @@
+import hashlib
 import json
 import logging
 import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Manager
+from functools import lru_cache
 from pathlib import Path
 from typing import List
 
+import attr
 from jinja2.environment import Template
 
-sys.path.insert(0, r"../implementation/")
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent / "implementation"))
 
 from console.levin_search import main as levin_search
 from console.run_program import main as run_program
 from console.program_convert import main as program_convert
 from console.utils import program_format
-from paths import experiments_dir, logs_dir, root_dir
-
+from paths import experiments_dir, implementation_dir, logs_dir, root_dir
+from version import __version__
 
 exp_logger = logging.getLogger("experiment")
 exp_logger.setLevel(logging.INFO)
@@ -34,7 +39,7 @@ def generate_solution_stub(metrics, task, table, output_file: Path):
         runtime=metrics["current_runtime"],
         runtime_limit=metrics["time_limit"],
         space_probability=f"$$\\frac{{1}}{{{metrics['space_size']}}}$$",
-        complexity=metrics["complexity"]
+        complexity=metrics["complexity"],
     )
     output_file.write_text(stub)
 
@@ -49,6 +54,8 @@ def generate_search_stub(
         search_length=search_length,
         n_runs=stats["n_runs"],
         n_steps=stats["n_steps"],
+        n_distinct_outputs=stats.get("n_distinct_outputs"),
+        expanded_n_runs=stats.get("expanded_n_runs"),
         solutions=solutions,
         n_generalizes=stats["n_generalizes"],
         n_solutions=stats["n_solutions"],
@@ -70,109 +77,348 @@ def generate_task_stub(
     output_file.write_text(stub)
 
 
-def main(task, search_length, primitives="DEFAULT"):
-    # For each task
-    exp_logger.info("Generate directories")
-    task_dir = logs_dir() / f"{task}_{primitives.lower()}"
-    task_dir.mkdir(exist_ok=True, parents=True)
+@attr.s(slots=True, eq=False)
+class Step(object):
+    """A step in the experiment pipeline.
 
-    images_dir = root_dir() / "blog" / "images"
-    image_task_dir = images_dir / task
-    image_task_dir.mkdir(exist_ok=True)
+    The step runs `func(*args)` in a worker process once all its dependencies are done. It is skipped when a previous
+    run with the same key (function, arguments, code version and the keys of its dependencies) produced all outputs.
+    `expand` is called in the main process after the step is done and returns the steps that follow from it.
+    A step with `on_message` receives the pipeline queue and its name as extra arguments, see `Pipeline`.
+    """
 
-    exp_logger.info("Levin search")
-    levin_search(
+    name = attr.ib(type=str)
+    func = attr.ib()
+    args = attr.ib(type=tuple, default=())
+    outputs = attr.ib(factory=list)
+    deps = attr.ib(factory=list)
+    expand = attr.ib(default=None)
+    on_message = attr.ib(default=None)
+    key = attr.ib(default=None)
+    done = attr.ib(default=False, type=bool)
+
+
+@lru_cache(maxsize=1)
+def code_version() -> str:
+    """Hash of the version and the source of the implementation and templates"""
+    digest = hashlib.sha256(__version__.encode())
+    sources = list(implementation_dir().rglob("*.py"))
+    sources += list(implementation_dir().rglob("*.jinja"))
+    sources += list(experiments_dir().glob("*.jinja"))
+    for path in sorted(sources):
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def step_key(step: Step) -> str:
+    content = json.dumps(
         [
-            "--primitives_set",
-            primitives,
-            task.upper(),
-            str(search_length),
-            str(task_dir),
-            "--search_log",
-            str(task_dir / "search.csv"),
-        ]
+            step.name,
+            f"{step.func.__module__}.{step.func.__qualname__}",
+            step.args,
+            code_version(),
+            [dep.key for dep in step.deps],
+        ],
+        default=str,
     )
+    return hashlib.sha256(content.encode()).hexdigest()
 
-    # For each solution
-    solutions = []
-    total = 0
-    generalizes = 0
-    for solution_file in task_dir.glob("phase*.json"):
-        metrics_file = solution_file.read_text()
-        metrics = json.loads(metrics_file)
 
-        total += 1
-        if not metrics["generalizes"]:
-            continue
+class Pipeline(object):
+    """Run steps concurrently in a process pool, in dependency order.
 
-        generalizes += 1
+    Running steps can send messages to the pipeline through `self.queue`, as `(step name, message)` tuples. The
+    messages are passed to the `on_message` of the step, which returns new steps. This lets steps that follow from a
+    long running step start before it completes.
 
-        program = metrics["program"]
-        solutions.append(program)
-
-        exp_logger.info(f"Run program {solution_file}")
-        run_program(
-            [
-                "--primitives_set",
-                primitives,
-                "string",
-                program_format(program, ","),
-                str(solution_file.with_suffix(".jsonl")),
-            ]
-        )
+    Args:
+        stamp_dir: directory where the keys of completed steps are stored
+        n_workers: the number of worker processes (default: the number of processors)
+        force: run all steps, even if their outputs are up to date
+    """
 
-        exp_logger.info(f"Generate table {solution_file}")
-        program_convert(
-            [
-                str(solution_file.with_suffix(".jsonl")),
-                "table",
-                "--primitives_set",
-                primitives,
-                str(solution_file.with_suffix(".table.md")),
-            ]
-        )
+    def __init__(self, stamp_dir: Path, n_workers: int = None, force: bool = False):
+        self.stamp_dir = stamp_dir
+        self.n_workers = n_workers
+        self.force = force
+        self.steps = []
+        self.queue = None
+        self._listeners = {}
 
-        exp_logger.info(f"Generate animation {solution_file}")
-        program_convert(
-            [
-                str(solution_file.with_suffix(".jsonl")),
-                "animation",
-                str(image_task_dir / f"animation_{program_format(program, '_')}.gif"),
-            ]
+    def add(self, step: Step):
+        self.steps.append(step)
+
+    def _up_to_date(self, step: Step) -> bool:
+        return (
+            not self.force
+            and (self.stamp_dir / step.key).exists()
+            and all(output.exists() for output in step.outputs)
         )
 
-        table = solution_file.with_suffix(".table.md").read_text()
+    def _receive(self):
+        while not self.queue.empty():
+            name, message = self.queue.get()
+            self.steps.extend(self._listeners[name].on_message(message))
 
-        exp_logger.info(f"Generate solution stub {solution_file}")
-        generate_solution_stub(
-            metrics, task, table, solution_file.with_suffix(".solution.md")
-        )
+    def _finish(self, step: Step):
+        step.done = True
+        if step.expand is not None:
+            self.steps.extend(step.expand())
+
+    def run(self):
+        self.stamp_dir.mkdir(exist_ok=True, parents=True)
 
+        running = {}
+        with Manager() as manager, ProcessPoolExecutor(
+            max_workers=self.n_workers
+        ) as executor:
+            self.queue = manager.Queue()
+            while self.steps or running:
+                ready = [s for s in self.steps if all(d.done for d in s.deps)]
+                for step in ready:
+                    self.steps.remove(step)
+                    step.key = step_key(step)
+                    if self._up_to_date(step):
+                        exp_logger.info(f"Skip {step.name} (up to date)")
+                        self._finish(step)
+                        continue
+
+                    exp_logger.info(f"Run {step.name}")
+                    args = step.args
+                    if step.on_message is not None:
+                        self._listeners[step.name] = step
+                        args += (self.queue, step.name)
+                    running[executor.submit(step.func, *args)] = step
+
+                if ready and not running:
+                    # Skipped steps may have made other steps ready
+                    continue
+                if not running:
+                    raise RuntimeError("Steps with unresolvable dependencies")
+
+                done, _ = wait(
+                    running,
+                    timeout=1 if self._listeners else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                # Messages sent before a step completed are handled before the step is finished
+                self._receive()
+                for future in done:
+                    step = running.pop(future)
+                    future.result()
+                    self._listeners.pop(step.name, None)
+                    (self.stamp_dir / step.key).write_text(step.name)
+                    self._finish(step)
+
+
+def streaming_levin_search(args: list, queue, name: str):
+    """Run the Levin search and send its solutions to the pipeline as they are found"""
+    levin_search(
+        args,
+        on_solution=lambda file_name, metrics: queue.put((name, (file_name, metrics))),
+    )
+
+
+def solution_stub_step(metrics: dict, task: str, table_file: Path, output_file: Path):
+    generate_solution_stub(metrics, task, table_file.read_text(), output_file)
+
+
+def task_stub_step(
+    task: str, task_dir: Path, solutions: list, counts: dict, search_length: int
+):
     with (task_dir / "search.json").open() as f:
         stats = json.load(f)
-    stats["n_solutions"] = total
-    stats["n_generalizes"] = generalizes
+    stats.update(counts)
 
     exp_logger.info(f"Generate search stub")
     generate_search_stub(task, solutions, stats, search_length, task_dir / "search.md")
     search_stub = (task_dir / "search.md").read_text()
 
     exp_logger.info(f"Generate task stub")
-    task_stub = task_dir / "task.md"
     generate_task_stub(
         task.capitalize(),
         search_stub,
         [p.read_text() for p in task_dir.glob("*.solution.md")],
-        task_stub,
+        task_dir / "task.md",
     )
 
 
+class TaskSteps(object):
+    """The steps for a task: the search, and for each generalizing solution the program run, table, animation and
+    stub. Solutions are run, tabulated and animated as soon as the search finds them. The stubs follow when the search
+    is done, as they include the final search space size. If the search is up to date, all steps follow from the
+    solution files.
+    """
+
+    def __init__(self, task, search_length, primitives="DEFAULT"):
+        self.task = task
+        self.search_length = search_length
+        self.primitives = primitives
+
+        self.task_dir = logs_dir() / f"{task}_{primitives.lower()}"
+        self.task_dir.mkdir(exist_ok=True, parents=True)
+        self.image_task_dir = root_dir() / "blog" / "images" / task
+        self.image_task_dir.mkdir(exist_ok=True, parents=True)
+
+        # Solution files of which the post-processing started
+        self.solutions = set()
+        self.tables = {}
+
+        self.search = Step(
+            f"levin search {self.task_dir.name}",
+            streaming_levin_search,
+            (
+                [
+                    "--primitives_set",
+                    primitives,
+                    task.upper(),
+                    str(search_length),
+                    str(self.task_dir),
+                    "--search_log",
+                    str(self.task_dir / "search.csv"),
+                ],
+            ),
+            outputs=[self.task_dir / "search.json"],
+            expand=self.expand,
+            on_message=self.on_message,
+        )
+
+    def on_message(self, message):
+        file_name, metrics = message
+        return self.solution_steps(Path(file_name), metrics)
+
+    def solution_steps(self, solution_file: Path, metrics: dict):
+        self.solutions.add(solution_file)
+        if not metrics["generalizes"]:
+            return []
+
+        program = metrics["program"]
+        log_file = solution_file.with_suffix(".jsonl")
+        table_file = solution_file.with_suffix(".table.md")
+        run = Step(
+            f"run program {solution_file.name}",
+            run_program,
+            (
+                [
+                    "--primitives_set",
+                    self.primitives,
+                    "string",
+                    program_format(program, ","),
+                    str(log_file),
+                ],
+            ),
+            outputs=[log_file],
+        )
+        table = Step(
+            f"table {solution_file.name}",
+            program_convert,
+            (
+                [
+                    str(log_file),
+                    "table",
+                    "--primitives_set",
+                    self.primitives,
+                    str(table_file),
+                ],
+            ),
+            outputs=[table_file],
+            deps=[run],
+        )
+        animation_file = (
+            self.image_task_dir / f"animation_{program_format(program, '_')}.gif"
+        )
+        animation = Step(
+            f"animation {solution_file.name}",
+            program_convert,
+            ([str(log_file), "animation", str(animation_file)],),
+            outputs=[animation_file],
+            deps=[run],
+        )
+        self.tables[solution_file] = table
+        return [run, table, animation]
+
+    def stub_step(self, solution_file: Path, metrics: dict):
+        table = self.tables[solution_file]
+        return Step(
+            f"solution stub {solution_file.name}",
+            solution_stub_step,
+            (
+                metrics,
+                self.task,
+                table.outputs[0],
+                solution_file.with_suffix(".solution.md"),
+            ),
+            outputs=[solution_file.with_suffix(".solution.md")],
+            deps=[table],
+        )
+
+    def expand(self):
+        """The remaining steps once the search is done"""
+        steps = []
+        stubs = []
+        solutions = []
+        total = 0
+        generalizes = 0
+        for solution_file in sorted(self.task_dir.glob("phase*.json")):
+            metrics = json.loads(solution_file.read_text())
+
+            total += 1
+            if not metrics["generalizes"]:
+                continue
+
+            generalizes += 1
+            solutions.append(metrics["program"])
+
+            if solution_file not in self.solutions:
+                steps += self.solution_steps(solution_file, metrics)
+            stubs.append(self.stub_step(solution_file, metrics))
+
+        steps += stubs
+        steps.append(
+            Step(
+                f"task stub {self.task_dir.name}",
+                task_stub_step,
+                (
+                    self.task,
+                    self.task_dir,
+                    solutions,
+                    {"n_solutions": total, "n_generalizes": generalizes},
+                    self.search_length,
+                ),
+                outputs=[self.task_dir / "search.md", self.task_dir / "task.md"],
+                deps=stubs + [self.search],
+            )
+        )
+        return steps
+
+
+def run_experiments(experiments, n_workers: int = None, force: bool = False):
+    """Run the experiments, independent steps run concurrently and up to date steps are skipped.
+
+    Args:
+        experiments: sequence of (task, search_length, primitives) tuples
+        n_workers: the number of worker processes (default: the number of processors)
+        force: rerun all steps
+    """
+    pipeline = Pipeline(logs_dir() / ".pipeline", n_workers=n_workers, force=force)
+    for experiment in experiments:
+        pipeline.add(TaskSteps(*experiment).search)
+    pipeline.run()
+
+
+def main(task, search_length, primitives="DEFAULT"):
+    run_experiments([(task, search_length, primitives)])
+
+
 if __name__ == "__main__":
-    main(task="count", search_length=4)
-    main(task="position", search_length=8) # includes 2^9
-    main(task="position", search_length=9, primitives="WEIGHT") # includes 2^9 bonus
-
-    main(task="odd", search_length=6)
-    main(task="even", search_length=8)
-    main(task="fizz", search_length=10)
-    main(task="negative_one", search_length=8)
+    run_experiments(
+        [
+            ("count", 4, "DEFAULT"),
+            ("position", 8, "DEFAULT"),  # includes 2^9
+            ("position", 9, "WEIGHT"),  # includes 2^9 bonus
+            ("odd", 6, "DEFAULT"),
+            ("even", 8, "DEFAULT"),
+            ("fizz", 10, "DEFAULT"),
+            ("negative_one", 8, "DEFAULT"),
+        ]
+    )
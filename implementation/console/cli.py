@@ -0,0 +1,36 @@
+"""Entry points of the installed console scripts (see `setup.py`). The console modules only load NumPy and the
+other heavy dependencies once the arguments are parsed."""
+import sys
+from importlib import import_module
+from pathlib import Path
+
+
+def run(command: str) -> None:
+    """Run a console module with the command line arguments
+
+    Args:
+        command: the name of the module in `console`
+    """
+    # The implementation uses top-level imports (`from halt import HaltingCode`)
+    sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+    import_module(f"console.{command}").main(args=sys.argv[1:])
+
+
+def levin_search() -> None:
+    run("levin_search")
+
+
+def run_program() -> None:
+    run("run_program")
+
+
+def program_convert() -> None:
+    run("program_convert")
+
+
+def query_weights() -> None:
+    run("query_weights")
+
+
+def search_service() -> None:
+    run("search_service")
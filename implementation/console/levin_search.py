@@ -1,20 +1,17 @@
 """This file add the console interface to the package."""
+
 import argparse
 import collections
+import functools
 import json
 from pathlib import Path
 from sys import argv
 from typing import Union
 import sys
 
-import attr
-
-sys.path.insert(0, r"../")
-from initial_primitives import InitialPrimitives
-from weight_primitives import WeightPrimitives
-from console.utils import absolute_path_extension
-from levin_search import main_levin_search
-from task import Tasks
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+from console.utils import absolute_path_extension, add_profile_argument, profiled
+from tasks import Tasks
 from version import __version__
 
 
@@ -76,6 +73,115 @@ def parse_args(args: Union[list, None] = None) -> argparse.Namespace:
         help="Store the solutions found in this file (.json)",
     )
 
+    parser.add_argument(
+        "--memory_budget",
+        type=int,
+        help="Keep at most this many bytes of halted programs in memory, spill the rest to disk",
+    )
+
+    parser.add_argument(
+        "--memory_dir",
+        type=Path,
+        help="Directory for the spilled halted programs (default: temporary directory)",
+    )
+
+    parser.add_argument(
+        "--outcome_cache",
+        type=Path,
+        help="Cache the outcomes of programs in this file, shared across searches and tasks",
+    )
+
+    parser.add_argument(
+        "--weight_database",
+        type=Path,
+        help="Store the final weights of every halted program in this directory, see `query_weights.py`",
+    )
+
+    parser.add_argument(
+        "--compile",
+        action="store_true",
+        help="Run long running programs in compiled Python functions instead of the interpreter",
+    )
+
+    parser.add_argument(
+        "--symmetry_reduction",
+        action="store_true",
+        help="Run one program per class of equivalent instructions (commutative operands)",
+    )
+
+    parser.add_argument(
+        "--skip_no_ops",
+        action="store_true",
+        help="With --symmetry_reduction, skip the no-op instructions and the programs that extend them (not "
+        "counted in the expanded counts)",
+    )
+
+    parser.add_argument(
+        "--share_outcomes",
+        action="store_true",
+        help="Assign the outcome of a run to the programs that differ only in arguments it did not read",
+    )
+
+    parser.add_argument(
+        "--detect_loops",
+        action="store_true",
+        help="Halt programs whose state recurs, instead of running them until the time limit",
+    )
+
+    parser.add_argument(
+        "--accelerate_loops",
+        action="store_true",
+        help="Apply the iterations of counted loops at once (disables --compile)",
+    )
+
+    parser.add_argument(
+        "--checkpoint",
+        action="store_true",
+        help="Save a checkpoint of the completed search in the solutions directory, to continue it with --from",
+    )
+
+    parser.add_argument(
+        "--from",
+        dest="from_dir",
+        type=Path,
+        help="Continue the completed search in this solutions directory (saved with --checkpoint), with the same "
+        "options and a larger search_length",
+    )
+
+    parser.add_argument(
+        "--timeline",
+        type=absolute_path_extension([".jsonl", ".json"]),
+        help="Store the spans of the phases and their top-level subtrees (.jsonl, or .json for Chrome trace events)",
+    )
+
+    parser.add_argument(
+        "--max_solutions",
+        type=int,
+        help="Keep only this many solutions, the generalizing ones with the lowest complexity",
+    )
+
+    parser.add_argument(
+        "--memory_limit",
+        type=int,
+        help="Soft limit of the memory in bytes, above it the search drops its caches and spills the halted programs "
+        "to disk",
+    )
+
+    parser.add_argument(
+        "--memory_interval",
+        type=int,
+        help="Check the memory every this many runs (default: 10000 with --memory_limit or --trace_memory), the "
+        "search log summary reports the peak",
+    )
+
+    parser.add_argument(
+        "--trace_memory",
+        action="store_true",
+        help="Measure the memory with tracemalloc instead of the resident set size (slower)",
+    )
+
+    add_profile_argument(parser)
+
     # or solutions dir
     parser.add_argument(
         "solutions_dir",
@@ -86,62 +192,143 @@ def parse_args(args: Union[list, None] = None) -> argparse.Namespace:
     return parser.parse_args(args)
 
 
-def main(args=None) -> None:
+def solution_file_name(solutions_dir: Path, phase: int, index: int) -> Path:
+    return solutions_dir / f"phase{phase}_solution{index}.json"
+
+
+def solution_to_dict(solution) -> dict:
+    import attr
+
+    solution = attr.asdict(solution)
+    solution["program"] = [int(c) for c in solution["program"]]
+    return solution
+
+
+def main(args=None, on_solution=None) -> None:
     """ Run the levin search.
 
     Args:
       args: Arguments for the programme (Default value=None).
+      on_solution: Called with the solution file name and the solution (without `space_size`) as soon as a solution
+        is found, before the file is written (Default value=None).
     """
 
     # Parse the arguments
     args = parse_args(args)
 
+    # Deferred until the arguments are parsed, for a fast start
+    import attr
+
+    from initial_primitives import InitialPrimitives
+    from weight_primitives import WeightPrimitives
+    from levin_search import main_levin_search, main_run_program
+
+    found = collections.Counter()
+
+    def solution_found(solution):
+        file_name = solution_file_name(
+            args.solutions_dir, solution.phase, found[solution.phase]
+        )
+        found[solution.phase] += 1
+        on_solution(file_name, solution_to_dict(solution))
+
     if args.primitives_set == "WEIGHT":
         primitives = WeightPrimitives()
     else:
         primitives = InitialPrimitives()
 
-    search_state = main_levin_search(
-        args.task,
-        primitives,
-        args.work_tape_size,
-        args.program_tape_size,
-        args.search_length,
-        search_log_file=args.search_log,
+    def phase_finished(event):
+        # A section per phase
+        if profiler is not None and event.phase < args.search_length:
+            profiler.next_section(f"phase{event.phase + 1}")
+
+    first_phase = 1
+    if args.from_dir is not None:
+        with (args.from_dir / "checkpoint.json").open() as f:
+            first_phase = json.load(f)["state"]["phase"] + 1
+
+    # Runs a solution of COUNT, for the estimate of the overhead of profiling
+    calibration = functools.partial(
+        main_run_program, primitives, [1, 0, 2, 0], 100, 10, 100, None
     )
+    with profiled(args.profile, f"phase{first_phase}", calibration) as profiler:
+        search_state = main_levin_search(
+            args.task,
+            primitives,
+            args.work_tape_size,
+            args.program_tape_size,
+            args.search_length,
+            search_log_file=args.search_log,
+            memory_budget=args.memory_budget,
+            memory_dir=args.memory_dir,
+            on_solution=solution_found if on_solution is not None else None,
+            outcome_cache=args.outcome_cache,
+            weight_database=args.weight_database,
+            compile_programs=args.compile,
+            symmetry_reduction=args.symmetry_reduction,
+            skip_no_ops=args.skip_no_ops,
+            share_outcomes=args.share_outcomes,
+            loop_detection=args.detect_loops,
+            loop_acceleration=args.accelerate_loops,
+            checkpoint_dir=args.solutions_dir if args.checkpoint else None,
+            resume_from=args.from_dir,
+            timeline_file=args.timeline,
+            on_phase_finished=phase_finished,
+            memory_limit=args.memory_limit,
+            trace_memory=args.trace_memory,
+            max_solutions=args.max_solutions,
+            memory_interval=args.memory_interval,
+        )
+    search_state.memory.close()
+    if search_state.outcome_cache is not None:
+        search_state.outcome_cache.close()
+    if search_state.weight_database is not None:
+        search_state.weight_database.close()
+
     # Search state
     if args.search_log:
+        summary = attr.asdict(
+            search_state,
+            filter=lambda attrib, _: attrib.name
+            not in [
+                "logger",
+                "memory",
+                "solutions",
+                "on_solution",
+                "outcome_cache",
+                "weight_database",
+                "outputs",
+                "symmetry",
+                "share_outcomes",
+                "memory_monitor",
+            ],
+        )
+        # Output diversity
+        summary["n_distinct_outputs"] = search_state.outputs.n_distinct
+        # Only with a memory option, the peak differs between runs
+        if search_state.memory_monitor is not None:
+            summary["peak_memory"] = search_state.memory_monitor.peak
+        summary["n_solutions_found"] = search_state.solutions.n_found
+        summary["n_solutions_discarded"] = search_state.solutions.n_discarded
         with args.search_log.with_suffix(".json").open("w") as f:
-            json.dump(
-                attr.asdict(
-                    search_state,
-                    filter=lambda attrib, _: attrib.name
-                    not in ["logger", "memory", "solutions"],
-                ),
-                f,
-            )
+            json.dump(summary, f)
 
-    solutions = [attr.asdict(s) for s in search_state.solutions]
+    # Numbered among the solutions found in their phase, as passed to `on_solution`
+    solutions = [
+        (number, solution_to_dict(s)) for number, s in search_state.solutions.numbered()
+    ]
 
     # Solutions file
     if args.solutions_file:
         with args.solutions_file.open("w") as f:
-            json.dump(solutions, f)
+            json.dump([solution for _, solution in solutions], f)
 
     # Solutions dir
     args.solutions_dir.mkdir(exist_ok=True, parents=True)
-    counter = collections.Counter()
-    for solution in solutions:
-        file_name = (
-            args.solutions_dir
-            / f"phase{solution['phase']}_solution{counter[solution['phase']]}.json"
-        )
-
-        solution["program"] = [int(c) for c in solution["program"]]
+    for number, solution in solutions:
+        file_name = solution_file_name(args.solutions_dir, solution["phase"], number)
         file_name.write_text(json.dumps(solution))
 
-        counter[solution["phase"]] += 1
-
 
 if __name__ == "__main__":
     main(args=argv[1:])
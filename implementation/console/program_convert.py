@@ -1,4 +1,5 @@
 """This file add the console interface to the package."""
+
 import argparse
 from pathlib import Path
 from sys import argv
@@ -6,13 +7,15 @@ from tempfile import TemporaryDirectory
 from typing import Union
 import sys
 
-sys.path.insert(0, r"../")
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
 
-from initial_primitives import InitialPrimitives
-from weight_primitives import WeightPrimitives
-from console.utils import absolute_path_extension, absolute_path_dir
-from convert.machine_state_interpretation import generate_table
-from convert.plot_machine_states import plot_machine_states
+from console.utils import (
+    absolute_path,
+    absolute_path_extension,
+    absolute_path_dir,
+    add_profile_argument,
+    profiled,
+)
 from version import __version__
 
 
@@ -46,8 +49,8 @@ def parse_args(args: Union[list, None] = None) -> argparse.Namespace:
 
     parser.add_argument(
         "program_file",
-        type=absolute_path_extension([".jsonl"]),
-        help="Which log file to use?",
+        type=absolute_path_extension([".jsonl", ".trace"]),
+        help="Which log file to use (.jsonl or .trace)?",
     )
 
     subparser = parser.add_subparsers()
@@ -74,6 +77,39 @@ def parse_args(args: Union[list, None] = None) -> argparse.Namespace:
         help="A directory to store the animation frames (in .png). If the directory is ",
     )
 
+    animation.add_argument(
+        "--renderer",
+        default="latex",
+        choices=["latex", "python"],
+        help="Render frames with LaTeX and ImageMagick, or directly in Python (no external tools)",
+    )
+
+    animation.add_argument(
+        "--workers",
+        type=int,
+        help="The number of processes rendering frames (default: the number of processors)",
+    )
+
+    animation.add_argument(
+        "--cache_dir",
+        type=absolute_path,
+        help="A directory with cached frames (default: cache/frames)",
+    )
+
+    animation.add_argument(
+        "--start", default=0, type=int, help="The first step to animate"
+    )
+
+    animation.add_argument(
+        "--stop",
+        type=int,
+        help="The step to stop at (default: the end of the trace)",
+    )
+
+    animation.add_argument(
+        "--stride", default=1, type=int, help="Animate every this many steps"
+    )
+
     animation.add_argument(
         "output_file",
         type=absolute_path_extension([".gif"]),
@@ -81,6 +117,8 @@ def parse_args(args: Union[list, None] = None) -> argparse.Namespace:
     )
     animation.set_defaults(which="animation")
 
+    add_profile_argument(parser)
+
     return parser.parse_args(args)
 
 
@@ -94,17 +132,44 @@ def main(args=None) -> None:
     # Parse the arguments
     args = parse_args(args)
 
-    if args.which == "animation":
-        plot_machine_states(args.program_file, args.image_dir, args.output_file)
-    elif args.which == "table":
-        if args.primitives_set == "WEIGHT":
-            primitives = WeightPrimitives()
+    # Deferred until the arguments are parsed, for a fast start
+    from initial_primitives import InitialPrimitives
+    from weight_primitives import WeightPrimitives
+    from convert.machine_state_interpretation import generate_table
+    from convert.plot_machine_states import plot_machine_states
+    from convert.rasterize_machine_states import rasterize_machine_states
+
+    with profiled(args.profile):
+        if args.which == "animation" and args.renderer == "python":
+            rasterize_machine_states(
+                args.program_file,
+                args.output_file,
+                start=args.start,
+                stop=args.stop,
+                stride=args.stride,
+            )
+        elif args.which == "animation":
+            plot_machine_states(
+                args.program_file,
+                args.image_dir,
+                args.output_file,
+                n_workers=args.workers,
+                frame_cache_dir=args.cache_dir,
+                start=args.start,
+                stop=args.stop,
+                stride=args.stride,
+            )
+        elif args.which == "table":
+            if args.primitives_set == "WEIGHT":
+                primitives = WeightPrimitives()
+            else:
+                primitives = InitialPrimitives()
+
+            generate_table(
+                args.program_file, args.output_file, primitives.get_op_names()
+            )
         else:
-            primitives = InitialPrimitives()
-
-        generate_table(args.program_file, args.output_file, primitives.get_op_names())
-    else:
-        raise ValueError("Unknown subroutine")
+            raise ValueError("Unknown subroutine")
 
 
 if __name__ == "__main__":
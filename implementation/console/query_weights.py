@@ -0,0 +1,88 @@
+"""This file add the console interface to the package."""
+import argparse
+import json
+from pathlib import Path
+from sys import argv
+from typing import Union
+import sys
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+from console.utils import absolute_path_extension, add_profile_argument, profiled
+from tasks import Tasks
+from version import __version__
+
+
+def parse_args(args: Union[list, None] = None) -> argparse.Namespace:
+    """Parse the command line arguments for querying a weight database.
+    Args:
+      args: List of input arguments. (Default value=None).
+    Returns:
+      Namespace with parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Find the already enumerated programs that solve a task"
+    )
+
+    # Version
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {__version__}"
+    )
+
+    parser.add_argument(
+        "weight_database",
+        type=Path,
+        help="Directory with the weight database (see `--weight_database` of `levin_search.py`)",
+    )
+
+    parser.add_argument(
+        "tasks",
+        nargs="*",
+        type=Tasks.from_string,
+        help=f"The tasks to evaluate, any of {', '.join(map(str, Tasks))} (default: all tasks)",
+    )
+
+    parser.add_argument(
+        "--solutions_file",
+        type=absolute_path_extension([".json"]),
+        help="Store the programs that solve the tasks in this file (.json)",
+    )
+
+    add_profile_argument(parser)
+
+    return parser.parse_args(args)
+
+
+def main(args=None) -> None:
+    """ Query the weight database.
+    Args:
+      args: Arguments for the programme (Default value=None).
+    """
+
+    # Parse the arguments
+    args = parse_args(args)
+
+    # Deferred until the arguments are parsed, for a fast start
+    from weight_database import WeightDatabase
+
+    database = WeightDatabase(args.weight_database)
+    with profiled(args.profile):
+        results = database.query_all(args.tasks or None)
+
+    solutions = {}
+    for task, (rows, generalizes) in results.items():
+        print(
+            f"{task}: {len(rows)} of {len(database)} programs match the samples, "
+            f"{int(generalizes.sum())} generalize"
+        )
+        solutions[str(task)] = [
+            dict(database.programs[row], generalizes=bool(g))
+            for row, g in zip(rows.tolist(), generalizes.tolist())
+        ]
+
+    if args.solutions_file:
+        with args.solutions_file.open("w") as f:
+            json.dump(solutions, f)
+
+
+if __name__ == "__main__":
+    main(args=argv[1:])
@@ -1,15 +1,37 @@
 """This file add the console interface to the package."""
 import argparse
+import functools
+import json
+from pathlib import Path
 from sys import argv
 from typing import Union
 import sys
 
-sys.path.insert(0, r"../")
-from initial_primitives import InitialPrimitives
-from weight_primitives import WeightPrimitives
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
 from version import __version__
-from levin_search import main_run_program
-from console.utils import absolute_path_extension, parse_program, parse_program_file
+from console.utils import (
+    absolute_path,
+    absolute_path_extension,
+    add_profile_argument,
+    parse_program,
+    parse_program_file,
+    profiled,
+)
+from tasks import Tasks
+
+
+def add_log_file_argument(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "log_file",
+        type=absolute_path_extension([".jsonl", ".trace"]),
+        help="Store the logs in this file (.jsonl, or .trace for the compact binary format)",
+    )
+
+
+def programs_input(p):
+    if p == "-":
+        return Path(p)
+    return absolute_path_extension([".jsonl", ".csv"])(p)
 
 
 def parse_args(args: Union[list, None] = None) -> argparse.Namespace:
@@ -51,6 +73,8 @@ def parse_args(args: Union[list, None] = None) -> argparse.Namespace:
         help="Use the following set of primitives",
     )
 
+    add_profile_argument(parser)
+
     subparser = parser.add_subparsers()
 
     file = subparser.add_parser("file")
@@ -60,6 +84,7 @@ def parse_args(args: Union[list, None] = None) -> argparse.Namespace:
         type=parse_program_file,
         help="file with the program stored (.txt)",
     )
+    add_log_file_argument(file)
     file.set_defaults(which="file")
 
     program = subparser.add_parser("string")
@@ -69,17 +94,93 @@ def parse_args(args: Union[list, None] = None) -> argparse.Namespace:
         type=parse_program,
         help="a comma separated program (of integers)",
     )
+    add_log_file_argument(program)
     program.set_defaults(which="string")
 
-    parser.add_argument(
-        "log_file",
+    batch = subparser.add_parser("batch", help="run many programs")
+
+    batch.add_argument(
+        "programs_file",
+        type=programs_input,
+        help="file with one program per line (.jsonl, a list or an object with a `program`), per row (.csv), "
+        "or - for lines on stdin (JSON or comma separated)",
+    )
+
+    batch.add_argument(
+        "--output",
         type=absolute_path_extension([".jsonl"]),
-        help="Store the logs in this file (.jsonl)",
+        help="Store the result records in this file (.jsonl, default: stdout)",
+    )
+
+    batch.add_argument(
+        "--tasks",
+        nargs="+",
+        choices=list(Tasks),
+        type=Tasks.from_string,
+        help="Evaluate the final weights on these tasks",
+    )
+
+    batch.add_argument(
+        "--trace_dir",
+        type=absolute_path,
+        help="Store the trace of every program in this directory",
+    )
+
+    batch.add_argument(
+        "--trace_format",
+        default=".trace",
+        choices=[".jsonl", ".trace"],
+        help="The format of the traces",
+    )
+
+    batch.add_argument(
+        "--workers",
+        type=int,
+        help="The number of processes (default: the number of CPUs)",
     )
+    batch.set_defaults(which="batch")
 
     return parser.parse_args(args)
 
 
+def run_batch_programs(args: argparse.Namespace, primitives) -> None:
+    """Run the programs of the batch subcommand and stream the result records as JSON lines.
+
+    Args:
+      args: The parsed arguments.
+      primitives: The primitives of the universal machine.
+    """
+    from program_batch import read_programs, run_batch
+
+    if args.programs_file.name == "-":
+        programs_file = sys.stdin
+    else:
+        programs_file = args.programs_file.open()
+    output = sys.stdout if args.output is None else args.output.open("w")
+
+    try:
+        results = run_batch(
+            read_programs(programs_file, args.programs_file.suffix == ".csv"),
+            primitives,
+            args.program_tape_size,
+            args.work_tape_size,
+            args.n_weights,
+            tasks=args.tasks,
+            trace_dir=args.trace_dir,
+            trace_suffix=args.trace_format,
+            n_workers=args.workers,
+        )
+        for result in results:
+            output.write(json.dumps(result))
+            output.write("\n")
+            output.flush()
+    finally:
+        if programs_file is not sys.stdin:
+            programs_file.close()
+        if output is not sys.stdout:
+            output.close()
+
+
 def main(args=None) -> None:
     """ Run a program.
     Args:
@@ -89,27 +190,43 @@ def main(args=None) -> None:
     # Parse the arguments
     args = parse_args(args)
 
-    if args.which == "string":
-        program = args.program_string
-    elif args.which == "file":
-        program = args.program_file
-    else:
-        raise ValueError("Unknown subroutine")
+    # Deferred until the arguments are parsed, for a fast start
+    from initial_primitives import InitialPrimitives
+    from weight_primitives import WeightPrimitives
+    from levin_search import main_run_program
 
     if args.primitives_set == "WEIGHT":
         primitives = WeightPrimitives()
     else:
         primitives = InitialPrimitives()
 
-    main_run_program(
-        primitives,
-        program,
-        args.program_tape_size,
-        args.work_tape_size,
-        args.n_weights,
-        args.log_file,
+    # Runs a solution of COUNT, for the estimate of the overhead of profiling
+    calibration = functools.partial(
+        main_run_program, primitives, [1, 0, 2, 0], 100, 10, 100, None
     )
 
+    if args.which == "batch":
+        # Profiles this process only, with `--workers 1` the programs run in it
+        with profiled(args.profile, calibration=calibration):
+            run_batch_programs(args, primitives)
+        return
+    elif args.which == "string":
+        program = args.program_string
+    elif args.which == "file":
+        program = args.program_file
+    else:
+        raise ValueError("Unknown subroutine")
+
+    with profiled(args.profile, calibration=calibration):
+        main_run_program(
+            primitives,
+            program,
+            args.program_tape_size,
+            args.work_tape_size,
+            args.n_weights,
+            args.log_file,
+        )
+
 
 if __name__ == "__main__":
     main(args=argv[1:])
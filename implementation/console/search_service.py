@@ -0,0 +1,80 @@
+"""This file add the console interface to the package."""
+import argparse
+import json
+from pathlib import Path
+from sys import argv
+from typing import Union
+import sys
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+from console.utils import absolute_path, add_profile_argument
+from version import __version__
+
+
+def parse_args(args: Union[list, None] = None) -> argparse.Namespace:
+    """Parse the command line arguments for the search service.
+    Args:
+      args: List of input arguments. (Default value=None).
+    Returns:
+      Namespace with parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Local service running Levin searches and programs on warm workers"
+    )
+
+    # Version
+    parser.add_argument(
+        "--version", action="version", version=f"%(prog)s {__version__}"
+    )
+
+    parser.add_argument(
+        "socket", type=absolute_path, help="The UNIX socket of the service"
+    )
+
+    subparser = parser.add_subparsers()
+
+    serve = subparser.add_parser("serve", help="run the service")
+
+    serve.add_argument(
+        "--workers", default=2, type=int, help="The number of worker processes"
+    )
+    add_profile_argument(serve)
+    serve.set_defaults(which="serve")
+
+    submit = subparser.add_parser(
+        "submit", help="submit a job and print its events (JSON lines)"
+    )
+
+    submit.add_argument(
+        "job",
+        type=json.loads,
+        help='the job as JSON object, e.g. \'{"type": "search", "task": "COUNT", "search_length": 5}\'',
+    )
+    submit.set_defaults(which="submit")
+
+    return parser.parse_args(args)
+
+
+def main(args=None) -> None:
+    """ Run or use the search service.
+    Args:
+      args: Arguments for the programme (Default value=None).
+    """
+
+    # Parse the arguments
+    args = parse_args(args)
+
+    # Deferred until the arguments are parsed, for a fast start
+    from search_service import serve, submit
+
+    if args.which == "serve":
+        serve(args.socket, args.workers, args.profile)
+    elif args.which == "submit":
+        for event in submit(args.socket, args.job):
+            print(json.dumps(event), flush=True)
+    else:
+        raise ValueError("Unknown subroutine")
+
+
+if __name__ == "__main__":
+    main(args=argv[1:])
@@ -1,4 +1,6 @@
 import argparse
+import contextlib
+import sys
 from pathlib import Path
 
 
@@ -28,6 +30,41 @@ def absolute_path_dir():
     return absolute_path_dir_valid
 
 
+def add_profile_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        type=absolute_path,
+        help="Profile the run, store pstats files, collapsed stacks for flame graphs and a summary of the hot "
+        "functions in this directory",
+    )
+
+
+@contextlib.contextmanager
+def profiled(directory, section: str = "run", calibration=None):
+    """Profile the block if a directory is given, see `Profiler`
+
+    Args:
+        directory: the directory for the profiles, or None
+        section: the name of the first section
+        calibration: a function with a representative workload, for the estimate of the overhead
+
+    Yields:
+        The `Profiler`, or None
+    """
+    if directory is None:
+        yield None
+        return
+
+    from profiler import Profiler
+
+    profiler = Profiler(directory, section, calibration=calibration)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        print(profiler.stop(), file=sys.stderr)
+
+
 def parse_program(program: str):
     return [int(cell) for cell in program.split(",")]
 
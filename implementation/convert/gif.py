@@ -0,0 +1,162 @@
+"""Minimal animated GIF encoder. Frames are palette-indexed NumPy arrays, only the region that changed with respect to
+the previous frame is encoded."""
+import struct
+
+import numpy as np
+
+
+def lzw_encode(pixels: bytes, min_code_size: int) -> bytes:
+    """Compress palette indices with the variable-length LZW variant used by GIF
+
+    Args:
+        pixels: the palette indices
+        min_code_size: the minimum code size (bits per palette index, at least 2)
+
+    Returns:
+        The compressed data
+    """
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+
+    out = bytearray()
+    bit_buffer = 0
+    n_bits = 0
+
+    code_size = min_code_size + 1
+    next_code = end_code + 1
+    table = {}
+
+    # Clear code
+    bit_buffer |= clear_code << n_bits
+    n_bits += code_size
+
+    prefix = pixels[0]
+    for pixel in pixels[1:]:
+        key = (prefix << 8) | pixel
+        code = table.get(key)
+        if code is not None:
+            prefix = code
+            continue
+
+        bit_buffer |= prefix << n_bits
+        n_bits += code_size
+        while n_bits >= 8:
+            out.append(bit_buffer & 0xFF)
+            bit_buffer >>= 8
+            n_bits -= 8
+
+        if next_code < 4096:
+            table[key] = next_code
+            if next_code == (1 << code_size):
+                code_size += 1
+            next_code += 1
+        else:
+            # Table is full, start over
+            bit_buffer |= clear_code << n_bits
+            n_bits += code_size
+            table.clear()
+            code_size = min_code_size + 1
+            next_code = end_code + 1
+
+        prefix = pixel
+
+    bit_buffer |= prefix << n_bits
+    n_bits += code_size
+    # The decoder adds an entry for the last code before reading the end code
+    if next_code < 4096 and next_code == (1 << code_size):
+        code_size += 1
+    bit_buffer |= end_code << n_bits
+    n_bits += code_size
+    while n_bits >= 8:
+        out.append(bit_buffer & 0xFF)
+        bit_buffer >>= 8
+        n_bits -= 8
+
+    if n_bits > 0:
+        out.append(bit_buffer & 0xFF)
+
+    return bytes(out)
+
+
+class GifWriter(object):
+    """Write an animated GIF frame by frame
+
+    Args:
+        f: the binary file object to write to
+        width: the width of the animation
+        height: the height of the animation
+        palette: sequence of (r, g, b) tuples, at most 256
+        delay: the delay between frames in hundredths of a second
+        loop: the number of loops (0 is forever)
+    """
+
+    def __init__(self, f, width: int, height: int, palette, delay: int = 100, loop=0):
+        self._f = f
+        self.width = width
+        self.height = height
+        self.delay = delay
+        self._previous = None
+
+        # Palette size is a power of two, at least 4 colors
+        self._color_bits = max(2, int(np.ceil(np.log2(max(len(palette), 2)))))
+        table = np.zeros((1 << self._color_bits, 3), dtype=np.uint8)
+        table[: len(palette)] = palette
+
+        f.write(b"GIF89a")
+        f.write(
+            struct.pack("<HHBBB", width, height, 0x80 | (self._color_bits - 1), 0, 0)
+        )
+        f.write(table.tobytes())
+        # Looping
+        f.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01")
+        f.write(struct.pack("<HB", loop, 0))
+
+    def add_frame(self, pixels: np.ndarray):
+        """Add a frame
+
+        Args:
+            pixels: array of palette indices with shape (height, width)
+        """
+        if pixels.shape != (self.height, self.width):
+            raise ValueError("Frame size differs from the animation size")
+
+        if self._previous is None:
+            top, left, bottom, right = 0, 0, self.height, self.width
+        else:
+            rows, cols = np.nonzero(pixels != self._previous)
+            if len(rows) == 0:
+                top, left, bottom, right = 0, 0, 1, 1
+            else:
+                top, bottom = rows.min(), rows.max() + 1
+                left, right = cols.min(), cols.max() + 1
+        self._previous = pixels.copy()
+
+        region = pixels[top:bottom, left:right]
+
+        # Graphic control extension: do not dispose, so unchanged pixels remain
+        self._f.write(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 0x04, self.delay, 0, 0))
+        # Image descriptor
+        self._f.write(
+            struct.pack(
+                "<BHHHHB",
+                0x2C,
+                int(left),
+                int(top),
+                int(right - left),
+                int(bottom - top),
+                0,
+            )
+        )
+
+        data = lzw_encode(
+            np.ascontiguousarray(region, dtype=np.uint8).tobytes(), self._color_bits
+        )
+        self._f.write(bytes([self._color_bits]))
+        for i in range(0, len(data), 255):
+            block = data[i : i + 255]
+            self._f.write(bytes([len(block)]))
+            self._f.write(block)
+        self._f.write(b"\x00")
+
+    def close(self):
+        self._f.write(b"\x3b")
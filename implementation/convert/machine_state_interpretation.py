@@ -1,13 +1,17 @@
-import json
+import sys
 from pathlib import Path
 from typing import Sequence
 
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+
+from program_trace import read_trace
+
 
 def generate_table(log_file: Path, output_file: Path, op_names: Sequence[str]) -> None:
     """Generate a table of instructions when provided with a valid program
 
     Args:
-        log_file: the file containing the program
+        log_file: the trace of the program run (.jsonl or .trace)
         output_file: the file to write the table to
 
     Examples:
@@ -24,11 +28,9 @@ def generate_table(log_file: Path, output_file: Path, op_names: Sequence[str]) -
     ips = set()
     program = None
 
-    with log_file.open() as f:
-        for line in f:
-            data = json.loads(line)
-            ips.add(data["state"]["instruction_pointer"])
-            program = data["storage"]["program_tape"]
+    for data in read_trace(log_file):
+        ips.add(data["state"]["instruction_pointer"])
+        program = data["storage"]["program_tape"]
 
     table = f"| Address | Contents | Interpretation |\n"
     table += f"|---------|----------|----------------|\n"
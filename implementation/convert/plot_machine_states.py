@@ -1,33 +1,99 @@
 """This file contains functionality related to the visualisation of the machine state."""
-import json
+import hashlib
+import shutil
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 
 from jinja2.environment import Template
 
 
-sys.path.insert(0, r"../")
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
 
-from paths import implementation_dir
+from paths import implementation_dir, cache_dir
 from config import imagemagick_convert_path, pdflatex_path
+from program_trace import read_trace
 
 
 # https://tex.stackexchange.com/questions/49839/turing-machine-figure
 # http://www.texample.net/tikz/examples/turing-machine-2/
 def plot_machine_states(
-    log_file: Path, image_dir: Path, animation_output_file: Path
+    log_file: Path,
+    image_dir: Path,
+    animation_output_file: Path,
+    n_workers: int = None,
+    frame_cache_dir: Path = None,
+    start: int = 0,
+    stop: int = None,
+    stride: int = 1,
 ) -> None:
-    image_dir.mkdir(exist_ok=True)
+    """Render every state in the trace and combine the frames into an animation.
 
-    with log_file.open("r") as f:
-        for line in f:
-            program = json.loads(line)
-            plot_single_state(program, image_dir)
+    Frames are rendered in a process pool. Rendered frames are cached by the hash of their LaTeX source (the state
+    and the template), frames that are already in the cache are not rendered again.
+
+    Args:
+        log_file: the trace of the program run
+        image_dir: the directory to write the frames to
+        animation_output_file: the animation (.gif)
+        n_workers: the number of rendering processes (default: the number of processors)
+        frame_cache_dir: the directory with cached frames (default: `cache/frames` in the root directory)
+        start: the first step to render
+        stop: the step to stop at (default: the end of the trace)
+        stride: render every this many steps
+    """
+    if frame_cache_dir is None:
+        frame_cache_dir = cache_dir() / "frames"
+
+    image_dir.mkdir(exist_ok=True, parents=True)
+    frame_cache_dir.mkdir(exist_ok=True, parents=True)
+
+    frames = []
+    submitted = set()
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = []
+        for program in read_trace(log_file, start, stop, stride):
+            tex, name = render_state(program)
+            digest = hashlib.sha256(tex.encode()).hexdigest()
+            frames.append((digest, image_dir / f"{name}.png"))
+
+            cached = frame_cache_dir / f"{digest}.png"
+            if digest in submitted or cached.exists():
+                continue
+
+            submitted.add(digest)
+            futures.append(executor.submit(render_frame, tex, cached))
+
+        for future in futures:
+            future.result()
+
+    for digest, frame in frames:
+        shutil.copyfile(frame_cache_dir / f"{digest}.png", frame)
 
     make_animation(animation_output_file, image_dir)
 
 
+def render_frame(tex: str, output_file: Path):
+    """Render the LaTeX source of a frame to an image.
+
+    Args:
+        tex: the LaTeX source
+        output_file: the image (.png), written only when rendering completes
+    """
+    path = output_file.with_name(f"{output_file.stem}.tmp.tex")
+    path.write_text(tex)
+    to_image(path)
+    path.with_suffix(".png").replace(output_file)
+
+
+@lru_cache(maxsize=1)
+def get_template() -> Template:
+    content = (implementation_dir() / "convert" / "template.tex.jinja").read_text()
+    return Template(content)
+
+
 def plot_single_state(program, image_dir):
     """Visualise the state of the system.
 
@@ -35,6 +101,23 @@ def plot_single_state(program, image_dir):
         program: The Program object (program tape, state etc.).
         image_dir: The directory to write the state image to.
     """
+    tex, name = render_state(program)
+
+    path = image_dir / f"{name}.tex"
+    path.write_text(tex)
+
+    to_image(path)
+
+
+def render_state(program):
+    """Render the LaTeX source visualising the state of the system.
+
+    Args:
+        program: The Program object (program tape, state etc.).
+
+    Returns:
+        The LaTeX source and the name of the frame.
+    """
     addresses = False
 
     state = program["state"]
@@ -68,8 +151,7 @@ def plot_single_state(program, image_dir):
     weight_tape.append(
         {"node_name": str(i + 1), "prev_node_name": prev_node_name, "value": " "}
     )
-    content = (implementation_dir() / "convert" / "template.tex.jinja").read_text()
-    template = Template(content)
+    template = get_template()
 
     node_name_head = (
         "a" + program_tape[instruction_pointer]["node_name"]
@@ -94,10 +176,7 @@ def plot_single_state(program, image_dir):
     else:
         addresses_str = ""
 
-    path = image_dir / f"{state['current_runtime']:08d}{addresses_str}.tex"
-    path.write_text(a)
-
-    to_image(path)
+    return a, f"{state['current_runtime']:08d}{addresses_str}"
 
 
 def to_image(path):
@@ -0,0 +1,310 @@
+"""Render machine state animations without LaTeX. The frames follow the layout of `template.tex.jinja` (program tape
+with instruction pointer, weight tape with weight pointer and the time step) and are drawn directly into arrays that
+are streamed into the GIF encoder."""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+
+from convert.gif import GifWriter
+from program_trace import read_trace
+
+WHITE, BLACK, WORK_TAPE, PROGRAM_TAPE, TIME = range(5)
+# white, black, red!10, green!10 and cyan!30 as in the LaTeX template
+PALETTE = [
+    (255, 255, 255),
+    (0, 0, 0),
+    (255, 230, 230),
+    (230, 255, 230),
+    (179, 255, 255),
+]
+
+# 5x7 bitmap font, one integer per row with the leftmost pixel as the most significant of five bits
+FONT = {
+    " ": (0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00),
+    "-": (0x00, 0x00, 0x00, 0x1F, 0x00, 0x00, 0x00),
+    "=": (0x00, 0x00, 0x1F, 0x00, 0x1F, 0x00, 0x00),
+    "0": (0x0E, 0x11, 0x13, 0x15, 0x19, 0x11, 0x0E),
+    "1": (0x04, 0x0C, 0x04, 0x04, 0x04, 0x04, 0x0E),
+    "2": (0x0E, 0x11, 0x01, 0x02, 0x04, 0x08, 0x1F),
+    "3": (0x1F, 0x02, 0x04, 0x02, 0x01, 0x11, 0x0E),
+    "4": (0x02, 0x06, 0x0A, 0x12, 0x1F, 0x02, 0x02),
+    "5": (0x1F, 0x10, 0x1E, 0x01, 0x01, 0x11, 0x0E),
+    "6": (0x06, 0x08, 0x10, 0x1E, 0x11, 0x11, 0x0E),
+    "7": (0x1F, 0x01, 0x02, 0x04, 0x08, 0x08, 0x08),
+    "8": (0x0E, 0x11, 0x11, 0x0E, 0x11, 0x11, 0x0E),
+    "9": (0x0E, 0x11, 0x11, 0x0F, 0x01, 0x02, 0x0C),
+    "A": (0x0E, 0x11, 0x11, 0x11, 0x1F, 0x11, 0x11),
+    "B": (0x1E, 0x11, 0x11, 0x1E, 0x11, 0x11, 0x1E),
+    "C": (0x0E, 0x11, 0x10, 0x10, 0x10, 0x11, 0x0E),
+    "D": (0x1C, 0x12, 0x11, 0x11, 0x11, 0x12, 0x1C),
+    "E": (0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x1F),
+    "F": (0x1F, 0x10, 0x10, 0x1E, 0x10, 0x10, 0x10),
+    "G": (0x0E, 0x11, 0x10, 0x17, 0x11, 0x11, 0x0F),
+    "H": (0x11, 0x11, 0x11, 0x1F, 0x11, 0x11, 0x11),
+    "I": (0x0E, 0x04, 0x04, 0x04, 0x04, 0x04, 0x0E),
+    "J": (0x07, 0x02, 0x02, 0x02, 0x02, 0x12, 0x0C),
+    "K": (0x11, 0x12, 0x14, 0x18, 0x14, 0x12, 0x11),
+    "L": (0x10, 0x10, 0x10, 0x10, 0x10, 0x10, 0x1F),
+    "M": (0x11, 0x1B, 0x15, 0x15, 0x11, 0x11, 0x11),
+    "N": (0x11, 0x11, 0x19, 0x15, 0x13, 0x11, 0x11),
+    "O": (0x0E, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E),
+    "P": (0x1E, 0x11, 0x11, 0x1E, 0x10, 0x10, 0x10),
+    "Q": (0x0E, 0x11, 0x11, 0x11, 0x15, 0x12, 0x0D),
+    "R": (0x1E, 0x11, 0x11, 0x1E, 0x14, 0x12, 0x11),
+    "S": (0x0F, 0x10, 0x10, 0x0E, 0x01, 0x01, 0x1E),
+    "T": (0x1F, 0x04, 0x04, 0x04, 0x04, 0x04, 0x04),
+    "U": (0x11, 0x11, 0x11, 0x11, 0x11, 0x11, 0x0E),
+    "V": (0x11, 0x11, 0x11, 0x11, 0x11, 0x0A, 0x04),
+    "W": (0x11, 0x11, 0x11, 0x15, 0x15, 0x15, 0x0A),
+    "X": (0x11, 0x11, 0x0A, 0x04, 0x0A, 0x11, 0x11),
+    "Y": (0x11, 0x11, 0x11, 0x0A, 0x04, 0x04, 0x04),
+    "Z": (0x1F, 0x01, 0x02, 0x04, 0x08, 0x10, 0x1F),
+}
+GLYPHS = {
+    c: np.array([[(row >> (4 - i)) & 1 for i in range(5)] for row in rows], dtype=bool)
+    for c, rows in FONT.items()
+}
+CHAR_WIDTH = 6
+CHAR_HEIGHT = 7
+
+MARGIN = 10
+CELL_HEIGHT = 15
+LABEL_HEIGHT = CHAR_HEIGHT + 6
+ARROW_LENGTH = 12
+TAPE_GAP = 45
+CONTINUATION = 20
+
+
+def text_width(text: str) -> int:
+    return len(text) * CHAR_WIDTH - 1
+
+
+def draw_text(image: np.ndarray, x: int, y: int, text: str, color: int = BLACK):
+    for i, c in enumerate(text.upper()):
+        glyph = GLYPHS.get(c, GLYPHS[" "])
+        left = x + i * CHAR_WIDTH
+        image[y : y + CHAR_HEIGHT, left : left + 5][glyph] = color
+
+
+def draw_box(
+    image: np.ndarray, x: int, y: int, width: int, height: int, fill: int, border=True
+):
+    image[y : y + height, x : x + width] = fill
+    if border:
+        image[y, x : x + width] = BLACK
+        image[y + height - 1, x : x + width] = BLACK
+        image[y : y + height, x] = BLACK
+        image[y : y + height, x + width - 1] = BLACK
+
+
+def draw_label(
+    image: np.ndarray, x: int, y: int, text: str, fill: int = WHITE, border=True
+):
+    draw_box(image, x, y, text_width(text) + 6, LABEL_HEIGHT, fill, border)
+    draw_text(image, x + 3, y + 3, text)
+
+
+def draw_arrow(image: np.ndarray, x: int, y_start: int, y_end: int):
+    """Draw a vertical arrow pointing down"""
+    image[y_start:y_end, x] = BLACK
+    for i in range(4):
+        image[y_end - 1 - i, x - i : x + i + 1] = BLACK
+
+
+class Layout(object):
+    """Positions of the elements in a frame, fixed for all frames of an animation
+
+    Args:
+        max_work_tape: the largest number of work tape cells
+        max_program_tape: the largest number of program tape cells
+        n_weights: the number of weights
+        max_value_chars: the length of the longest value on the tapes
+        max_time: the last time step
+    """
+
+    def __init__(
+        self,
+        max_work_tape: int,
+        max_program_tape: int,
+        n_weights: int,
+        max_value_chars: int,
+        max_time: int,
+    ):
+        self.cell_width = max(CELL_HEIGHT, text_width("0" * max_value_chars) + 7)
+
+        self.ip_label_y = MARGIN
+        self.tape_y = self.ip_label_y + LABEL_HEIGHT + ARROW_LENGTH
+        self.weights_y = self.tape_y + CELL_HEIGHT + TAPE_GAP
+        self.wp_label_y = self.weights_y - ARROW_LENGTH - LABEL_HEIGHT
+        self.height = self.weights_y + CELL_HEIGHT + MARGIN
+
+        # The weights are aligned with address 0 of the program tape
+        self.address0_x = MARGIN + max(
+            CONTINUATION + max_work_tape * self.cell_width,
+            text_width("Weights") + 10,
+        )
+        tape_end = self.address0_x + max_program_tape * self.cell_width
+        # Right of the tape and of the instruction pointer label, which is in the row of the time step
+        self.label_x = (
+            max(tape_end + CONTINUATION, MARGIN + text_width("Instruction Pointer") + 6)
+            + 10
+        )
+        weights_end = self.address0_x + (n_weights + 1) * self.cell_width
+        labels_end = (
+            self.label_x
+            + 6
+            + max(text_width("Program Tape"), text_width(f"T = {max_time}"))
+        )
+        self.width = max(labels_end, weights_end) + MARGIN
+
+    def cell_x(self, address: int) -> int:
+        return self.address0_x + address * self.cell_width
+
+
+def render_state(program, layout: Layout) -> np.ndarray:
+    """Draw the state of the system.
+
+    Args:
+        program: The Program object (program tape, state etc.) as a dictionary.
+        layout: The positions of the elements in the frame.
+
+    Returns:
+        Array with palette indices.
+    """
+    state = program["state"]
+    storage = program["storage"]
+    image = np.full((layout.height, layout.width), WHITE, dtype=np.uint8)
+    w = layout.cell_width
+
+    # Program tape, work tape cells are at negative addresses
+    work_tape = storage["work_tape"]
+    cells = [(-i - 1, v, WORK_TAPE) for i, v in enumerate(work_tape)]
+    cells += [(i, v, PROGRAM_TAPE) for i, v in enumerate(storage["program_tape"])]
+    for address, value, fill in cells:
+        x = layout.cell_x(address)
+        draw_box(image, x, layout.tape_y, w + 1, CELL_HEIGHT, fill)
+        text = str(value)
+        draw_text(image, x + (w - text_width(text)) // 2 + 1, layout.tape_y + 4, text)
+
+    # Tape continuation on both sides
+    first = layout.cell_x(-len(work_tape))
+    last = layout.cell_x(len(storage["program_tape"])) + 1
+    for y in (layout.tape_y, layout.tape_y + CELL_HEIGHT - 1):
+        image[y, first - CONTINUATION : first] = BLACK
+        image[y, last : last + CONTINUATION] = BLACK
+    draw_label(image, layout.label_x, layout.tape_y + 1, "Program Tape", border=False)
+
+    # Instruction pointer
+    draw_pointer(
+        image,
+        layout,
+        "Instruction Pointer",
+        layout.cell_x(state["instruction_pointer"]) + w // 2,
+        layout.ip_label_y,
+        layout.label_x - 10,
+    )
+
+    # Time steps
+    draw_label(
+        image,
+        layout.label_x,
+        layout.ip_label_y,
+        f"T = {state['current_runtime']}",
+        TIME,
+    )
+
+    # Weight tape, followed by an empty cell without border
+    for i, value in enumerate(storage["weights"]):
+        x = layout.cell_x(i)
+        draw_box(image, x, layout.weights_y, w + 1, CELL_HEIGHT, WHITE)
+        text = str(value)
+        draw_text(
+            image, x + (w - text_width(text)) // 2 + 1, layout.weights_y + 4, text
+        )
+    draw_label(
+        image,
+        MARGIN,
+        layout.weights_y + 1,
+        "Weights",
+        border=False,
+    )
+
+    # Weight pointer
+    draw_pointer(
+        image,
+        layout,
+        "Weight Pointer",
+        layout.cell_x(state["weight_pointer"]) + w // 2,
+        layout.wp_label_y,
+    )
+
+    return image
+
+
+def draw_pointer(
+    image: np.ndarray, layout: Layout, text: str, x: int, y: int, max_x: int = None
+) -> int:
+    """Draw a label centered above `x` (within the frame and left of `max_x`) with an arrow pointing down
+
+    Returns:
+        The x of the label
+    """
+    label_width = text_width(text) + 6
+    max_x = layout.width if max_x is None else max_x
+    label_x = min(max(x - label_width // 2, 0), max_x - label_width)
+    draw_label(image, label_x, y, text)
+    draw_arrow(image, x, y + LABEL_HEIGHT, y + LABEL_HEIGHT + ARROW_LENGTH)
+    return label_x
+
+
+def get_layout(
+    log_file: Path, start: int = 0, stop: int = None, stride: int = 1
+) -> Layout:
+    """Determine a layout that fits all states in the trace (or in `range(start, stop, stride)`)"""
+    max_work_tape = max_program_tape = n_weights = max_time = 0
+    max_value_chars = 1
+    n_states = 0
+    for program in read_trace(log_file, start, stop, stride):
+        n_states += 1
+        storage = program["storage"]
+        max_work_tape = max(max_work_tape, len(storage["work_tape"]))
+        max_program_tape = max(max_program_tape, len(storage["program_tape"]))
+        n_weights = max(n_weights, len(storage["weights"]))
+        max_time = max(max_time, program["state"]["current_runtime"])
+        values = storage["work_tape"] + storage["program_tape"] + storage["weights"]
+        max_value_chars = max([max_value_chars] + [len(str(v)) for v in values])
+
+    if n_states == 0:
+        raise ValueError("No states to animate")
+
+    return Layout(max_work_tape, max_program_tape, n_weights, max_value_chars, max_time)
+
+
+def rasterize_machine_states(
+    log_file: Path,
+    animation_output_file: Path,
+    delay: int = 100,
+    start: int = 0,
+    stop: int = None,
+    stride: int = 1,
+) -> None:
+    """Animate the states in the trace without external tools.
+
+    Args:
+        log_file: the trace of the program run
+        animation_output_file: the animation (.gif)
+        delay: the time between frames in hundredths of a second
+        start: the first step to animate
+        stop: the step to stop at (default: the end of the trace)
+        stride: animate every this many steps
+    """
+    layout = get_layout(log_file, start, stop, stride)
+
+    with animation_output_file.open("wb") as f:
+        gif = GifWriter(f, layout.width, layout.height, PALETTE, delay=delay)
+        for program in read_trace(log_file, start, stop, stride):
+            gif.add_frame(render_state(program, layout))
+        gif.close()
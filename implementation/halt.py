@@ -21,3 +21,5 @@ class HaltingCode(Enum):
     ERROR_FREE_OUT_BOUNDS = auto()
     ERROR_OVERFLOW = auto()
     CONTINUE = auto()
+    # The state recurred, the program would run until the time limit (see `UniversalMachine`)
+    ERROR_INFINITE_LOOP = auto()
@@ -1,4 +1,8 @@
+import functools
+import shutil
+import sys
 from pathlib import Path
+from typing import Union
 
 import attr
 from tqdm import tqdm
@@ -8,10 +12,28 @@ from halt import HaltingCode
 from logs import get_logger
 from search_state import SearchState
 from solution import Solution
+from solution_store import SolutionStore
 from task import Task, Tasks
 from universal_machine import UniversalMachine
 from primitives import Primitives
 from program import Program
+from program_memory import ProgramMemory, SpillingProgramMemory
+from outcome_cache import OutcomeCache, machine_config_hash
+from weight_database import WeightDatabaseWriter
+from program_compiler import ProgramCompiler
+from symmetry import Symmetry
+from sibling_outcomes import SiblingOutcomes
+from loop_accelerator import LoopAccelerator
+from search_events import MemoryEvent, ProgressEvent, SolutionEvent
+from memory_usage import MemoryMonitor, format_bytes
+from search_timeline import SearchTimeline
+from phase_estimator import PhaseEstimator
+from search_checkpoint import (
+    read_checkpoint,
+    restore_search_state,
+    save_checkpoint,
+    search_config,
+)
 
 
 def run_program(
@@ -20,29 +42,85 @@ def run_program(
     universal_machine: UniversalMachine,
     base_program: Program,
     log_file: Path = None,
+    track_reads: bool = False,
 ):
     state = attr.evolve(
         base_program,
         program_tape=program,
         weights=np.zeros(base_program.n_weights, dtype=np.int16),
         work_tape=[],
+        read_set=set() if track_reads else None,
     )
     universal_machine.run(state, current_time_limit, log_file)
 
     return state
 
 
-def levin_search_phase(
+def cached_run_program(
+    program: list,
+    current_time_limit: int,
+    universal_machine: UniversalMachine,
+    base_program: Program,
+    outcome_cache: OutcomeCache = None,
+    track_reads: bool = False,
+):
+    """Run the program, unless its outcome is in the cache. The state of a cached outcome only holds the halting
+    code, the runtime and the weights. The cache stores the executed steps of a detected loop."""
+    if outcome_cache is None:
+        return run_program(
+            program,
+            current_time_limit,
+            universal_machine,
+            base_program,
+            track_reads=track_reads,
+        )
+
+    outcome = outcome_cache.get(program, current_time_limit)
+    if outcome is not None:
+        halt, current_runtime, weights = outcome
+        n_skipped_steps = 0
+        if halt == HaltingCode.ERROR_INFINITE_LOOP:
+            n_skipped_steps = current_time_limit - current_runtime
+            current_runtime = current_time_limit
+        return attr.evolve(
+            base_program,
+            program_tape=program,
+            halt=halt,
+            current_runtime=current_runtime,
+            n_skipped_steps=n_skipped_steps,
+            weights=weights,
+        )
+
+    state = run_program(
+        program,
+        current_time_limit,
+        universal_machine,
+        base_program,
+        track_reads=track_reads,
+    )
+    outcome_cache.put(
+        program,
+        current_time_limit,
+        state.halt,
+        state.current_runtime - state.n_skipped_steps,
+        state.weights,
+    )
+    return state
+
+
+def _run_extensions(
     search_state: SearchState,
     program_trail_status: Program,
     program_trail_program: list,
     universal_machine: UniversalMachine,
-    task: Task,
     base_program: Program,
-    depth: int = 0,
+    multiplicity: int,
 ):
-    phase_space_size = 0
+    """Run the programs that extend the program trail by one instruction, in the order of the search.
 
+    Yields:
+        Tuples with the program, its final state, its time limit and the number of programs it represents
+    """
     # Add the primitives ordered by their length (ascending)
     for instruction in universal_machine.primitives.ops_ordered:
         # The length of the new program
@@ -56,8 +134,15 @@ def levin_search_phase(
         if new_program_length > search_state.phase:
             continue
 
-        # 2^phase * 2^(-program_length) (+ 2^9)
-        time_limit = 2 ** (search_state.phase + -1 * new_program_length + 9)
+        # 2^phase * 2^(-program_length) (+ 2^9), a Python int (the op args are NumPy integers)
+        time_limit = 2 ** int(search_state.phase + -1 * new_program_length + 9)
+
+        siblings = None
+        if search_state.share_outcomes:
+            siblings = SiblingOutcomes(
+                program_trail_status.oracle_address,
+                universal_machine.primitives.op_args[instruction],
+            )
 
         for args in universal_machine.primitives.args_generator(
             program_trail_status, instruction,
@@ -69,53 +154,177 @@ def levin_search_phase(
             if program in search_state.memory:
                 continue
 
-            status = run_program(program, time_limit, universal_machine, base_program)
+            # The number of programs this program represents
+            program_multiplicity = multiplicity
+            if search_state.symmetry is not None:
+                if search_state.symmetry.skips(instruction, args):
+                    search_state.n_no_ops += 1
+                    continue
+                program_multiplicity *= search_state.symmetry.multiplicity(
+                    instruction, args
+                )
+                if not program_multiplicity:
+                    continue
+
+            status = None
+            if siblings is not None:
+                status = siblings.get(args)
+
+            if status is None:
+                status = cached_run_program(
+                    program,
+                    time_limit,
+                    universal_machine,
+                    base_program,
+                    search_state.outcome_cache,
+                    track_reads=siblings is not None,
+                )
+                if siblings is not None:
+                    siblings.add(args, status)
+            else:
+                # Same outcome as a sibling that has run
+                search_state.n_shared += 1
+                status = attr.evolve(status, program_tape=program)
 
             search_state.logger.debug(
                 f"{program};{status.halt.name};{time_limit};{search_state.phase}"
             )
 
-            if status.halt == HaltingCode.CONTINUE:
-                # Append another instruction!
-                levin_search_phase(
+            yield program, status, time_limit, program_multiplicity
+
+
+def iter_levin_search_phase(
+    search_state: SearchState,
+    program_trail_status: Program,
+    program_trail_program: list,
+    universal_machine: UniversalMachine,
+    task: Task,
+    base_program: Program,
+    progress_interval: int = None,
+    timeline: SearchTimeline = None,
+):
+    """Run a phase of the search. The programs that CONTINUE are extended depth first, using an explicit stack of
+    the extensions of the program trails.
+
+    Args:
+        progress_interval: yield a `ProgressEvent` every this many runs (default: never)
+        timeline: record the spans of the top-level subtrees (default: none)
+
+    Yields:
+        A `SolutionEvent` for every solution and `ProgressEvent`s
+    """
+    stack = [
+        _run_extensions(
+            search_state,
+            program_trail_status,
+            program_trail_program,
+            universal_machine,
+            base_program,
+            1,
+        )
+    ]
+    while stack:
+        run = next(stack[-1], None)
+        if run is None:
+            stack.pop()
+            if timeline is not None and len(stack) == 1:
+                timeline.end(subtree, search_state)
+            continue
+
+        program, status, time_limit, multiplicity = run
+        if status.halt == HaltingCode.CONTINUE:
+            if timeline is not None and len(stack) == 1:
+                subtree = timeline.begin_subtree(program, search_state)
+            # Append another instruction!
+            stack.append(
+                _run_extensions(
                     search_state,
                     status,
                     program,
                     universal_machine,
-                    task,
                     base_program,
-                    depth + 1,
+                    multiplicity,
                 )
-            else:
-                phase_space_size += 1
-
-                search_state.n_runs += 1
-                search_state.n_steps += status.current_runtime
-
-                if status.halt not in [HaltingCode.ERROR_CURRENT_TIME_LIMIT]:
-                    search_state.memory.append(program)
-
-                # Solutions come in here
-                if task.eval_program_samples(status.weights):
-                    search_state.solutions.append(
-                        Solution(
-                            program=program,
-                            found_after=search_state.n_runs,
-                            time_limit=time_limit,
-                            current_runtime=status.current_runtime,
-                            phase=search_state.phase,
-                            generalizes=task.eval_program(status.weights),
-                            complexity=len(program) + np.log(status.current_runtime),
-                        )
-                    )
+            )
+            continue
+
+        search_state.space_size += 1
+        search_state.expanded_space_size += multiplicity
 
-    search_state.space_size += phase_space_size
+        search_state.n_runs += 1
+        search_state.expanded_n_runs += multiplicity
+        # The skipped steps of a detected loop were not run
+        search_state.n_steps += status.current_runtime - status.n_skipped_steps
 
-    if depth == 0:
-        search_state.solutions = [
-            attr.evolve(k, space_size=search_state.space_size)
-            for k in search_state.solutions
-        ]
+        if status.halt not in [HaltingCode.ERROR_CURRENT_TIME_LIMIT]:
+            search_state.memory.add(program)
+        if status.halt == HaltingCode.ERROR_INFINITE_LOOP:
+            search_state.n_loops += 1
+
+        if search_state.weight_database is not None:
+            search_state.weight_database.add(
+                program, status, time_limit, search_state.phase
+            )
+
+        # Solutions come in here
+        samples, generalizes = search_state.outputs.evaluate(task, status.weights)
+        if samples:
+            solution = Solution(
+                program=program,
+                found_after=search_state.n_runs,
+                time_limit=time_limit,
+                current_runtime=status.current_runtime,
+                phase=search_state.phase,
+                generalizes=generalizes,
+                complexity=len(program) + np.log(status.current_runtime),
+            )
+            search_state.solutions.add(solution)
+            if search_state.on_solution is not None:
+                search_state.on_solution(solution)
+            yield SolutionEvent(solution)
+
+        if progress_interval and search_state.n_runs % progress_interval == 0:
+            yield progress_event(search_state)
+
+        monitor = search_state.memory_monitor
+        if monitor is not None and search_state.n_runs % monitor.interval == 0:
+            yield MemoryEvent(
+                monitor.check(search_state, universal_machine, len(stack))
+            )
+
+    search_state.solutions.end_phase(
+        search_state.space_size, search_state.expanded_space_size
+    )
+
+
+def levin_search_phase(
+    search_state: SearchState,
+    program_trail_status: Program,
+    program_trail_program: list,
+    universal_machine: UniversalMachine,
+    task: Task,
+    base_program: Program,
+):
+    """Run a phase of the search, see `iter_levin_search_phase`"""
+    for _ in iter_levin_search_phase(
+        search_state,
+        program_trail_status,
+        program_trail_program,
+        universal_machine,
+        task,
+        base_program,
+    ):
+        pass
+
+
+def progress_event(search_state: SearchState, phase_finished: bool = False):
+    return ProgressEvent(
+        phase=search_state.phase,
+        n_runs=search_state.n_runs,
+        n_steps=search_state.n_steps,
+        space_size=search_state.space_size,
+        phase_finished=phase_finished,
+    )
 
 
 def main_run_program(
@@ -143,7 +352,7 @@ def main_run_program(
     )
 
 
-def main_levin_search(
+def iter_levin_search(
     task: Tasks,
     primitives: Primitives,
     work_tape_size: int = 1000,
@@ -152,9 +361,75 @@ def main_levin_search(
     n_weights: int = 100,
     maxint: int = 10000,
     search_log_file: Path = None,
-):
+    memory_budget: int = None,
+    memory_dir: Path = None,
+    on_solution=None,
+    outcome_cache: Union[Path, OutcomeCache] = None,
+    weight_database: Path = None,
+    compile_programs: bool = False,
+    symmetry_reduction: bool = False,
+    share_outcomes: bool = False,
+    loop_detection: bool = False,
+    loop_acceleration: bool = False,
+    checkpoint_dir: Path = None,
+    resume_from: Path = None,
+    timeline_file: Path = None,
+    progress_interval: int = None,
+    memory_limit: int = None,
+    memory_interval: int = None,
+    trace_memory: bool = False,
+    max_solutions: int = None,
+    skip_no_ops: bool = False,
+) -> "LevinSearch":
+    """Start the deterministic Levin search, the search runs while its events are consumed.
+
+    Args:
+        on_solution: called with each `Solution` as soon as it is found (its `space_size` is not known yet)
+        outcome_cache: file of the program outcome cache, shared across searches and tasks (see `OutcomeCache`), or an
+            open `OutcomeCache` of the same machine configuration
+        weight_database: directory to store the final weights of every halted program in (see `WeightDatabase`)
+        compile_programs: run long running programs in compiled blocks (see `ProgramCompiler`)
+        symmetry_reduction: run one program per class of equivalent instructions (see `Symmetry`), the expanded
+            counts of the search state include the programs represented by the canonical ones
+        skip_no_ops: with `symmetry_reduction`, skip the no-op instructions with their subtrees, these are counted
+            in `n_no_ops` but not in the expanded counts
+        share_outcomes: record the program tape addresses a run depends on and assign its outcome to the siblings
+            that differ only in the other arguments without running them (see `SiblingOutcomes`)
+        loop_detection: halt programs whose state recurs with `HaltingCode.ERROR_INFINITE_LOOP`, these are not run
+            again in later phases
+        loop_acceleration: apply the iterations of counted loops at once (see `LoopAccelerator`), the programs are
+            not compiled
+        checkpoint_dir: save a checkpoint of the completed search in this directory (see `save_checkpoint`)
+        resume_from: continue the completed search of the checkpoint in this directory at its next phase, the
+            configuration must be the same. The result equals a search from scratch, the search log of the
+            completed search is copied and continued
+        timeline_file: write the spans of the phases and their top-level subtrees to this file, as JSON lines
+            (.jsonl) or Chrome trace events (.json), see `SearchTimeline`
+        progress_interval: yield a `ProgressEvent` every this many runs, besides the one at the end of every phase
+        memory_limit: soft limit of the memory of the process in bytes, above it the search drops its caches and
+            spills the halted programs to `memory_dir` (see `MemoryMonitor`)
+        memory_interval: yield a `MemoryEvent` every this many runs (default: 10000 if any memory option is set),
+            besides the one at the end of every phase, the soft limit is checked at the same time
+        trace_memory: measure the memory with tracemalloc instead of the resident set size (slower)
+        max_solutions: keep only this many solutions, the generalizing ones with the lowest complexity (see
+            `SolutionStore`), the events report every solution found
+
+    Returns:
+        The `LevinSearch`, an iterator over the `SolutionEvent`s and `ProgressEvent`s
+    """
+    if skip_no_ops and not symmetry_reduction:
+        raise ValueError("skip_no_ops requires symmetry_reduction")
+
     task = Task(task=task)
-    universal_machine = UniversalMachine(primitives)
+    compiler = ProgramCompiler(primitives) if compile_programs else None
+    accelerator = None
+    if loop_acceleration:
+        accelerator = LoopAccelerator(
+            primitives, accelerate_recurrences=not loop_detection
+        )
+    universal_machine = UniversalMachine(
+        primitives, compiler, loop_detection, accelerator
+    )
 
     initial_program_tape = []
     initial_runtime_limit = 2
@@ -170,20 +445,333 @@ def main_levin_search(
         initial_program_tape, initial_runtime_limit, universal_machine, base_program
     )
 
-    logger = get_logger("levin_search", search_log_file)
-    logger.debug("Program;Halting Status;Current Runtime Limit;Phase")
+    config = search_config(
+        task.task,
+        primitives,
+        base_program,
+        symmetry_reduction,
+        share_outcomes,
+        loop_detection,
+        max_solutions,
+        skip_no_ops,
+    )
+    if resume_from is None:
+        checkpoint = None
+        logger = get_logger("levin_search", search_log_file)
+        logger.debug("Program;Halting Status;Current Runtime Limit;Phase")
+    else:
+        checkpoint = read_checkpoint(resume_from, config)
+        if checkpoint["state"]["phase"] > search_length:
+            raise ValueError(
+                f"The checkpoint in {resume_from} is of a longer search_length"
+            )
+        if search_log_file is not None:
+            if checkpoint["search_log"] is None:
+                raise ValueError(
+                    f"The search of the checkpoint in {resume_from} has no search log"
+                )
+            if Path(checkpoint["search_log"]) != Path(search_log_file).absolute():
+                shutil.copyfile(checkpoint["search_log"], search_log_file)
+        logger = get_logger("levin_search", search_log_file, mode="a")
+
+    if memory_budget is None:
+        memory = ProgramMemory()
+    else:
+        memory = SpillingProgramMemory(memory_budget, memory_dir)
+
+    if outcome_cache is not None and not isinstance(outcome_cache, OutcomeCache):
+        outcome_cache = OutcomeCache(
+            outcome_cache,
+            machine_config_hash(primitives, base_program, loop_detection),
+        )
 
-    search_state = SearchState(logger)
-    for search_state.phase in tqdm(
-        range(1, search_length + 1), desc=f"Levin search for task {task.task}"
-    ):
-        levin_search_phase(
+    if weight_database is not None:
+        weight_database = WeightDatabaseWriter(weight_database, n_weights)
+
+    memory_monitor = None
+    if memory_limit is not None or memory_interval is not None or trace_memory:
+        memory_monitor = MemoryMonitor(
+            memory_limit, memory_interval or 10000, trace_memory, memory_dir
+        )
+
+    search_state = SearchState(
+        logger,
+        memory=memory,
+        on_solution=on_solution,
+        outcome_cache=outcome_cache,
+        weight_database=weight_database,
+        symmetry=Symmetry(primitives, skip_no_ops) if symmetry_reduction else None,
+        share_outcomes=share_outcomes,
+        memory_monitor=memory_monitor,
+        solutions=SolutionStore(max_solutions),
+    )
+    if checkpoint is not None:
+        restore_search_state(resume_from, checkpoint, search_state)
+
+    save = None
+    if checkpoint_dir is not None:
+        save = functools.partial(
+            save_checkpoint,
+            checkpoint_dir,
+            config=config,
+            search_log_file=search_log_file,
+        )
+    timeline = None
+    if timeline_file is not None:
+        timeline = SearchTimeline(timeline_file, primitives)
+    return LevinSearch(
+        _iter_phases(
             search_state,
+            search_length,
             program,
             initial_program_tape,
             universal_machine,
             task,
             base_program,
-        )
+            progress_interval,
+            save,
+            timeline,
+        ),
+        search_state,
+        PhaseEstimator(
+            functools.partial(
+                run_program,
+                universal_machine=universal_machine,
+                base_program=base_program,
+            ),
+            primitives,
+            program,
+            search_state.symmetry,
+        ),
+    )
+
 
-    return search_state
+def _iter_phases(
+    search_state: SearchState,
+    search_length: int,
+    program_trail_status: Program,
+    program_trail_program: list,
+    universal_machine: UniversalMachine,
+    task: Task,
+    base_program: Program,
+    progress_interval: int,
+    save_checkpoint=None,
+    timeline: SearchTimeline = None,
+):
+    try:
+        # From the phase after the phase of a checkpoint
+        for search_state.phase in range(search_state.phase + 1, search_length + 1):
+            if timeline is not None:
+                span = timeline.begin(
+                    f"phase {search_state.phase}", "phase", search_state
+                )
+            yield from iter_levin_search_phase(
+                search_state,
+                program_trail_status,
+                program_trail_program,
+                universal_machine,
+                task,
+                base_program,
+                progress_interval,
+                timeline,
+            )
+            if timeline is not None:
+                timeline.end(span, search_state)
+            if search_state.memory_monitor is not None:
+                yield MemoryEvent(
+                    search_state.memory_monitor.check(search_state, universal_machine)
+                )
+            yield progress_event(search_state, phase_finished=True)
+        if save_checkpoint is not None:
+            save_checkpoint(search_state)
+    finally:
+        # Also when the search is closed early
+        if search_state.outcome_cache is not None:
+            search_state.outcome_cache.commit()
+        if search_state.weight_database is not None:
+            search_state.weight_database.flush()
+        if timeline is not None:
+            timeline.close()
+        if search_state.memory_monitor is not None:
+            search_state.memory_monitor.close()
+
+
+class LevinSearch(object):
+    """A running Levin search, see `iter_levin_search`. Iterating runs the search until the next event.
+
+    Args:
+        events: the generator of the events
+        search_state: the state of the search
+        estimator: the `PhaseEstimator` of the search
+    """
+
+    def __init__(self, events, search_state: SearchState, estimator: PhaseEstimator):
+        self._events = events
+        # The current state of the search, updated while iterating
+        self.search_state = search_state
+        self.estimator = estimator
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._events)
+
+    def close(self):
+        """Stop the search, the outcome cache and the weight database keep the programs run so far"""
+        self._events.close()
+
+
+def main_levin_search(
+    task: Tasks,
+    primitives: Primitives,
+    work_tape_size: int = 1000,
+    program_tape_size: int = 100,
+    search_length: int = 8,
+    n_weights: int = 100,
+    maxint: int = 10000,
+    search_log_file: Path = None,
+    memory_budget: int = None,
+    memory_dir: Path = None,
+    on_solution=None,
+    outcome_cache: Path = None,
+    weight_database: Path = None,
+    compile_programs: bool = False,
+    symmetry_reduction: bool = False,
+    share_outcomes: bool = False,
+    loop_detection: bool = False,
+    loop_acceleration: bool = False,
+    checkpoint_dir: Path = None,
+    resume_from: Path = None,
+    timeline_file: Path = None,
+    on_phase_finished=None,
+    memory_limit: int = None,
+    trace_memory: bool = False,
+    max_solutions: int = None,
+    skip_no_ops: bool = False,
+    memory_interval: int = None,
+):
+    """Run the deterministic Levin search, see `iter_levin_search` for the arguments. The memory is only monitored
+    with a `memory_limit`, a `memory_interval` or `trace_memory`.
+
+    Args:
+        on_phase_finished: called with the `ProgressEvent` at the end of every phase
+
+    Returns:
+        The final `SearchState`
+    """
+    search = iter_levin_search(
+        task,
+        primitives,
+        work_tape_size,
+        program_tape_size,
+        search_length,
+        n_weights,
+        maxint,
+        search_log_file,
+        memory_budget,
+        memory_dir,
+        on_solution,
+        outcome_cache,
+        weight_database,
+        compile_programs,
+        symmetry_reduction,
+        share_outcomes,
+        loop_detection,
+        loop_acceleration,
+        checkpoint_dir,
+        resume_from,
+        timeline_file,
+        progress_interval=100,
+        memory_limit=memory_limit,
+        memory_interval=memory_interval,
+        trace_memory=trace_memory,
+        max_solutions=max_solutions,
+        skip_no_ops=skip_no_ops,
+    )
+    # Progress per run of the phase, with the estimated number of runs as total
+    with tqdm(unit="runs") as progress:
+        phase_start = None
+
+        def start_phase(phase: int):
+            nonlocal phase_start
+            phase_start = search.search_state.n_runs
+            estimate = search.estimator.estimate(phase)
+            progress.reset(total=max(1, round(estimate.n_runs)))
+            progress.set_description(
+                f"Levin search for task {task}, phase {phase}/{search_length}"
+            )
+
+        if search.search_state.phase < search_length:
+            start_phase(search.search_state.phase + 1)
+        for event in search:
+            if isinstance(event, MemoryEvent):
+                report = event.report
+                progress.set_postfix(memory=format_bytes(report.used), refresh=False)
+                if report.shed:
+                    progress.write(
+                        f"Memory {format_bytes(report.used)} above the limit "
+                        f"{format_bytes(memory_limit)}, shed {', '.join(report.shed)}",
+                        file=sys.stderr,
+                    )
+            if not isinstance(event, ProgressEvent):
+                continue
+            n_runs = event.n_runs - phase_start
+            # The estimate is exceeded
+            if n_runs > progress.total:
+                progress.total = n_runs
+            progress.update(n_runs - progress.n)
+            if event.phase_finished:
+                # The phase closes at 100%, also below the estimate
+                progress.total = progress.n
+                progress.refresh()
+            if event.phase_finished and on_phase_finished is not None:
+                on_phase_finished(event)
+            if event.phase_finished and event.phase < search_length:
+                start_phase(event.phase + 1)
+
+    return search.search_state
+
+
+def estimate_levin_search(
+    primitives: Primitives,
+    work_tape_size: int = 1000,
+    program_tape_size: int = 100,
+    search_length: int = 8,
+    n_weights: int = 100,
+    maxint: int = 10000,
+    symmetry_reduction: bool = False,
+    loop_detection: bool = False,
+    n_samples: int = 256,
+    seed: int = 0,
+    skip_no_ops: bool = False,
+) -> list:
+    """Estimate the number of runs and steps of the phases of a search, for planning the `search_length`. The
+    estimates are found by running a few programs per phase, see `PhaseEstimator`.
+
+    Args:
+        n_samples: the number of random paths per phase
+        seed: the seed of the random paths
+
+    Returns:
+        The `PhaseEstimate`s of the phases
+    """
+    universal_machine = UniversalMachine(primitives, loop_detection=loop_detection)
+    base_program = Program(
+        program_tape_size=program_tape_size,
+        work_tape_size=work_tape_size,
+        n_weights=n_weights,
+        maxint=maxint,
+    )
+    run = functools.partial(
+        run_program, universal_machine=universal_machine, base_program=base_program
+    )
+    estimator = PhaseEstimator(
+        run,
+        primitives,
+        run([], 2),
+        Symmetry(primitives, skip_no_ops) if symmetry_reduction else None,
+        n_samples,
+        seed,
+    )
+    return [estimator.estimate(phase) for phase in range(1, search_length + 1)]
@@ -1,10 +1,14 @@
 import logging
 
 
-def get_logger(name, log_file=None):
+def get_logger(name, log_file=None, mode="w"):
     logger = logging.getLogger(name)
     logger.setLevel(logging.DEBUG)
     if log_file is not None:
-        h = logging.FileHandler(log_file, mode="w")
+        # Replace the handler of a previous run in this process
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        h = logging.FileHandler(log_file, mode=mode)
         logger.addHandler(h)
     return logger
@@ -0,0 +1,251 @@
+"""Fast-forward counted loops. A loop whose body only increments and decrements work tape cells and outputs values,
+closed by a `JUMP` or `JUMPLEQ` back to its first instruction, changes every cell by a constant per iteration and
+writes arithmetic sequences to consecutive weights. The iterations that neither saturate a cell at `maxint`, nor
+halt, nor leave the loop are applied at once, the remaining iterations are run by the interpreter. The result,
+including the runtime, equals running every iteration."""
+import collections
+
+import numpy as np
+
+# The instructions of the loop body, with the change of their cell
+DELTAS = {"INCREMENT": 1, "DECREMENT": -1}
+
+
+class _Body(object):
+    """The effect of an iteration of a loop
+
+    Args:
+        length: the number of instructions per iteration
+        cells: the work tape addresses to tuples with the change per iteration and the changes after each write
+        outputs: tuples with the read address (or a tuple with the constant) and the change of the cell before
+        compare: the read addresses (or tuples with the constants) of the closing `JUMPLEQ`, or None for a `JUMP`
+        lowest: the lowest work tape address
+        reads: the program tape addresses an iteration reads
+    """
+
+    def __init__(self, length, cells, outputs, compare, lowest, reads):
+        self.length = length
+        self.cells = cells
+        self.outputs = outputs
+        self.compare = compare
+        self.lowest = lowest
+        self.reads = reads
+
+    @property
+    def is_recurrence(self) -> bool:
+        """Whether the state recurs after every iteration"""
+        return not self.outputs and not any(d for d, _ in self.cells.values())
+
+
+def _max_iterations(value: int, delta: int, offsets, low: int, high: int) -> int:
+    """The number of iterations `i` (from 0) for which `low <= value + i * delta + offset <= high` for all offsets
+
+    Returns:
+        The number of iterations, None if it is unbounded
+    """
+    if not offsets:
+        return None
+    if value + min(offsets) < low or value + max(offsets) > high:
+        return 0
+    if delta > 0:
+        return (high - value - max(offsets)) // delta + 1
+    if delta < 0:
+        return (value + min(offsets) - low) // -delta + 1
+    return None
+
+
+class LoopAccelerator(object):
+    """Apply many iterations of counted loops at once
+
+    Args:
+        primitives: the primitives of the universal machine
+        min_iterations: the minimum number of iterations to apply at once
+        cache_size: the maximum number of cached loop bodies
+        accelerate_recurrences: also fast-forward loops without effect (the state recurs after every iteration),
+            disable to leave these to the loop detection of the universal machine
+    """
+
+    # Approximate size of a cached loop body
+    body_size = 500
+
+    def __init__(
+        self,
+        primitives,
+        min_iterations: int = 2,
+        cache_size: int = 2 ** 14,
+        accelerate_recurrences: bool = True,
+    ):
+        self.op_names = list(primitives.get_op_names())
+        self.op_args = [int(n) for n in primitives.op_args]
+        self.min_iterations = min_iterations
+        self.cache_size = cache_size
+        self.accelerate_recurrences = accelerate_recurrences
+        # The number of fast-forwarded loops and steps
+        self.n_loops = 0
+        self.n_steps = 0
+        self._bodies = collections.OrderedDict()
+
+    def _analyze(self, state, head: int, end: int):
+        """Analyze the loop from `head` to the jump at `end`
+
+        Returns:
+            The `_Body`, or None if the loop is not supported
+        """
+        tape = [int(c) for c in state.program_tape]
+        n_ops = len(self.op_names)
+
+        reads = set()
+
+        def source(address: int):
+            # The read address for cells, or a tuple with the constant for the program tape
+            if address >= 0:
+                if address > state.max:
+                    return None
+                reads.add(address)
+                return (tape[address],)
+            return address
+
+        cells = {}
+        outputs = []
+        lowest = 0
+        ip = head
+        length = 0
+        while True:
+            op = tape[ip]
+            if not (0 <= op < n_ops) or ip + self.op_args[op] > state.max:
+                return None
+            name = self.op_names[op]
+            args = tape[ip + 1 : ip + 1 + self.op_args[op]]
+            length += 1
+
+            if name in DELTAS:
+                address = args[0]
+                if address >= 0:
+                    return None
+                delta, offsets = cells.get(address, (0, []))
+                delta += DELTAS[name]
+                cells[address] = (delta, offsets + [delta])
+                lowest = min(lowest, address)
+            elif name == "OUTPUT":
+                read = source(args[0])
+                if read is None:
+                    return None
+                if isinstance(read, tuple):
+                    outputs.append((read, 0))
+                else:
+                    outputs.append((read, cells.get(read, (0,))[0]))
+                    lowest = min(lowest, read)
+            elif ip == end and name in ("JUMP", "JUMPLEQ") and args[-1] == head:
+                break
+            else:
+                return None
+
+            ip += 1 + self.op_args[op]
+            if ip > end:
+                return None
+
+        compare = None
+        if self.op_names[tape[end]] == "JUMPLEQ":
+            compare = tuple(source(a) for a in tape[end + 1 : end + 3])
+            if None in compare:
+                return None
+            lowest = min([lowest] + [a for a in compare if not isinstance(a, tuple)])
+
+        reads.update(range(head, end + 1 + self.op_args[tape[end]]))
+        return _Body(length, cells, outputs, compare, lowest, reads)
+
+    def shrink(self, min_size: int = 2 ** 8):
+        """Drop the cached loop bodies and halve the cache size"""
+        self._bodies.clear()
+        self.cache_size = max(min_size, self.cache_size // 2)
+
+    @property
+    def n_bytes(self) -> int:
+        """The approximate bytes of the cached loop bodies"""
+        return len(self._bodies) * self.body_size
+
+    def body(self, state, head: int, end: int):
+        key = (tuple(state.program_tape), head, end)
+        if key in self._bodies:
+            self._bodies.move_to_end(key)
+            return self._bodies[key]
+
+        body = self._analyze(state, head, end)
+        self._bodies[key] = body
+        if len(self._bodies) > self.cache_size:
+            self._bodies.popitem(last=False)
+        return body
+
+    def accelerate(self, state, end: int, current_time_limit: int):
+        """Fast-forward the loop, called after the jump at `end` moved the instruction pointer back to the start of
+        the loop (and the time limit was checked)
+
+        Args:
+            state: the program state
+            end: the address of the jump closing the loop
+            current_time_limit: the time limit
+        """
+        head = state.instruction_pointer
+        if head < 0:
+            return
+        body = self.body(state, head, end)
+        if body is None or body.lowest < state.min:
+            return
+        if not self.accelerate_recurrences and body.is_recurrence:
+            return
+
+        def value(read):
+            if isinstance(read, tuple):
+                return read[0], 0
+            return state.work_tape[-read - 1], body.cells.get(read, (0,))[0]
+
+        # The iterations before the time limit
+        bounds = [(current_time_limit - 1 - state.current_runtime) // body.length]
+
+        # The iterations without saturating a cell
+        maxint = state.maxint
+        for address, (delta, offsets) in body.cells.items():
+            bounds.append(
+                _max_iterations(
+                    state.work_tape[-address - 1], delta, offsets, -maxint, maxint
+                )
+            )
+
+        # The iterations with valid outputs
+        n_outputs = len(body.outputs)
+        if n_outputs:
+            bounds.append((len(state.weights) - state.weight_pointer) // n_outputs)
+            for read, offset in body.outputs:
+                start, delta = value(read)
+                bounds.append(_max_iterations(start, delta, [offset], -10000, 10000))
+
+        # The iterations in which the closing jump is taken, `value1 <= value2` after the changes of the iteration
+        if body.compare is not None:
+            (start1, delta1), (start2, delta2) = map(value, body.compare)
+            bounds.append(
+                _max_iterations(
+                    start2 - start1, delta2 - delta1, [delta2 - delta1], 0, np.inf
+                )
+            )
+
+        k = min(bound for bound in bounds if bound is not None)
+        if k < self.min_iterations:
+            return
+        k = int(k)
+
+        weight_pointer = state.weight_pointer
+        for i, (read, offset) in enumerate(body.outputs):
+            start, delta = value(read)
+            state.weights[
+                weight_pointer + i : weight_pointer + i + k * n_outputs : n_outputs
+            ] = start + offset + delta * np.arange(k)
+        state.weight_pointer = weight_pointer + k * n_outputs
+
+        for address, (delta, _) in body.cells.items():
+            state.work_tape[-address - 1] += k * delta
+
+        state.current_runtime += k * body.length
+        if state.read_set is not None:
+            state.read_set.update(body.reads)
+        self.n_loops += 1
+        self.n_steps += k * body.length
@@ -0,0 +1,187 @@
+"""Memory accounting of a search. Every few runs the monitor estimates the bytes of the parts of the search state (the
+memory of halted programs, the solutions, the caches and the stack of program trails) and measures the memory of the
+process, the resident set size or, with tracing, the Python allocations traced by tracemalloc.
+
+Above a soft limit, the monitor sheds memory instead of letting the process run out of it. It drops the caches
+first (the task verdicts, the compiled blocks, the loop bodies and an in-memory outcome cache) and halves their sizes,
+they only cost recomputation. If the limit is still exceeded at the next check, the memory of halted programs spills
+to disk (see `SpillingProgramMemory`), with a halved budget at every further check. The result of the search does not
+change."""
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+
+import attr
+import numpy as np
+
+from program_memory import ProgramMemory, SpillingProgramMemory
+
+
+def process_rss() -> int:
+    """The resident set size of this process (bytes), the peak resident set size where it is not available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes, except on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_bytes(n_bytes: int) -> str:
+    """Format a number of bytes for humans, e.g. `1.5 MiB`"""
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if abs(n_bytes) < 1024 or unit == "GiB":
+            break
+        n_bytes /= 1024
+    return f"{n_bytes:.0f} {unit}" if unit == "B" else f"{n_bytes:.1f} {unit}"
+
+
+@attr.s(slots=True, frozen=True)
+class MemoryReport(object):
+    phase = attr.ib(converter=int)
+    n_runs = attr.ib(converter=int)
+    # The estimated bytes of the memory of halted programs (in memory), the solutions, the caches and the stack
+    memory = attr.ib(converter=int)
+    solutions = attr.ib(converter=int)
+    caches = attr.ib(converter=int)
+    stack = attr.ib(converter=int)
+    # The measured bytes of the process, traced by tracemalloc or the resident set size
+    used = attr.ib(converter=int)
+    # The parts of the search state that were shed at this check, see `MemoryMonitor`
+    shed = attr.ib(default=(), converter=tuple)
+
+    @property
+    def total(self) -> int:
+        """The estimated bytes of the search state"""
+        return self.memory + self.solutions + self.caches + self.stack
+
+
+class MemoryMonitor(object):
+    """Measure the memory of a search and shed memory above a soft limit
+
+    Args:
+        limit: the soft limit of the measured memory in bytes (default: none, only measure)
+        interval: check every this many runs
+        trace: measure the Python allocations with tracemalloc instead of the resident set size, more precise but the
+            search runs slower
+        memory_dir: directory for the spilled halted programs (default: temporary directory)
+    """
+
+    # Approximate size of an entry of the stack (generator frame, program trail and its state)
+    stack_entry_size = 2000
+    # The smallest budget of spilled halted programs
+    min_budget = 2 ** 16
+
+    def __init__(
+        self,
+        limit: int = None,
+        interval: int = 10000,
+        trace: bool = False,
+        memory_dir: Path = None,
+    ):
+        self.limit = limit
+        self.interval = interval
+        self.trace = trace
+        self.memory_dir = memory_dir
+        self.peak = 0
+        # The number of consecutive checks above the limit
+        self._n_exceeded = 0
+        self._started_tracing = trace and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def used(self) -> int:
+        """The measured bytes of the process"""
+        if self.trace:
+            return tracemalloc.get_traced_memory()[0]
+        return process_rss()
+
+    def check(
+        self, search_state, universal_machine, stack_depth: int = 0
+    ) -> MemoryReport:
+        """Measure the memory and shed memory if it exceeds the limit
+
+        Args:
+            search_state: the state of the search
+            universal_machine: the universal machine, with the caches of its compiler and loop accelerator
+            stack_depth: the number of entries of the stack of program trails
+
+        Returns:
+            The `MemoryReport`, measured after shedding
+        """
+        used = self.used()
+        shed = []
+        if self.limit is not None and used > self.limit:
+            self._n_exceeded += 1
+            shed = self.shed(search_state, universal_machine)
+            used = self.used()
+        else:
+            self._n_exceeded = 0
+        self.peak = max(self.peak, used)
+
+        return MemoryReport(
+            search_state.phase,
+            search_state.n_runs,
+            getattr(search_state.memory, "n_bytes", 0),
+            search_state.solutions.n_bytes,
+            sum(cache.n_bytes for _, cache in _caches(search_state, universal_machine)),
+            stack_depth * self.stack_entry_size,
+            used,
+            shed,
+        )
+
+    def shed(self, search_state, universal_machine) -> list:
+        """Drop the caches and, if the limit was exceeded at the previous check too, spill the halted programs
+
+        Returns:
+            The names of the shed parts
+        """
+        shed = []
+        for name, cache in _caches(search_state, universal_machine):
+            cache.shrink()
+            shed.append(name)
+
+        memory = search_state.memory
+        if self._n_exceeded > 1:
+            if isinstance(memory, ProgramMemory):
+                spilling = SpillingProgramMemory(
+                    max(self.limit // 8, self.min_budget),
+                    self.memory_dir,
+                    bloom_capacity=max(4 * len(memory), 2 ** 20),
+                )
+                for key in memory:
+                    spilling.add(np.frombuffer(key, dtype=np.int32))
+                memory.close()
+                search_state.memory = spilling
+                shed.append("memory")
+            elif (
+                isinstance(memory, SpillingProgramMemory)
+                and memory.budget > self.min_budget
+            ):
+                memory.set_budget(max(self.min_budget, memory.budget // 2))
+                shed.append("memory")
+        return shed
+
+    def close(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+
+def _caches(search_state, universal_machine):
+    """The caches of a search with their names, all have `n_bytes` and `shrink()`"""
+    caches = [
+        ("outputs", search_state.outputs),
+        ("outcome_cache", search_state.outcome_cache),
+        ("compiler", universal_machine.compiler),
+        ("accelerator", universal_machine.accelerator),
+    ]
+    return [(name, cache) for name, cache in caches if cache is not None]
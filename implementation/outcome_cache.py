@@ -0,0 +1,160 @@
+"""Persistent cache of program outcomes. The outcome of a run (halting code, runtime and final weights) depends only
+on the program, the machine configuration and the time limit, not on the task. The cache is shared across searches
+and tasks, such that re-running a search for a new task or a deeper search mostly consists of lookups.
+"""
+import hashlib
+import json
+import sqlite3
+from pathlib import Path
+
+import numpy as np
+
+from halt import HaltingCode
+from program_memory import program_key
+
+
+def machine_config_hash(primitives, base_program, loop_detection: bool = False) -> str:
+    """Hash of everything besides the program and the time limit that determines the outcome of a run
+
+    Args:
+        primitives: the primitives of the universal machine
+        base_program: the program with the tape sizes, `maxint` and `n_weights`
+        loop_detection: whether the universal machine halts on detected loops
+
+    Returns:
+        The hash as hexadecimal string
+    """
+    config = {
+        "primitives": type(primitives).__name__,
+        "op_args": [int(n) for n in primitives.op_args],
+        "program_tape_size": base_program.program_tape_size,
+        "work_tape_size": base_program.work_tape_size,
+        "maxint": base_program.maxint,
+        "n_weights": base_program.n_weights,
+    }
+    # Only included if enabled, such that existing caches stay valid
+    if loop_detection:
+        config["loop_detection"] = True
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+class OutcomeCache(object):
+    """On-disk cache of the outcomes of programs that halted (sqlite).
+
+    A program that halted for any other reason than the time limit halts in the same way for every time limit of at
+    least its runtime, hence such an outcome found with a smaller time limit is used for larger time limits. An outcome
+    due to the time limit is only used for the same time limit.
+
+    Args:
+        path: the cache file
+        config: the machine configuration hash, see `machine_config_hash`
+        commit_interval: commit to disk after this many new outcomes
+    """
+
+    def __init__(self, path: Path, config: str, commit_interval: int = 10000):
+        self.config = config
+        self.commit_interval = commit_interval
+        self.n_hits = 0
+        self.n_misses = 0
+        self._n_uncommitted = 0
+        # An in-memory database (":memory:") holds the outcomes in this process
+        self.in_memory = str(path) == ":memory:"
+
+        Path(path).parent.mkdir(exist_ok=True, parents=True)
+        self._db = sqlite3.connect(str(path), timeout=60)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS outcomes ("
+            "config TEXT, program BLOB, time_limit INTEGER, "
+            "halt INTEGER, runtime INTEGER, weights BLOB, "
+            "PRIMARY KEY (config, program, time_limit)) WITHOUT ROWID"
+        )
+        self._db.commit()
+
+    def get(self, program, time_limit: int):
+        """Look up the outcome of a program
+
+        Args:
+            program: the program
+            time_limit: the time limit of the run
+
+        Returns:
+            Tuple with the halting code, the runtime and the weights, or None if the outcome is not known
+        """
+        # A halt is only reused for time limits above its runtime: some halts (e.g. an invalid instruction pointer) come before the
+        # step is counted, at a time limit of their runtime the program reaches the time limit instead. The outcome
+        # at exactly this time limit comes first.
+        row = self._db.execute(
+            "SELECT halt, runtime, weights FROM outcomes "
+            "WHERE config = ? AND program = ? "
+            "AND (time_limit = ? OR (time_limit = 0 AND runtime < ?)) "
+            "ORDER BY time_limit DESC LIMIT 1",
+            (self.config, program_key(program), time_limit, time_limit),
+        ).fetchone()
+
+        if row is None:
+            self.n_misses += 1
+            return None
+
+        self.n_hits += 1
+        halt, runtime, weights = row
+        return HaltingCode(halt), runtime, np.frombuffer(weights, dtype=np.int16).copy()
+
+    def put(self, program, time_limit: int, halt: HaltingCode, runtime: int, weights):
+        """Store the outcome of a program that halted
+
+        Args:
+            program: the program
+            time_limit: the time limit of the run
+            halt: the halting code
+            runtime: the runtime, the executed steps for a detected loop (its runtime is the time limit)
+            weights: the final weights
+        """
+        if halt == HaltingCode.CONTINUE:
+            return
+
+        # The final state of a detected loop depends on the time limit as well
+        if halt not in (
+            HaltingCode.ERROR_CURRENT_TIME_LIMIT,
+            HaltingCode.ERROR_INFINITE_LOOP,
+        ):
+            time_limit = 0
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO outcomes VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                self.config,
+                program_key(program),
+                time_limit,
+                halt.value,
+                int(runtime),
+                np.asarray(weights, dtype=np.int16).tobytes(),
+            ),
+        )
+        self._n_uncommitted += 1
+        if self._n_uncommitted >= self.commit_interval:
+            self.commit()
+
+    def commit(self):
+        self._db.commit()
+        self._n_uncommitted = 0
+
+    def shrink(self):
+        """Commit and release the memory of sqlite, the outcomes of an in-memory database are dropped"""
+        if self.in_memory:
+            self._db.execute("DELETE FROM outcomes")
+        self.commit()
+        self._db.execute("PRAGMA shrink_memory")
+
+    @property
+    def n_bytes(self) -> int:
+        """The bytes of an in-memory database (0 for a file)"""
+        if not self.in_memory:
+            return 0
+        (page_count,) = self._db.execute("PRAGMA page_count").fetchone()
+        (page_size,) = self._db.execute("PRAGMA page_size").fetchone()
+        return page_count * page_size
+
+    def close(self):
+        self.commit()
+        self._db.close()
@@ -0,0 +1,85 @@
+"""Memo of task verdicts per distinct output. Many programs produce the same weights (most commonly all zeros), these
+are evaluated once per task. The memo also counts the number of programs per distinct output."""
+import collections
+import hashlib
+import sys
+
+import numpy as np
+
+from task import Task
+
+
+class OutputMemo(object):
+    """Cache the sample and generalization verdicts of weight vectors, least recently used verdicts are evicted
+
+    Args:
+        max_size: the maximum number of cached verdicts
+    """
+
+    # Approximate overhead of a verdict (key and verdict tuples, ordered dict entry) besides the output
+    entry_overhead = 200
+
+    def __init__(self, max_size: int = 2 ** 16):
+        self.max_size = max_size
+        self.n_hits = 0
+        self.n_misses = 0
+        # Number of programs per distinct output (by digest of the weights, stable across processes)
+        self.counts = collections.Counter()
+        self._verdicts = collections.OrderedDict()
+
+    def evaluate(self, task: Task, weights: np.ndarray):
+        """Evaluate the output of a program on the task
+
+        Args:
+            task: the task
+            weights: the output of the program
+
+        Returns:
+            Tuple whether the output matches the training samples and whether it generalizes (False if the samples
+            do not match)
+        """
+        output = weights.tobytes()
+        self.counts[hashlib.blake2b(output, digest_size=8).digest()] += 1
+
+        key = (task.task, output)
+        verdict = self._verdicts.get(key)
+        if verdict is not None:
+            self.n_hits += 1
+            self._verdicts.move_to_end(key)
+            return verdict
+
+        self.n_misses += 1
+        samples = task.eval_program_samples(weights)
+        verdict = samples, samples and task.eval_program(weights)
+        self._verdicts[key] = verdict
+        if len(self._verdicts) > self.max_size:
+            self._verdicts.popitem(last=False)
+        return verdict
+
+    def shrink(self, min_size: int = 2 ** 8):
+        """Evict all verdicts and halve the maximum number of cached verdicts, the counts are kept"""
+        self._verdicts.clear()
+        self.max_size = max(min_size, self.max_size // 2)
+
+    @property
+    def n_bytes(self) -> int:
+        """The approximate bytes of the counts and the verdicts"""
+        n_bytes = sys.getsizeof(self.counts) + len(self.counts) * sys.getsizeof(
+            bytes(8)
+        )
+        if self._verdicts:
+            _, output = next(reversed(self._verdicts))
+            n_bytes += sys.getsizeof(self._verdicts) + len(self._verdicts) * (
+                sys.getsizeof(output) + self.entry_overhead
+            )
+        return n_bytes
+
+    @property
+    def n_outputs(self) -> int:
+        """The number of evaluated outputs"""
+        return sum(self.counts.values())
+
+    @property
+    def n_distinct(self) -> int:
+        """The number of distinct outputs"""
+        return len(self.counts)
@@ -15,3 +15,7 @@ def experiments_dir():
 
 def logs_dir():
     return root_dir() / "logs"
+
+
+def cache_dir():
+    return root_dir() / "cache"
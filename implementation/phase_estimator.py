@@ -0,0 +1,135 @@
+"""Estimates of the size of the phases of the search. A phase enumerates a tree of programs: the programs that
+CONTINUE are extended by every instruction that fits in the phase, the other programs are leaves and are counted in
+`n_runs`. The estimator walks random paths from the empty program down to a leaf (Knuth's estimator of the size of a
+backtrack tree). The product of the numbers of extensions along the path is an unbiased estimate of the number of
+leaves, the product times the runtime of the leaf is an unbiased estimate of the number of steps.
+
+The extensions are counted from the argument ranges of the primitives, without running them. Extensions that the
+phase skips count as leaves without runs: programs that halted in an earlier phase (they halted within the time limit
+of the previous phase) and, with symmetry reduction, the non-canonical instructions and the skipped no-ops."""
+import math
+import random
+
+import attr
+
+from halt import HaltingCode
+from symmetry import Symmetry
+
+
+@attr.s(slots=True, frozen=True)
+class PhaseEstimate(object):
+    phase = attr.ib(converter=int)
+    # The expected number of runs and steps
+    n_runs = attr.ib(converter=float)
+    n_steps = attr.ib(converter=float)
+    # The standard errors of the estimates
+    n_runs_error = attr.ib(converter=float)
+    n_steps_error = attr.ib(converter=float)
+    n_samples = attr.ib(converter=int)
+
+
+class PhaseEstimator(object):
+    """Estimate the number of runs and steps of the phases
+
+    Args:
+        run: called with a program and its time limit, returns the final state of the program
+        primitives: the primitives of the universal machine
+        root: the final state of the empty program
+        symmetry: the symmetry reduction of the search (default: none)
+        n_samples: the number of random paths per estimate
+        seed: the seed of the random paths
+    """
+
+    def __init__(
+        self,
+        run,
+        primitives,
+        root,
+        symmetry: Symmetry = None,
+        n_samples: int = 32,
+        seed: int = 0,
+    ):
+        self.run = run
+        self.primitives = primitives
+        self.root = root
+        self.symmetry = symmetry
+        self.n_samples = n_samples
+        self.seed = seed
+
+    def _sample(self, phase: int, rng: random.Random):
+        """Walk a random path of the phase
+
+        Returns:
+            Tuple with the estimates of the number of runs and steps
+        """
+        status = self.root
+        program = []
+        weight = 1
+        while True:
+            # The argument tuples of the extensions that fit in the phase
+            extensions = []
+            for instruction in self.primitives.ops_ordered:
+                n_args = self.primitives.op_args[instruction]
+                if status.oracle_address + n_args + 1 > phase:
+                    continue
+                args = self.primitives.args_generator(status, instruction)
+                if args:
+                    extensions.append((instruction, args))
+
+            n_extensions = sum(len(args) for _, args in extensions)
+            if not n_extensions:
+                return 0, 0
+            weight *= n_extensions
+
+            index = rng.randrange(n_extensions)
+            for instruction, args in extensions:
+                if index < len(args):
+                    args = args[index]
+                    break
+                index -= len(args)
+
+            if self.symmetry is not None and (
+                self.symmetry.skips(instruction, args)
+                or not self.symmetry.multiplicity(instruction, args)
+            ):
+                return 0, 0
+
+            program = program + [instruction, *args]
+            time_limit = 2 ** (phase - len(program) + 9)
+            status = self.run(program, time_limit)
+
+            if status.halt == HaltingCode.CONTINUE:
+                continue
+            if (
+                status.halt != HaltingCode.ERROR_CURRENT_TIME_LIMIT
+                and len(program) < phase
+                and status.current_runtime <= time_limit // 2
+            ):
+                # Halted in the previous phase
+                return 0, 0
+            return weight, weight * status.current_runtime
+
+    def estimate(self, phase: int) -> PhaseEstimate:
+        """Estimate the number of runs and steps of a phase
+
+        Args:
+            phase: the phase
+
+        Returns:
+            The `PhaseEstimate`
+        """
+        rng = random.Random(f"{self.seed}:{phase}")
+        samples = [self._sample(phase, rng) for _ in range(self.n_samples)]
+
+        def mean_error(values):
+            mean = sum(values) / len(values)
+            if len(values) < 2:
+                return mean, math.inf
+            variance = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+            return mean, math.sqrt(variance / len(values))
+
+        n_runs, n_runs_error = mean_error([runs for runs, _ in samples])
+        n_steps, n_steps_error = mean_error([steps for _, steps in samples])
+        return PhaseEstimate(
+            phase, n_runs, n_steps, n_runs_error, n_steps_error, self.n_samples
+        )
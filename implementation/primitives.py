@@ -11,6 +11,20 @@ import numpy as np
 from halt import HaltingCode
 from program import Program
 
+# The number of leading arguments of the instructions that are addresses to read from
+READ_ARGS = {
+    "JUMPLEQ": 2,
+    "OUTPUT": 1,
+    "WRITE_WEIGHT": 2,
+    "ADD": 2,
+    "READ_WEIGHT": 2,
+    "MOVE": 1,
+    "INCREMENT": 1,
+    "DECREMENT": 1,
+    "SUBTRACT": 2,
+    "MULTIPLY": 2,
+}
+
 
 class Primitives(object):
     def __init__(self, op_args):
@@ -32,6 +46,30 @@ class Primitives(object):
         """
         return self.op_args[int(op_id)]
 
+    def n_consulted_args(self, op_id: int, state: Program, args) -> int:
+        """Get the number of leading arguments the instruction depended on, the remaining arguments can be changed
+        without changing the run. An instruction that fails on reading an argument address has not looked at the
+        arguments after it, a `JUMPLEQ` that does not jump has not looked at its jump address.
+
+        Args:
+            op_id: the instruction id
+            state: the program state after running the instruction (before moving the instruction pointer)
+            args: the arguments of the instruction
+
+        Returns:
+            The number of arguments
+        """
+        name = self.get_op_names()[int(op_id)]
+        if state.halt == HaltingCode.ERROR_ILLEGAL_READ:
+            for i in range(READ_ARGS.get(name, 0)):
+                if not (state.min <= args[i] <= state.max):
+                    return i + 1
+        elif state.halt == HaltingCode.ERROR_INPUT_OUT_BOUNDS:
+            return 1
+        elif name == "JUMPLEQ" and state.halt is None and not state.jumped:
+            return 2
+        return len(args)
+
     @staticmethod
     def jumpleq(state: Program, address1: int, address2: int, address3: int):
         """If Value in Address 1 <= Value in Address 2, Jump to Address 3
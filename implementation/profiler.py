@@ -0,0 +1,190 @@
+"""Profiling of console runs. The run is split in sections (the phases of a search), every section is profiled with
+cProfile and stored as pstats file. Meanwhile a thread samples the stack of the profiled thread, the samples are
+stored as collapsed stacks (one line per distinct stack with its count, rooted at the section), the input format of
+flamegraph.pl and speedscope. At the end, a summary lists the hot functions of the machine (`universal_machine.py`,
+`program.py` and the primitives) and estimates the overhead of the profiling."""
+import collections
+import cProfile
+import pstats
+import sys
+import threading
+import time
+from pathlib import Path
+
+# The files of the functions in the summary
+MACHINE_FILES = ("universal_machine.py", "program.py", "primitives.py")
+
+
+def _calls(n_calls: int = 20000) -> None:
+    def f():
+        pass
+
+    for _ in range(n_calls):
+        f()
+
+
+def _profile_overhead_per_call(workload=None, repeat: int = 5) -> float:
+    """The additional time of a profiled function call (seconds)
+
+    Args:
+        workload: the function that is timed with and without profiling (default: calls of an empty function)
+        repeat: the number of timings, the fastest is used
+    """
+    workload = workload or _calls
+    workload()
+
+    def timing(profile=None):
+        start = time.perf_counter()
+        if profile is not None:
+            profile.enable()
+        workload()
+        if profile is not None:
+            profile.disable()
+        return time.perf_counter() - start
+
+    base = min(timing() for _ in range(repeat))
+    profiles = [cProfile.Profile() for _ in range(repeat)]
+    profiled = min(timing(profile) for profile in profiles)
+    n_calls = sum(nc for _, nc, _, _, _ in pstats.Stats(profiles[0]).stats.values())
+    return max(0.0, (profiled - base) / max(n_calls, 1))
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class Profiler(object):
+    """Profile the current thread in sections
+
+    Args:
+        directory: the directory for the pstats files (`<section>.pstats`), the collapsed stacks (`stacks.folded`)
+            and the summary (`summary.txt`), created if not exists
+        section: the name of the first section
+        sample_interval: the seconds between the stack samples
+        n_top: the number of functions in the summary
+        calibration: a function with a representative workload, timed with and without profiling to estimate the
+            overhead per call (default: calls of an empty function)
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        section: str = "run",
+        sample_interval: float = 0.005,
+        n_top: int = 15,
+        calibration=None,
+    ):
+        self.directory = Path(directory)
+        self.sample_interval = sample_interval
+        self.n_top = n_top
+        self.calibration = calibration
+        self.stacks = collections.Counter()
+        self.sections = []
+        self._section = section
+        self._profile = None
+        self._thread_id = threading.get_ident()
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler_time = 0.0
+        self._start = None
+        self._combined = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self) -> None:
+        self.directory.mkdir(exist_ok=True, parents=True)
+        self._start = time.perf_counter()
+        self._sampler.start()
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def next_section(self, section: str) -> None:
+        """Store the profile of the current section and start the next section"""
+        self._profile.disable()
+        self._store_section()
+        self._section = section
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def _store_section(self) -> None:
+        self._profile.dump_stats(str(self.directory / f"{self._section}.pstats"))
+        self.sections.append(self._section)
+        if self._combined is None:
+            self._combined = pstats.Stats(self._profile)
+        else:
+            self._combined.add(self._profile)
+
+    def _sample(self) -> None:
+        """Sample the stack of the profiled thread (in the sampler thread)"""
+        while not self._stop.wait(self.sample_interval):
+            start = time.thread_time()
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            stack.append(self._section)
+            self.stacks[";".join(reversed(stack))] += 1
+            self._sampler_time += time.thread_time() - start
+
+    def stop(self) -> str:
+        """Store the last section, the stacks and the summary
+
+        Returns:
+            The summary
+        """
+        self._profile.disable()
+        self._stop.set()
+        self._sampler.join()
+        wall_time = time.perf_counter() - self._start
+        self._store_section()
+
+        with (self.directory / "stacks.folded").open("w") as f:
+            for stack, count in self.stacks.items():
+                f.write(f"{stack} {count}\n")
+
+        summary = self.summary(wall_time)
+        (self.directory / "summary.txt").write_text(summary)
+        return summary
+
+    def summary(self, wall_time: float) -> str:
+        """The hot functions of the machine and the overhead of the profiling
+
+        Args:
+            wall_time: the seconds of the profiled run, including the overhead
+        """
+        stats = self._combined.stats
+        total_time = max(self._combined.total_tt, 1e-9)
+        n_calls = sum(nc for _, nc, _, _, _ in stats.values())
+
+        functions = [
+            (tt, ct, nc, function)
+            for function, (_, nc, tt, ct, _) in stats.items()
+            if Path(function[0]).name.endswith(MACHINE_FILES)
+        ]
+        functions.sort(reverse=True)
+
+        lines = [
+            f"Profiled {len(self.sections)} section(s) in {self.directory}",
+            f"{'ncalls':>10} {'tottime':>9} {'%':>6} {'cumtime':>9}  function",
+        ]
+        for tt, ct, nc, (file_name, line, name) in functions[: self.n_top]:
+            lines.append(
+                f"{nc:>10} {tt:>9.3f} {100 * tt / total_time:>5.1f}% {ct:>9.3f}  "
+                f"{name} ({Path(file_name).name}:{line})"
+            )
+
+        overhead = (
+            n_calls * _profile_overhead_per_call(self.calibration) + self._sampler_time
+        )
+        lines.append(
+            f"Wall time {wall_time:.2f}s, estimated profiling overhead {overhead:.2f}s "
+            f"({100 * overhead / max(wall_time, 1e-9):.0f}%, {n_calls} profiled calls, "
+            f"{sum(self.stacks.values())} stack samples)"
+        )
+        return "\n".join(lines) + "\n"
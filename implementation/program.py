@@ -18,6 +18,8 @@ class Program(object):
     # -1 in the Jankowski paper, 0 in the Schmidhuber paper
     min = attr.ib(default=0)
     current_runtime = attr.ib(default=0)
+    # The steps of a detected loop that were skipped rather than run, included in the runtime
+    n_skipped_steps = attr.ib(default=0)
     # Only used in combination with "output", "write_weight" replaces this
     weight_pointer = attr.ib(default=0)
     jumped = attr.ib(type=bool, default=False)
@@ -28,6 +30,8 @@ class Program(object):
     )
     program_tape = attr.ib(factory=list)
     work_tape = attr.ib(factory=list)
+    # Program tape addresses the run depends on, recorded if a set (see `Primitives.n_consulted_args`)
+    read_set = attr.ib(default=None, repr=False)
 
     @program_tape.validator
     def check_program_tape(self, attribute, value):
@@ -120,6 +124,8 @@ class Program(object):
         if i < 0:
             return self.work_tape[abs(i) - 1]
         else:
+            if self.read_set is not None:
+                self.read_set.add(i)
             return self.program_tape[abs(i)]
 
     def write(self, state, i: int, value: int):
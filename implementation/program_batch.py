@@ -0,0 +1,191 @@
+"""Run many programs in one invocation. Programs are read from JSON lines (a list of integers or an object with a
+`program` key, such as a solution file) or CSV (one program per row), and run across a process pool. The results are
+yielded in input order as soon as they are available."""
+
+import collections
+import csv
+import hashlib
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+
+from levin_search import main_run_program
+from primitives import Primitives
+from task import Task, Tasks
+
+
+def parse_program_line(line: str):
+    """Parse a program from a line of JSON or comma separated integers
+
+    Args:
+        line: the line
+
+    Returns:
+        The program, or None for an empty line
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        return [int(c) for c in json.loads(line)["program"]]
+    if line.startswith("["):
+        return [int(c) for c in json.loads(line)]
+    return [int(c) for c in line.split(",")]
+
+
+def read_programs(f, csv_format: bool = False):
+    """Read programs from a file object
+
+    Args:
+        f: the text file object
+        csv_format: one program per CSV row, otherwise one program per line (JSON or comma separated)
+
+    Yields:
+        The programs
+    """
+    if csv_format:
+        for row in csv.reader(f):
+            program = [int(c) for c in row if c.strip()]
+            if program:
+                yield program
+        return
+
+    for line in f:
+        program = parse_program_line(line)
+        if program is not None:
+            yield program
+
+
+def weights_digest(weights) -> str:
+    return hashlib.blake2b(weights.tobytes(), digest_size=8).hexdigest()
+
+
+def run_batch_program(
+    item,
+    primitives: Primitives,
+    program_tape_size: int,
+    work_tape_size: int,
+    n_weights: int,
+    tasks: list,
+    trace_dir: Path = None,
+    trace_suffix: str = ".trace",
+) -> dict:
+    """Run a single program of the batch
+
+    Args:
+        item: tuple with the index and the program
+        primitives: the primitives of the universal machine
+        program_tape_size: the size of the program tape
+        work_tape_size: the size of the work tape
+        n_weights: the number of weights
+        tasks: evaluate the final weights on these tasks
+        trace_dir: write the trace of the run to this directory
+        trace_suffix: the trace format (.jsonl or .trace)
+
+    Returns:
+        The result record
+    """
+    index, program = item
+    log_file = None
+    if trace_dir is not None:
+        log_file = Path(trace_dir) / f"program{index}{trace_suffix}"
+
+    state = main_run_program(
+        primitives, program, program_tape_size, work_tape_size, n_weights, log_file
+    )
+
+    result = {
+        "index": index,
+        "program": program,
+        "halt": state.halt.name,
+        "current_runtime": int(state.current_runtime),
+        "weights_digest": weights_digest(state.weights),
+    }
+    if tasks:
+        result["tasks"] = {}
+        for task in tasks:
+            task = Task(task=task)
+            samples = bool(task.eval_program_samples(state.weights))
+            result["tasks"][str(task.task)] = {
+                "samples": samples,
+                "generalizes": samples and bool(task.eval_program(state.weights)),
+            }
+    if log_file is not None:
+        result["trace"] = str(log_file)
+    return result
+
+
+def _run_chunk(run, chunk: list) -> list:
+    return [run(item) for item in chunk]
+
+
+def run_batch(
+    programs,
+    primitives: Primitives,
+    program_tape_size: int = 100,
+    work_tape_size: int = 10,
+    n_weights: int = 10,
+    tasks: list = None,
+    trace_dir: Path = None,
+    trace_suffix: str = ".trace",
+    n_workers: int = None,
+    chunk_size: int = 16,
+):
+    """Run programs across a process pool
+
+    Args:
+        programs: iterable of programs
+        primitives: the primitives of the universal machine
+        program_tape_size: the size of the program tape
+        work_tape_size: the size of the work tape
+        n_weights: the number of weights
+        tasks: evaluate the final weights on these tasks (default: none)
+        trace_dir: write the trace of every run to this directory (default: no traces)
+        trace_suffix: the trace format (.jsonl or .trace)
+        n_workers: the number of processes (default: the number of CPUs, 1 runs in this process)
+        chunk_size: the number of programs sent to a process at once
+
+    Yields:
+        The result record of every program, in input order
+    """
+    tasks = [Tasks(task) for task in tasks or []]
+    for task in tasks:
+        if len(Task(task=task).solution) != n_weights:
+            raise ValueError(
+                f"Task {task} needs {len(Task(task=task).solution)} weights, got {n_weights}"
+            )
+
+    if trace_dir is not None:
+        Path(trace_dir).mkdir(exist_ok=True, parents=True)
+
+    run = partial(
+        run_batch_program,
+        primitives=primitives,
+        program_tape_size=program_tape_size,
+        work_tape_size=work_tape_size,
+        n_weights=n_weights,
+        tasks=tasks,
+        trace_dir=trace_dir,
+        trace_suffix=trace_suffix,
+    )
+
+    items = enumerate(programs)
+    if n_workers == 1:
+        yield from map(run, items)
+        return
+
+    n_workers = n_workers or os.cpu_count()
+    chunks = iter(lambda: list(itertools.islice(items, chunk_size)), [])
+    # Only a few chunks per process are read ahead, such that programs streamed in (stdin) are streamed out
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        for chunk in chunks:
+            pending.append(executor.submit(_run_chunk, run, chunk))
+            if len(pending) >= 2 * n_workers:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
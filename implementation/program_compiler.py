@@ -0,0 +1,400 @@
+"""Compile program tapes into Python functions. The machine never writes to the program tape, hence the instructions,
+their arguments and the values read from the program tape are constants. Every basic block (straight-line code up to
+a jump) is translated into a function with the arguments and program tape reads folded in, the blocks are called
+from a dispatch loop on the instruction pointer.
+
+Programs run in the interpreter first. Programs that are still running after `warmup` steps (the ones where the
+interpreter overhead adds up) continue in the compiled blocks. Jumps into the work tape and instructions that are
+not compiled (`WRITE_WEIGHT` and `READ_WEIGHT`) fall back to the interpreter. Compiled blocks are cached by their
+source, such that siblings in the search (programs with a common prefix) share the blocks of their prefix."""
+import collections
+
+from halt import HaltingCode
+from initial_primitives import InitialPrimitives
+from weight_primitives import WeightPrimitives
+
+# Returned by a block to continue in the interpreter
+FALLBACK = object()
+
+# Maximum number of instructions in a block
+MAX_BLOCK_SIZE = 64
+
+
+class _BlockWriter(object):
+    """Generate the source of the block starting at an address of the program tape"""
+
+    def __init__(self, program, start: int, op_names, op_args, work_tape_size: int):
+        self.tape = [int(c) for c in program.program_tape]
+        self.max = program.max
+        self.oracle_address = program.oracle_address
+        self.maxint = int(program.maxint)
+        self.n_weights = int(program.n_weights)
+        self.work_tape_size = int(work_tape_size)
+        self.op_names = op_names
+        self.op_args = op_args
+        self.start = start
+        self.lines = []
+        self.n_values = 0
+
+    def emit(self, line: str, indent: int = 1):
+        self.lines.append("    " * indent + line)
+
+    def halt(self, ip: int, code: str, indent: int = 1):
+        self.emit(f"return {ip}, rt, mn, wp, H.{code}", indent)
+
+    def read(self, address: int, ip: int, indent: int = 1):
+        """Emit a read, returns the expression of the value or None if the read always fails"""
+        if address >= 0:
+            if address > self.max:
+                self.halt(ip, "ERROR_ILLEGAL_READ", indent)
+                return None
+            return str(self.tape[address])
+
+        self.emit(f"if {address} < mn:", indent)
+        self.halt(ip, "ERROR_ILLEGAL_READ", indent + 1)
+        self.n_values += 1
+        value = f"v{self.n_values}"
+        self.emit(f"{value} = wt[{-address - 1}]", indent)
+        return value
+
+    def write(self, address: int, value: str, ip: int, indent: int = 1) -> bool:
+        """Emit a write, returns False if the write always fails"""
+        if address >= 0:
+            self.halt(ip, "ERROR_ILLEGAL_WRITE", indent)
+            return False
+
+        self.emit(f"if {address} < mn:", indent)
+        self.halt(ip, "ERROR_ILLEGAL_WRITE", indent + 1)
+        self.emit(f"v = {value}", indent)
+        self.emit(f"if v > {self.maxint}:", indent)
+        self.emit(f"v = {self.maxint}", indent + 1)
+        self.emit(f"elif v < {-self.maxint}:", indent)
+        self.emit(f"v = {-self.maxint}", indent + 1)
+        self.emit(f"wt[{-address - 1}] = v", indent)
+        return True
+
+    def jump(self, target: int, ip: int, indent: int = 1):
+        if target > self.oracle_address:
+            self.halt(ip, "ERROR_INVALID_JUMP", indent)
+            return
+        if target < 0:
+            self.emit(f"if {target} < mn:", indent)
+            self.halt(ip, "ERROR_INVALID_JUMP", indent + 1)
+        self.next(target, indent)
+
+    def next(self, ip: int, indent: int = 1):
+        """Emit the time limit check after an instruction"""
+        self.emit("if rt >= limit:", indent)
+        self.halt(ip, "ERROR_CURRENT_TIME_LIMIT", indent + 1)
+
+    def instruction(self, ip: int):
+        """Emit an instruction
+
+        Returns:
+            The address of the next instruction in the block, or None if the block ends
+        """
+        if ip == self.oracle_address:
+            self.emit(f"return {ip}, rt, mn, wp, None")
+            return None
+
+        op = self.tape[ip]
+        if not (0 <= op < len(self.op_args)):
+            self.halt(ip, "ERROR_INSTRUCTION_OUT_OF_SET")
+            return None
+
+        n_args = int(self.op_args[op])
+        if ip + n_args > self.max:
+            self.halt(ip, "ERROR_INVALID_INSTRUCTION_POINTER")
+            return None
+
+        name = self.op_names[op]
+        if name not in _INSTRUCTIONS:
+            self.emit(f"return {ip}, rt, mn, wp, FALLBACK")
+            return None
+
+        args = self.tape[ip + 1 : ip + 1 + n_args]
+        self.emit("rt += 1")
+        if not _INSTRUCTIONS[name](self, ip, *args):
+            return None
+
+        next_ip = ip + 1 + n_args
+        self.next(next_ip)
+        return next_ip
+
+    def source(self) -> str:
+        ip = self.start
+        for _ in range(MAX_BLOCK_SIZE):
+            ip = self.instruction(ip)
+            if ip is None:
+                break
+        else:
+            self.emit(f"return {ip}, rt, mn, wp, None")
+
+        return "\n".join(["def block(wt, weights, rt, mn, wp, limit):"] + self.lines)
+
+
+# The instructions return whether the block continues with the next instruction
+
+
+def _jumpleq(w: _BlockWriter, ip: int, address1: int, address2: int, address3: int):
+    value1 = w.read(address1, ip)
+    if value1 is None:
+        return False
+    value2 = w.read(address2, ip)
+    if value2 is None:
+        return False
+    w.emit(f"if {value1} <= {value2}:")
+    w.jump(address3, ip, indent=2)
+    w.emit(f"return {address3}, rt, mn, wp, None", indent=2)
+    return True
+
+
+def _jump(w: _BlockWriter, ip: int, address1: int):
+    w.jump(address1, ip)
+    w.emit(f"return {address1}, rt, mn, wp, None")
+    return False
+
+
+def _stop(w: _BlockWriter, ip: int):
+    w.halt(ip, "STOP")
+    return False
+
+
+def _output(w: _BlockWriter, ip: int, address1: int):
+    value = w.read(address1, ip)
+    if value is None:
+        return False
+    w.emit(f"if not (-10000 <= {value} <= 10000):")
+    w.halt(ip, "ERROR_WEIGHT_SIZE_OUT_BOUNDS", 2)
+    w.emit(f"if wp >= {w.n_weights}:")
+    w.halt(ip, "ERROR_WEIGHT_POINTER_OUT_BOUNDS", 2)
+    w.emit(f"weights[wp] = {value}")
+    w.emit("wp += 1")
+    return True
+
+
+def _binary(operation: str):
+    def instruction(w: _BlockWriter, ip: int, address1: int, address2: int, address3):
+        value1 = w.read(address1, ip)
+        if value1 is None:
+            return False
+        value2 = w.read(address2, ip)
+        if value2 is None:
+            return False
+        return w.write(address3, operation.format(value1, value2), ip)
+
+    return instruction
+
+
+def _get_input(w: _BlockWriter, ip: int, address1: int, address2: int):
+    if address1 >= 20:
+        w.halt(ip, "ERROR_INPUT_OUT_BOUNDS")
+        return False
+    return w.write(address2, "0", ip)
+
+
+def _move(w: _BlockWriter, ip: int, address1: int, address2: int):
+    value = w.read(address1, ip)
+    if value is None:
+        return False
+    return w.write(address2, value, ip)
+
+
+def _allocate(w: _BlockWriter, ip: int, address1: int):
+    if address1 > 5 or address1 <= 0:
+        w.halt(ip, "ERROR_ALLOCATE_OUT_BOUNDS")
+        return False
+    w.emit(f"if -(mn - {address1}) > {w.work_tape_size}:")
+    w.halt(ip, "ERROR_ALLOCATE_OUT_BOUNDS", 2)
+    w.emit(f"wt.extend([0] * {address1})")
+    w.emit(f"mn -= {address1}")
+    return True
+
+
+def _step(delta: int):
+    def instruction(w: _BlockWriter, ip: int, address1: int):
+        value = w.read(address1, ip)
+        if value is None:
+            return False
+        return w.write(address1, f"{value} + {delta}", ip)
+
+    return instruction
+
+
+def _free(w: _BlockWriter, ip: int, address1: int):
+    if address1 > 5 or address1 <= 0:
+        w.halt(ip, "ERROR_FREE_OUT_BOUNDS")
+        return False
+    w.emit(f"if mn + {address1} > 0:")
+    w.halt(ip, "ERROR_FREE_OUT_BOUNDS", 2)
+    w.emit(f"del wt[-{address1}:]")
+    w.emit(f"mn += {address1}")
+    return True
+
+
+_INSTRUCTIONS = {
+    "JUMPLEQ": _jumpleq,
+    "OUTPUT": _output,
+    "JUMP": _jump,
+    "STOP": _stop,
+    "ADD": _binary("{} + {}"),
+    "GET_INPUT": _get_input,
+    "MOVE": _move,
+    "ALLOCATE": _allocate,
+    "INCREMENT": _step(1),
+    "DECREMENT": _step(-1),
+    "SUBTRACT": _binary("{1} - {0}"),
+    "MULTIPLY": _binary("{} * {}"),
+    "FREE": _free,
+}
+
+
+class ProgramCompiler(object):
+    """Run programs in compiled blocks, with results identical to `UniversalMachine.run`
+
+    Args:
+        primitives: the primitives of the universal machine (`InitialPrimitives` or `WeightPrimitives`, other
+            primitives are always interpreted)
+        warmup: the number of steps in the interpreter before compiling
+        cache_size: the maximum number of cached blocks and programs
+    """
+
+    # Approximate size of a compiled block (source, code object and function) and of a cached program
+    function_size = 2000
+    program_size = 400
+
+    def __init__(self, primitives, warmup: int = 64, cache_size: int = 2 ** 14):
+        if warmup < 1:
+            raise ValueError(f"The warmup must be at least one step, not {warmup}")
+        self.enabled = type(primitives) in (InitialPrimitives, WeightPrimitives)
+        self.op_names = list(primitives.get_op_names())
+        self.op_args = [int(n) for n in primitives.op_args]
+        self.warmup = warmup
+        self.cache_size = cache_size
+        self.n_compiled = 0
+        # Block source to compiled function
+        self._functions = collections.OrderedDict()
+        # Program to its blocks (address to compiled function)
+        self._programs = collections.OrderedDict()
+
+    def _cache(self, cache: collections.OrderedDict, key, value):
+        cache[key] = value
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def shrink(self, min_size: int = 2 ** 8):
+        """Drop the cached blocks and programs and halve the cache size"""
+        self._functions.clear()
+        self._programs.clear()
+        self.cache_size = max(min_size, self.cache_size // 2)
+
+    @property
+    def n_bytes(self) -> int:
+        """The approximate bytes of the cached blocks and programs"""
+        return (
+            len(self._functions) * self.function_size
+            + len(self._programs) * self.program_size
+        )
+
+    def block(self, state, start: int):
+        """The compiled block starting at an address of the program tape"""
+        source = _BlockWriter(
+            state, start, self.op_names, self.op_args, state.work_tape_size
+        ).source()
+
+        function = self._functions.get(source)
+        if function is None:
+            namespace = {"H": HaltingCode, "FALLBACK": FALLBACK}
+            exec(compile(source, "<block>", "exec"), namespace)
+            function = namespace["block"]
+            self.n_compiled += 1
+            self._cache(self._functions, source, function)
+        else:
+            self._functions.move_to_end(source)
+        return function
+
+    def run(self, universal_machine, state, current_time_limit: int):
+        """Run the program, equal to `universal_machine.run(state, current_time_limit)`
+
+        Args:
+            universal_machine: the interpreter
+            state: the state to run
+            current_time_limit: the time limit
+        """
+        if not self.enabled or current_time_limit <= self.warmup:
+            universal_machine._run(state, current_time_limit)
+            return
+
+        universal_machine._run(state, self.warmup)
+        if (
+            state.halt != HaltingCode.ERROR_CURRENT_TIME_LIMIT
+            or state.current_runtime >= current_time_limit
+        ):
+            return
+        state.halt = None
+
+        # The blocks depend on the bounds of the machine as well
+        key = (
+            tuple(state.program_tape),
+            int(state.maxint),
+            int(state.work_tape_size),
+            int(state.n_weights),
+        )
+        blocks = self._programs.get(key)
+        if blocks is None:
+            blocks = {}
+            self._cache(self._programs, key, blocks)
+        else:
+            self._programs.move_to_end(key)
+
+        if self._run_blocks(blocks, state, current_time_limit):
+            universal_machine._run(state, current_time_limit)
+
+    def _run_blocks(self, blocks: dict, state, limit: int) -> bool:
+        """Run the compiled blocks until the program halts
+
+        Returns:
+            True if the program should continue in the interpreter
+        """
+        wt = state.work_tape
+        weights = state.weights
+        rt = state.current_runtime
+        mn = state.min
+        wp = state.weight_pointer
+        ip = state.instruction_pointer
+        oracle_address = state.oracle_address
+
+        fallback = False
+        while True:
+            if ip == oracle_address:
+                halt = HaltingCode.CONTINUE
+                break
+
+            block = blocks.get(ip)
+            if block is None:
+                if ip < 0:
+                    # Jump into the work tape
+                    halt = None
+                    fallback = True
+                    break
+                block = blocks[ip] = self.block(state, ip)
+
+            ip, rt, mn, wp, halt = block(wt, weights, rt, mn, wp, limit)
+            if halt is FALLBACK:
+                halt = None
+                fallback = True
+                break
+            if halt is not None:
+                # As in the interpreter, reaching the oracle address overrides the halting code
+                if ip == oracle_address:
+                    halt = HaltingCode.CONTINUE
+                break
+
+        state.work_tape = wt
+        state.current_runtime = rt
+        state.min = mn
+        state.weight_pointer = wp
+        state.instruction_pointer = ip
+        state.jumped = False
+        state.halt = halt
+        return fallback
@@ -0,0 +1,224 @@
+"""Memory of programs that halted. Halted programs do not benefit from longer run times, hence they can be skipped
+in later phases. The number of halted programs grows with every phase, so besides the in-memory variant there is a
+variant with a byte budget that spills to disk."""
+
+import hashlib
+import math
+import sqlite3
+import sys
+from collections import OrderedDict
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import numpy as np
+
+
+def program_key(program) -> bytes:
+    """Encode a program as a compact, hashable key
+
+    Args:
+        program: the program (sequence of integers)
+
+    Returns:
+        The program encoded as bytes
+    """
+    return np.asarray(program, dtype=np.int32).tobytes()
+
+
+class ProgramMemory(object):
+    """In-memory set of halted programs"""
+
+    def __init__(self):
+        self._programs = set()
+        self._key_bytes = 0
+
+    def add(self, program):
+        key = program_key(program)
+        if key not in self._programs:
+            self._programs.add(key)
+            self._key_bytes += sys.getsizeof(key)
+
+    def __contains__(self, program):
+        return program_key(program) in self._programs
+
+    def __len__(self):
+        return len(self._programs)
+
+    def __iter__(self):
+        """The keys of the programs, see `program_key`"""
+        return iter(self._programs)
+
+    @property
+    def n_bytes(self):
+        """The bytes of the programs and the set"""
+        return sys.getsizeof(self._programs) + self._key_bytes
+
+    def close(self):
+        pass
+
+
+class BloomFilter(object):
+    """Bloom filter over byte keys for a fast negative check.
+
+    Args:
+        capacity: the expected number of keys
+        error_rate: the false positive rate at capacity
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        capacity = max(capacity, 1)
+        self.n_bits = max(
+            8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        )
+        self.n_hashes = max(1, int(round(self.n_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.n_bits + 7) // 8)
+
+    def _positions(self, key: bytes):
+        # Double hashing: h1 + i * h2
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.n_bits for i in range(self.n_hashes))
+
+    def add(self, key: bytes):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: bytes):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    @property
+    def n_bytes(self):
+        return len(self.bits)
+
+
+class SpillingProgramMemory(object):
+    """Set of halted programs with a byte budget.
+
+    Recently added programs are kept in memory. When the in-memory entries exceed the budget, the oldest half is
+    spilled to a hashed on-disk store (sqlite). A Bloom filter over the spilled programs avoids disk lookups for
+    programs that were never seen, disk lookups confirm the positives exactly.
+
+    Args:
+        budget: the number of bytes that the in-memory entries may use
+        directory: directory for the on-disk store, a temporary directory is used if not provided
+        bloom_capacity: the expected number of spilled programs, used to size the Bloom filter
+        bloom_error_rate: the false positive rate of the Bloom filter at capacity
+    """
+
+    # Approximate overhead of an entry in the ordered dict (hash table slot and linked list node)
+    entry_overhead = 100
+
+    def __init__(
+        self,
+        budget: int,
+        directory: Path = None,
+        bloom_capacity: int = 10**7,
+        bloom_error_rate: float = 0.01,
+    ):
+        self.budget = budget
+        self._tmp_dir = None
+        if directory is None:
+            self._tmp_dir = TemporaryDirectory()
+            directory = Path(self._tmp_dir.name)
+        directory.mkdir(exist_ok=True, parents=True)
+
+        self._hot = OrderedDict()
+        self._hot_bytes = 0
+        self._n_spilled = 0
+        self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+
+        self._db = sqlite3.connect(str(directory / "memory.sqlite"))
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("DROP TABLE IF EXISTS programs")
+        self._db.execute(
+            "CREATE TABLE programs (program BLOB PRIMARY KEY) WITHOUT ROWID"
+        )
+
+    def _entry_size(self, key: bytes) -> int:
+        return sys.getsizeof(key) + self.entry_overhead
+
+    def add(self, program):
+        key = program_key(program)
+        if self._contains_key(key):
+            return
+
+        self._hot[key] = None
+        self._hot_bytes += self._entry_size(key)
+
+        if self._hot_bytes > self.budget:
+            self._spill(len(self._hot) // 2 + 1)
+
+    def set_budget(self, budget: int):
+        """Change the budget, the oldest in-memory entries above a smaller budget are spilled"""
+        self.budget = budget
+        n = 0
+        hot_bytes = self._hot_bytes
+        for key in self._hot:
+            if hot_bytes <= budget:
+                break
+            hot_bytes -= self._entry_size(key)
+            n += 1
+        if n:
+            self._spill(n)
+
+    def _spill(self, n: int):
+        keys = [self._hot.popitem(last=False)[0] for _ in range(min(n, len(self._hot)))]
+        for key in keys:
+            self._hot_bytes -= self._entry_size(key)
+            self.bloom.add(key)
+
+        cursor = self._db.executemany(
+            "INSERT OR IGNORE INTO programs VALUES (?)", ((k,) for k in keys)
+        )
+        self._n_spilled += cursor.rowcount
+        self._db.commit()
+
+    def __contains__(self, program):
+        return self._contains_key(program_key(program))
+
+    def _contains_key(self, key: bytes) -> bool:
+        if key in self._hot:
+            return True
+
+        if key not in self.bloom:
+            return False
+
+        return (
+            self._db.execute(
+                "SELECT 1 FROM programs WHERE program = ?", (key,)
+            ).fetchone()
+            is not None
+        )
+
+    def __len__(self):
+        return len(self._hot) + self._n_spilled
+
+    def __iter__(self):
+        """The keys of the programs, see `program_key`"""
+        for (key,) in self._db.execute("SELECT program FROM programs"):
+            yield key
+        yield from list(self._hot)
+
+    @property
+    def n_hot(self):
+        return len(self._hot)
+
+    @property
+    def n_spilled(self):
+        return self._n_spilled
+
+    @property
+    def n_bytes(self):
+        """The bytes of the in-memory entries and the Bloom filter"""
+        return self._hot_bytes + self.bloom.n_bytes
+
+    def close(self):
+        self._db.close()
+        if self._tmp_dir is not None:
+            self._tmp_dir.cleanup()
+            self._tmp_dir = None
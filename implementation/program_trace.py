@@ -0,0 +1,516 @@
+"""Traces of program runs. A trace holds the machine state for every step of a run, either as JSON lines (one
+`Program.to_json` per step) or in a compact binary format. The binary format stores a full keyframe every
+`keyframe_interval` steps and only the changed cells and pointers in between.
+
+Binary layout (little endian):
+    header:   magic (8 bytes), version (uint8), keyframe interval (uint32)
+    keyframe: b"K", scalars, program tape, work tape, weights
+    delta:    b"D", scalars, work tape length, changed work tape cells, changed weights
+
+The scalars are min, max, halting code, instruction pointer, current runtime and weight pointer. Tapes are stored as
+their length followed by the values, changes as their count followed by (index, value) pairs.
+
+Both writers store a sidecar index (`<trace>.idx`) with the byte offset of every `interval`-th step, which for the
+binary format are the periodic keyframes. `TraceReader` uses it to seek to a step without reading the trace up to it.
+
+Index layout (little endian):
+    header:   magic (8 bytes), version (uint8), interval (uint32), number of steps (uint64), trace size (uint64)
+    offsets:  uint64 per `interval` steps
+"""
+import json
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from halt import HaltingCode
+
+MAGIC = b"LPSTRACE"
+VERSION = 1
+INDEX_MAGIC = b"LPSINDEX"
+INDEX_VERSION = 1
+# Steps between the offsets in the index of a JSON lines trace
+JSONL_INDEX_INTERVAL = 1024
+
+_header = struct.Struct("<8sBI")
+_scalars = struct.Struct("<iiBiqi")
+_length = struct.Struct("<I")
+_index_header = struct.Struct("<8sBIQQ")
+_cell_change = np.dtype([("index", "<u4"), ("value", "<i8")])
+_weight_change = np.dtype([("index", "<u4"), ("value", "<i2")])
+
+
+def _halt_to_code(halt) -> int:
+    return 0 if halt is None else halt.value
+
+
+def _code_to_halt(code: int) -> str:
+    return str(None if code == 0 else HaltingCode(code))
+
+
+def index_path(path: Path) -> Path:
+    """The sidecar index of a trace"""
+    path = Path(path)
+    return path.with_name(path.name + ".idx")
+
+
+def write_index(path: Path, interval: int, n_steps: int, offsets):
+    """Write the sidecar index of a trace
+
+    Args:
+        path: the trace file
+        interval: the number of steps between the offsets
+        n_steps: the number of steps in the trace
+        offsets: the byte offset of every `interval`-th step
+    """
+    path = Path(path)
+    with index_path(path).open("wb") as f:
+        f.write(
+            _index_header.pack(
+                INDEX_MAGIC, INDEX_VERSION, interval, n_steps, path.stat().st_size
+            )
+        )
+        f.write(np.asarray(offsets, dtype="<u8").tobytes())
+
+
+def read_index(path: Path):
+    """Read the sidecar index of a trace
+
+    Args:
+        path: the trace file
+
+    Returns:
+        Tuple with the interval, the number of steps and the offsets, or None if there is no index or it does not
+        belong to the current trace file
+    """
+    path = Path(path)
+    try:
+        data = index_path(path).read_bytes()
+    except FileNotFoundError:
+        return None
+
+    if len(data) < _index_header.size:
+        return None
+    magic, version, interval, n_steps, size = _index_header.unpack_from(data)
+    if magic != INDEX_MAGIC or version != INDEX_VERSION or size != path.stat().st_size:
+        return None
+    offsets = np.frombuffer(data, dtype="<u8", offset=_index_header.size)
+    return interval, n_steps, offsets.tolist()
+
+
+class JsonlTraceWriter(object):
+    """Write the trace as one `Program.to_json` per line
+
+    Args:
+        path: the trace file
+        index_interval: store the offset of every this many steps in the index
+    """
+
+    def __init__(self, path: Path, index_interval: int = JSONL_INDEX_INTERVAL):
+        self.path = Path(path)
+        self.index_interval = index_interval
+        # Binary, such that the offsets are not shifted by newline translation (e.g. on Windows)
+        self._f = self.path.open("wb")
+        self._n_steps = 0
+        self._offset = 0
+        self._offsets = []
+
+    def write(self, state):
+        if self._n_steps % self.index_interval == 0:
+            self._offsets.append(self._offset)
+
+        line = state.to_json().encode() + b"\n"
+        self._f.write(line)
+        self._offset += len(line)
+        self._n_steps += 1
+
+    def close(self):
+        self._f.close()
+        write_index(self.path, self.index_interval, self._n_steps, self._offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BinaryTraceWriter(object):
+    """Write the trace as keyframes and deltas
+
+    Args:
+        path: the trace file
+        keyframe_interval: store a full keyframe every this many steps
+    """
+
+    def __init__(self, path: Path, keyframe_interval: int = 1024):
+        self.path = Path(path)
+        self.keyframe_interval = keyframe_interval
+        self._f = self.path.open("wb")
+        self._f.write(_header.pack(MAGIC, VERSION, keyframe_interval))
+        self._n_steps = 0
+        self._offsets = []
+        self._program_tape = None
+        self._work_tape = None
+        self._weights = None
+
+    def _write_scalars(self, state):
+        self._f.write(
+            _scalars.pack(
+                int(state.min),
+                int(state.max),
+                _halt_to_code(state.halt),
+                int(state.instruction_pointer),
+                int(state.current_runtime),
+                int(state.weight_pointer),
+            )
+        )
+
+    def _write_array(self, values, dtype):
+        values = np.asarray(values, dtype=dtype)
+        self._f.write(_length.pack(len(values)))
+        self._f.write(values.tobytes())
+
+    def _write_keyframe(self, state):
+        self._f.write(b"K")
+        self._write_scalars(state)
+        self._write_array(state.program_tape, "<i8")
+        self._write_array(state.work_tape, "<i8")
+        self._write_array(state.weights, "<i2")
+
+    def _write_delta(self, state):
+        work_tape = state.work_tape
+        n = min(len(work_tape), len(self._work_tape))
+        cells = [i for i in range(n) if work_tape[i] != self._work_tape[i]]
+        cells.extend(range(n, len(work_tape)))
+        cell_changes = np.empty(len(cells), dtype=_cell_change)
+        cell_changes["index"] = cells
+        cell_changes["value"] = [work_tape[i] for i in cells]
+
+        weights = np.flatnonzero(state.weights != self._weights)
+        weight_changes = np.empty(len(weights), dtype=_weight_change)
+        weight_changes["index"] = weights
+        weight_changes["value"] = state.weights[weights]
+
+        self._f.write(b"D")
+        self._write_scalars(state)
+        self._f.write(_length.pack(len(work_tape)))
+        self._f.write(_length.pack(len(cell_changes)))
+        self._f.write(cell_changes.tobytes())
+        self._f.write(_length.pack(len(weight_changes)))
+        self._f.write(weight_changes.tobytes())
+
+    def write(self, state):
+        if self._n_steps % self.keyframe_interval == 0:
+            self._offsets.append(self._f.tell())
+
+        # The program tape is not writable, a change (or a different weight vector size) starts a new keyframe
+        if (
+            self._n_steps % self.keyframe_interval == 0
+            or state.program_tape != self._program_tape
+            or len(state.weights) != len(self._weights)
+        ):
+            self._write_keyframe(state)
+        else:
+            self._write_delta(state)
+
+        self._n_steps += 1
+        self._program_tape = list(state.program_tape)
+        self._work_tape = list(state.work_tape)
+        self._weights = state.weights.copy()
+
+    def close(self):
+        self._f.close()
+        write_index(self.path, self.keyframe_interval, self._n_steps, self._offsets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_trace_writer(path: Path):
+    """Open a trace writer, the format is determined by the file extension (.jsonl or .trace)
+
+    Args:
+        path: the trace file
+
+    Returns:
+        The trace writer
+    """
+    path = Path(path)
+    if path.suffix == ".trace":
+        return BinaryTraceWriter(path)
+    return JsonlTraceWriter(path)
+
+
+def _read_exactly(f, n: int) -> bytes:
+    data = f.read(n)
+    if len(data) != n:
+        raise ValueError("Truncated trace file")
+    return data
+
+
+def _read_array(f, dtype):
+    (n,) = _length.unpack(_read_exactly(f, _length.size))
+    dtype = np.dtype(dtype)
+    return np.frombuffer(_read_exactly(f, n * dtype.itemsize), dtype=dtype)
+
+
+def _read_binary_header(f, path: Path) -> int:
+    magic, version, keyframe_interval = _header.unpack(_read_exactly(f, _header.size))
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not a trace file: '{path}'")
+    return keyframe_interval
+
+
+class _BinaryRecords(object):
+    """Replay the records of a binary trace from the current position of the file, which should be a keyframe"""
+
+    def __init__(self, f, path: Path):
+        self._f = f
+        self._path = path
+        self.offset = f.tell()
+        self.scalars = None
+        self.program_tape = self.work_tape = self.weights = None
+
+    def next(self, apply: bool = True) -> bool:
+        """Read the next record
+
+        Args:
+            apply: update the state, otherwise the record is skipped (only to find the next record)
+
+        Returns:
+            False at the end of the trace
+        """
+        f = self._f
+        kind = f.read(1)
+        if not kind:
+            return False
+
+        self.scalars = _scalars.unpack(_read_exactly(f, _scalars.size))
+        if kind == b"K":
+            program_tape = _read_array(f, "<i8")
+            work_tape = _read_array(f, "<i8")
+            weights = _read_array(f, "<i2")
+            if apply:
+                self.program_tape = program_tape.tolist()
+                self.work_tape = work_tape.tolist()
+                self.weights = weights.tolist()
+        elif kind == b"D":
+            (n,) = _length.unpack(_read_exactly(f, _length.size))
+            cell_changes = _read_array(f, _cell_change)
+            weight_changes = _read_array(f, _weight_change)
+            if apply:
+                if self.work_tape is None:
+                    raise ValueError(f"Corrupt trace file: '{self._path}'")
+                work_tape = self.work_tape
+                del work_tape[n:]
+                work_tape.extend([0] * (n - len(work_tape)))
+                for index, value in cell_changes.tolist():
+                    work_tape[index] = value
+                for index, value in weight_changes.tolist():
+                    self.weights[index] = value
+        else:
+            raise ValueError(f"Corrupt trace file: '{self._path}'")
+
+        return True
+
+    def state(self) -> dict:
+        """The state after the last record, as a dictionary equal to `json.loads(Program.to_json())`"""
+        min_, max_, halt, ip, runtime, weight_pointer = self.scalars
+        return {
+            "state": {
+                "min": min_,
+                "max": max_,
+                "halt": _code_to_halt(halt),
+                "instruction_pointer": ip,
+                "current_runtime": runtime,
+                "weight_pointer": weight_pointer,
+            },
+            "storage": {
+                "program_tape": list(self.program_tape),
+                "work_tape": list(self.work_tape),
+                "weights": list(self.weights),
+            },
+        }
+
+
+def read_binary_trace(path: Path):
+    """Reconstruct the states stored in a binary trace
+
+    Args:
+        path: the trace file
+
+    Yields:
+        For every step, the state as a dictionary equal to `json.loads(Program.to_json())`
+    """
+    with Path(path).open("rb") as f:
+        _read_binary_header(f, path)
+        records = _BinaryRecords(f, path)
+        while records.next():
+            yield records.state()
+
+
+def build_index(path: Path):
+    """Write the sidecar index of a trace that has none, such as traces written before there were indices
+
+    Args:
+        path: the trace file
+
+    Returns:
+        Tuple with the interval, the number of steps and the offsets
+    """
+    path = Path(path)
+    offsets = []
+    n_steps = 0
+    if path.suffix == ".trace":
+        with path.open("rb") as f:
+            interval = _read_binary_header(f, path)
+            records = _BinaryRecords(f, path)
+            while True:
+                offset = f.tell()
+                if not records.next(apply=False):
+                    break
+                if n_steps % interval == 0:
+                    offsets.append(offset)
+                n_steps += 1
+    else:
+        interval = JSONL_INDEX_INTERVAL
+        offset = 0
+        with path.open("rb") as f:
+            for line in f:
+                if n_steps % interval == 0:
+                    offsets.append(offset)
+                offset += len(line)
+                n_steps += 1
+
+    write_index(path, interval, n_steps, offsets)
+    return interval, n_steps, offsets
+
+
+class TraceReader(object):
+    """Random access to the states of a trace, using its sidecar index (built when missing)
+
+    Args:
+        path: the trace file (.jsonl or .trace)
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        index = read_index(self.path)
+        if index is None:
+            index = build_index(self.path)
+        self.interval, self.n_steps, self._offsets = index
+
+    def __len__(self):
+        return self.n_steps
+
+    def __getitem__(self, step: int) -> dict:
+        if step < 0:
+            step += self.n_steps
+        if not 0 <= step < self.n_steps:
+            raise IndexError("Step out of range")
+        return next(self.read(step, step + 1))
+
+    def keyframes(self):
+        """The states at the offsets of the index (every `interval` steps)
+
+        Yields:
+            The state as a dictionary equal to `json.loads(Program.to_json())`
+        """
+        return self.read(stride=self.interval)
+
+    def read(self, start: int = 0, stop: int = None, stride: int = 1):
+        """Read the states of the steps in `range(start, stop, stride)`
+
+        Args:
+            start: the first step
+            stop: the step to stop at (default: the end of the trace)
+            stride: read every this many steps
+
+        Yields:
+            The state as a dictionary equal to `json.loads(Program.to_json())`
+        """
+        start, stop, stride = slice(start, stop, stride).indices(self.n_steps)
+        if stride <= 0:
+            raise ValueError("Stride should be positive")
+        steps = range(start, stop, stride)
+        if not steps:
+            return
+
+        with self.path.open("rb") as f:
+            if self.path.suffix == ".trace":
+                yield from self._read_binary(f, steps)
+            else:
+                yield from self._read_jsonl(f, steps)
+
+    def _seek(self, f, target: int, step: int) -> int:
+        """Seek to the offset before the target step, unless reading on from the current step is shorter
+
+        Returns:
+            The step at the current position of the file
+        """
+        checkpoint = target // self.interval
+        if step is None or checkpoint * self.interval > step:
+            f.seek(self._offsets[checkpoint])
+            step = checkpoint * self.interval
+        return step
+
+    def _read_binary(self, f, steps: range):
+        _read_binary_header(f, self.path)
+        records = None
+        # The step of the next record
+        step = None
+        for target in steps:
+            position = self._seek(f, target, step)
+            if position != step:
+                # Replay from the keyframe
+                records = _BinaryRecords(f, self.path)
+                step = position
+            while step <= target:
+                if not records.next():
+                    raise ValueError(f"Truncated trace file: '{self.path}'")
+                step += 1
+            yield records.state()
+
+    def _read_jsonl(self, f, steps: range):
+        # The step of the next line
+        step = None
+        for target in steps:
+            step = self._seek(f, target, step)
+            while step < target:
+                f.readline()
+                step += 1
+            line = f.readline()
+            if not line:
+                raise ValueError(f"Truncated trace file: '{self.path}'")
+            step += 1
+            yield json.loads(line)
+
+
+def read_trace(path: Path, start: int = 0, stop: int = None, stride: int = 1):
+    """Read the states of a trace, the format is determined by the file extension (.jsonl or .trace)
+
+    Args:
+        path: the trace file
+        start: the first step
+        stop: the step to stop at (default: the end of the trace)
+        stride: read every this many steps
+
+    Yields:
+        For every step, the state as a dictionary equal to `json.loads(Program.to_json())`
+    """
+    path = Path(path)
+    if (start, stop, stride) != (0, None, 1):
+        yield from TraceReader(path).read(start, stop, stride)
+        return
+
+    if path.suffix == ".trace":
+        yield from read_binary_trace(path)
+        return
+
+    with path.open() as f:
+        for line in f:
+            yield json.loads(line)
@@ -0,0 +1,152 @@
+"""Checkpoints of completed searches. A deeper search repeats the phases of a shallower one, hence a completed search
+is continued from its checkpoint at the next phase, with the same result as a search of the larger length from
+scratch. Every phase enumerates the programs from the empty program, skipping the halted programs, so the frontier of
+the search (the programs that reached the time limit and their extensions) follows from the memory of halted programs.
+A checkpoint holds the search state (counters, solutions and the distinct outputs), the memory of halted programs
+and the configuration of the search."""
+import json
+from pathlib import Path
+
+import numpy as np
+
+from solution_store import SolutionStore
+
+# The counters of the search state
+COUNTERS = (
+    "n_runs",
+    "n_steps",
+    "space_size",
+    "expanded_n_runs",
+    "expanded_space_size",
+    "n_no_ops",
+    "n_shared",
+    "n_loops",
+    "phase",
+)
+
+
+def search_config(
+    task,
+    primitives,
+    base_program,
+    symmetry_reduction: bool,
+    share_outcomes: bool,
+    loop_detection: bool,
+    max_solutions: int = None,
+    skip_no_ops: bool = False,
+) -> dict:
+    """Everything besides the search length that determines the result of a search
+
+    Returns:
+        The configuration, a JSON object
+    """
+    config = {
+        "task": str(task),
+        "primitives": type(primitives).__name__,
+        "op_args": [int(n) for n in primitives.op_args],
+        "program_tape_size": base_program.program_tape_size,
+        "work_tape_size": base_program.work_tape_size,
+        "maxint": base_program.maxint,
+        "n_weights": base_program.n_weights,
+        "symmetry_reduction": symmetry_reduction,
+        "share_outcomes": share_outcomes,
+        "loop_detection": loop_detection,
+    }
+    # The symmetry reduction of earlier checkpoints skipped the no-ops
+    if symmetry_reduction:
+        config["skip_no_ops"] = skip_no_ops
+    # Only included if bounded, such that existing checkpoints stay valid
+    if max_solutions is not None:
+        config["max_solutions"] = max_solutions
+    return config
+
+
+def save_checkpoint(
+    directory: Path, search_state, config: dict, search_log_file: Path = None
+) -> None:
+    """Save the checkpoint of a completed search
+
+    Args:
+        directory: the directory of the checkpoint, created if not exists
+        search_state: the state of the search
+        config: the configuration of the search, see `search_config`
+        search_log_file: the log of the search, continued by the search from the checkpoint
+    """
+    directory = Path(directory)
+    directory.mkdir(exist_ok=True, parents=True)
+
+    # Length prefixed keys of the halted programs
+    with (directory / "checkpoint_memory.bin").open("wb") as f:
+        for key in search_state.memory:
+            f.write(len(key).to_bytes(4, "little"))
+            f.write(key)
+
+    if search_log_file is not None:
+        search_log_file = str(Path(search_log_file).absolute())
+
+    checkpoint = {
+        "config": config,
+        "search_log": search_log_file,
+        "state": {name: getattr(search_state, name) for name in COUNTERS},
+        "solutions": search_state.solutions.to_json(),
+        "outputs": {k.hex(): n for k, n in search_state.outputs.counts.items()},
+    }
+    with (directory / "checkpoint.json").open("w") as f:
+        json.dump(checkpoint, f)
+
+
+def read_checkpoint(directory: Path, config: dict) -> dict:
+    """Read the checkpoint of a completed search
+
+    Args:
+        directory: the directory of the checkpoint, see `save_checkpoint`
+        config: the configuration of the new search, see `search_config`
+
+    Returns:
+        The checkpoint, with the `search_log` of the completed search
+
+    Raises:
+        ValueError: the configuration of the checkpoint differs
+    """
+    with (Path(directory) / "checkpoint.json").open() as f:
+        checkpoint = json.load(f)
+
+    if checkpoint["config"] != config:
+        differences = sorted(
+            k for k in config if checkpoint["config"].get(k) != config[k]
+        )
+        raise ValueError(
+            f"The checkpoint in {directory} is of a different search ({', '.join(differences)})"
+        )
+    return checkpoint
+
+
+def restore_search_state(directory: Path, checkpoint: dict, search_state) -> None:
+    """Restore the state of a completed search
+
+    Args:
+        directory: the directory of the checkpoint
+        checkpoint: the checkpoint, see `read_checkpoint`
+        search_state: the state of the new search, with an empty memory
+    """
+    for name, value in checkpoint["state"].items():
+        setattr(search_state, name, value)
+    search_state.solutions = SolutionStore.from_json(
+        checkpoint["solutions"], search_state.solutions.max_size
+    )
+    search_state.solutions.end_phase(
+        search_state.space_size, search_state.expanded_space_size
+    )
+    search_state.outputs.counts.update(
+        {bytes.fromhex(k): n for k, n in checkpoint["outputs"].items()}
+    )
+
+    data = (Path(directory) / "checkpoint_memory.bin").read_bytes()
+    offset = 0
+    while offset < len(data):
+        size = int.from_bytes(data[offset : offset + 4], "little")
+        offset += 4
+        search_state.memory.add(
+            np.frombuffer(data[offset : offset + size], dtype=np.int32)
+        )
+        offset += size
@@ -0,0 +1,27 @@
+"""Events of a Levin search, yielded by `levin_search.iter_levin_search` as they happen."""
+import attr
+
+from memory_usage import MemoryReport
+from solution import Solution
+
+
+@attr.s(slots=True, frozen=True)
+class SolutionEvent(object):
+    # The solution, its `space_size` is not known yet
+    solution = attr.ib(type=Solution)
+
+
+@attr.s(slots=True, frozen=True)
+class ProgressEvent(object):
+    phase = attr.ib(converter=int)
+    n_runs = attr.ib(converter=int)
+    n_steps = attr.ib(converter=int)
+    space_size = attr.ib(converter=int)
+    # Whether the phase is finished, otherwise the event is emitted every `progress_interval` runs
+    phase_finished = attr.ib(default=False, type=bool)
+
+
+@attr.s(slots=True, frozen=True)
+class MemoryEvent(object):
+    # The memory of the search, every `memory_interval` runs and at the end of every phase
+    report = attr.ib(type=MemoryReport)
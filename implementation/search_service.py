@@ -0,0 +1,449 @@
+"""Local search service. Search and run jobs are submitted as JSON lines over a UNIX socket, queued and executed by a
+pool of warm worker processes. A worker keeps its primitives with their argument tables and its outcome caches
+across jobs, such that a search repeated for another task or a larger length mostly consists of lookups. The events
+of a job (progress, solutions and results) are streamed back to the connection that submitted it.
+
+A job is a JSON object with a `type`:
+- `search`: a Levin search, with the `task`, the `search_length` and optionally the keyword arguments of
+  `iter_levin_search` in `SEARCH_OPTIONS` and the `primitives_set`. Without an `outcome_cache` file, the worker uses
+  its in-memory outcome cache
+- `run`: run the `programs`, optionally evaluated on the `tasks` (see `run_batch_program`)
+- `status`: the number of workers and the queued and running jobs
+- `shutdown`: stop the service
+
+Every event is a JSON object with an `event` and the `job` id. A job ends with a `done` or an `error` event.
+
+The kept state of a worker is bounded: the argument tables are least recently used caches, at most a few outcome
+caches stay open and the in-memory outcome caches are dropped after a job once they exceed a budget. Within a search,
+the `memory_limit` of the job sheds the outcome cache as well (see `MemoryMonitor`)."""
+import asyncio
+import collections
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+from pathlib import Path
+
+# The keyword arguments of `iter_levin_search` accepted in search jobs
+SEARCH_OPTIONS = (
+    "work_tape_size",
+    "program_tape_size",
+    "n_weights",
+    "maxint",
+    "outcome_cache",
+    "compile_programs",
+    "symmetry_reduction",
+    "skip_no_ops",
+    "share_outcomes",
+    "loop_detection",
+    "loop_acceleration",
+    "progress_interval",
+    "memory_limit",
+    "memory_interval",
+    "max_solutions",
+)
+
+# The defaults of the console scripts
+SEARCH_DEFAULTS = {"work_tape_size": 1, "program_tape_size": 1000}
+RUN_DEFAULTS = {"work_tape_size": 10, "program_tape_size": 100, "n_weights": 10}
+
+
+def _memoize_args(primitives, max_size: int = 2 ** 12):
+    """Keep the argument tables of the primitives, they only depend on the instruction and the tape bounds. The least
+    recently used tables are evicted beyond `max_size` tables."""
+    args_generator = primitives.args_generator
+    tables = collections.OrderedDict()
+
+    def cached_args_generator(state, op_id: int):
+        key = (int(op_id), state.min, state.max, state.work_tape_size)
+        table = tables.get(key)
+        if table is None:
+            table = tables[key] = args_generator(state, op_id)
+            if len(tables) > max_size:
+                tables.popitem(last=False)
+        else:
+            tables.move_to_end(key)
+        return table
+
+    primitives.args_generator = cached_args_generator
+    return primitives
+
+
+def _solution_to_dict(solution) -> dict:
+    import attr
+
+    solution = attr.asdict(solution)
+    solution["program"] = [int(c) for c in solution["program"]]
+    return solution
+
+
+class _Worker(object):
+    """The state a worker process keeps across jobs
+
+    Args:
+        max_outcome_caches: the maximum number of open outcome caches, the least recently used one is closed
+        max_cache_bytes: the budget of the in-memory outcome caches, see `trim`
+    """
+
+    def __init__(self, max_outcome_caches: int = 4, max_cache_bytes: int = 2 ** 28):
+        self.max_outcome_caches = max_outcome_caches
+        self.max_cache_bytes = max_cache_bytes
+        self._primitives = {}
+        self._outcome_caches = collections.OrderedDict()
+
+    def primitives(self, primitives_set: str):
+        if primitives_set not in self._primitives:
+            if primitives_set == "WEIGHT":
+                from weight_primitives import WeightPrimitives
+
+                primitives = WeightPrimitives()
+            elif primitives_set == "DEFAULT":
+                from initial_primitives import InitialPrimitives
+
+                primitives = InitialPrimitives()
+            else:
+                raise ValueError(f"Unknown primitives set {primitives_set}")
+            self._primitives[primitives_set] = _memoize_args(primitives)
+        return self._primitives[primitives_set]
+
+    def outcome_cache(self, primitives, options: dict):
+        """The open outcome cache of the file in the options (default: in memory) for the machine configuration"""
+        from outcome_cache import OutcomeCache, machine_config_hash
+        from program import Program
+
+        base_program = Program(
+            program_tape_size=options["program_tape_size"],
+            work_tape_size=options["work_tape_size"],
+            n_weights=options.get("n_weights", 100),
+            maxint=options.get("maxint", 10000),
+        )
+        config = machine_config_hash(
+            primitives, base_program, options.get("loop_detection", False)
+        )
+        path = options.get("outcome_cache", ":memory:")
+        key = (str(path), config)
+        if key in self._outcome_caches:
+            self._outcome_caches.move_to_end(key)
+            return self._outcome_caches[key]
+
+        outcome_cache = self._outcome_caches[key] = OutcomeCache(path, config)
+        if len(self._outcome_caches) > self.max_outcome_caches:
+            _, evicted = self._outcome_caches.popitem(last=False)
+            evicted.close()
+        return outcome_cache
+
+    def trim(self) -> None:
+        """Drop the outcomes of the in-memory outcome caches if together they exceed the budget"""
+        outcome_caches = list(self._outcome_caches.values())
+        if sum(c.n_bytes for c in outcome_caches) > self.max_cache_bytes:
+            for outcome_cache in outcome_caches:
+                outcome_cache.shrink()
+
+    def search(self, job: dict):
+        import attr
+
+        from levin_search import iter_levin_search
+        from search_events import MemoryEvent, SolutionEvent
+        from task import Tasks
+
+        unknown = (
+            set(job)
+            - set(SEARCH_OPTIONS)
+            - {"type", "task", "search_length", "primitives_set"}
+        )
+        if unknown:
+            raise ValueError(f"Unknown search options {sorted(unknown)}")
+
+        options = dict(SEARCH_DEFAULTS)
+        options.update((k, job[k]) for k in SEARCH_OPTIONS if k in job)
+        primitives = self.primitives(job.get("primitives_set", "DEFAULT"))
+        options["outcome_cache"] = self.outcome_cache(primitives, options)
+        n_hits, n_misses = (
+            options["outcome_cache"].n_hits,
+            options["outcome_cache"].n_misses,
+        )
+
+        search = iter_levin_search(
+            Tasks.from_string(job["task"]),
+            primitives,
+            search_length=int(job["search_length"]),
+            **options,
+        )
+        for event in search:
+            if isinstance(event, SolutionEvent):
+                yield {
+                    "event": "solution",
+                    "solution": _solution_to_dict(event.solution),
+                }
+            elif isinstance(event, MemoryEvent):
+                yield {"event": "memory", **attr.asdict(event.report)}
+            else:
+                yield {
+                    "event": "progress",
+                    "phase": event.phase,
+                    "n_runs": event.n_runs,
+                    "n_steps": event.n_steps,
+                    "space_size": event.space_size,
+                    "phase_finished": event.phase_finished,
+                }
+
+        search_state = search.search_state
+        yield {
+            "event": "done",
+            "n_runs": search_state.n_runs,
+            "n_steps": search_state.n_steps,
+            "space_size": search_state.space_size,
+            "solutions": [_solution_to_dict(s) for s in search_state.solutions],
+            "n_solutions_found": search_state.solutions.n_found,
+            "n_solutions_discarded": search_state.solutions.n_discarded,
+            "outcome_cache_hits": options["outcome_cache"].n_hits - n_hits,
+            "outcome_cache_misses": options["outcome_cache"].n_misses - n_misses,
+        }
+
+    def run(self, job: dict):
+        from program_batch import run_batch_program
+        from task import Tasks
+
+        options = dict(RUN_DEFAULTS)
+        options.update((k, int(job[k])) for k in RUN_DEFAULTS if k in job)
+        primitives = self.primitives(job.get("primitives_set", "DEFAULT"))
+        tasks = [Tasks.from_string(t) for t in job.get("tasks", [])]
+
+        for item in enumerate(job["programs"]):
+            result = run_batch_program(
+                item,
+                primitives,
+                options["program_tape_size"],
+                options["work_tape_size"],
+                options["n_weights"],
+                tasks,
+            )
+            yield {"event": "result", **result}
+        yield {"event": "done", "n_programs": len(job["programs"])}
+
+
+def _work(jobs, events, profile_dir: Path = None) -> None:
+    """The loop of a worker process
+
+    Args:
+        jobs: the queue of the jobs, tuples with the job id and the job (None stops the worker)
+        events: the queue of the events, tuples with the job id and the event
+        profile_dir: profile every job in a subdirectory `job<id>` of this directory (default: no profiling)
+    """
+    worker = _Worker()
+    for job_id, job in iter(jobs.get, None):
+        events.put((job_id, {"event": "started", "worker": os.getpid()}))
+        profiler = contextlib.nullcontext()
+        if profile_dir is not None:
+            from profiler import Profiler
+
+            profiler = Profiler(Path(profile_dir) / f"job{job_id}")
+        try:
+            with profiler:
+                if job["type"] == "search":
+                    run = worker.search(job)
+                elif job["type"] == "run":
+                    run = worker.run(job)
+                else:
+                    raise ValueError(f"Unknown job type {job['type']}")
+                for event in run:
+                    # Held back until the profile is stored
+                    if event["event"] == "done":
+                        done = event
+                    else:
+                        events.put((job_id, event))
+            events.put((job_id, done))
+        except Exception as e:
+            events.put(
+                (job_id, {"event": "error", "message": f"{type(e).__name__}: {e}"})
+            )
+        finally:
+            worker.trim()
+
+
+class SearchService(object):
+    """The service, listening on a UNIX socket
+
+    Args:
+        socket_path: the path of the UNIX socket, replaced if it exists
+        n_workers: the number of worker processes
+        profile_dir: profile the jobs in the workers, see `Profiler` (default: no profiling)
+    """
+
+    def __init__(self, socket_path: Path, n_workers: int = 2, profile_dir: Path = None):
+        self.socket_path = Path(socket_path)
+        self.n_workers = n_workers
+        self.profile_dir = profile_dir
+        self._job_ids = itertools.count()
+        # The event queues of the connections by job id
+        self._listeners = {}
+        self._n_queued = 0
+        self._n_running = 0
+        self._server = None
+        self._stopped = None
+
+    async def start(self) -> None:
+        """Start the workers and listen on the socket"""
+        # Workers are spawned, the service may run in a thread of a process with an event loop
+        context = multiprocessing.get_context("spawn")
+        self._jobs = context.Queue()
+        self._events = context.Queue()
+        self._workers = [
+            context.Process(
+                target=_work,
+                args=(self._jobs, self._events, self.profile_dir),
+                daemon=True,
+            )
+            for _ in range(self.n_workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._closing = threading.Event()
+        self._dispatcher = threading.Thread(
+            target=self._dispatch, args=(loop,), daemon=True
+        )
+        self._dispatcher.start()
+
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+        self._server = await asyncio.start_unix_server(
+            self._handle, path=str(self.socket_path)
+        )
+
+    async def serve_forever(self) -> None:
+        """Serve until a `shutdown` job"""
+        await self._stopped.wait()
+        await self.close()
+
+    async def close(self) -> None:
+        """Stop listening and stop the workers, running jobs are aborted"""
+        self._server.close()
+        await self._server.wait_closed()
+        # The dispatcher stops first: a worker terminated while it puts an event keeps the lock of the queue, the
+        # queue cannot be used afterwards
+        self._closing.set()
+        self._dispatcher.join()
+        for worker in self._workers:
+            worker.terminate()
+        for worker in self._workers:
+            worker.join()
+        if self.socket_path.exists():
+            self.socket_path.unlink()
+
+    def _dispatch(self, loop) -> None:
+        """Pass the events of the workers to the event loop (in a thread), until the service closes"""
+        while not self._closing.is_set():
+            try:
+                job_id, event = self._events.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            loop.call_soon_threadsafe(self._deliver, job_id, event)
+
+    def _deliver(self, job_id: int, event: dict) -> None:
+        if event["event"] == "started":
+            self._n_queued -= 1
+            self._n_running += 1
+        elif event["event"] in ("done", "error"):
+            self._n_running -= 1
+
+        listener = self._listeners.get(job_id)
+        # The events of the jobs of closed connections are dropped
+        if listener is not None:
+            listener.put_nowait(event)
+
+    async def _handle(self, reader, writer) -> None:
+        """Run the jobs of a connection one after another"""
+
+        async def send(event: dict) -> None:
+            writer.write(json.dumps(event).encode() + b"\n")
+            await writer.drain()
+
+        try:
+            async for line in reader:
+                if not line.strip():
+                    continue
+                try:
+                    job = json.loads(line)
+                    job_type = job["type"]
+                except (ValueError, KeyError, TypeError) as e:
+                    await send({"event": "error", "message": f"Invalid job: {e}"})
+                    continue
+
+                if job_type == "status":
+                    await send(
+                        {
+                            "event": "done",
+                            "n_workers": self.n_workers,
+                            "n_queued": self._n_queued,
+                            "n_running": self._n_running,
+                        }
+                    )
+                    continue
+                if job_type == "shutdown":
+                    await send({"event": "done"})
+                    self._stopped.set()
+                    break
+
+                job_id = next(self._job_ids)
+                listener = self._listeners[job_id] = asyncio.Queue()
+                try:
+                    self._n_queued += 1
+                    self._jobs.put((job_id, job))
+                    await send({"event": "queued", "job": job_id})
+                    while True:
+                        event = await listener.get()
+                        await send({**event, "job": job_id})
+                        if event["event"] in ("done", "error"):
+                            break
+                finally:
+                    del self._listeners[job_id]
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+def serve(socket_path: Path, n_workers: int = 2, profile_dir: Path = None) -> None:
+    """Run the service until a `shutdown` job
+
+    Args:
+        socket_path: the path of the UNIX socket
+        n_workers: the number of worker processes
+        profile_dir: profile every job in a subdirectory `job<id>` of this directory (default: no profiling)
+    """
+
+    async def main():
+        service = SearchService(socket_path, n_workers, profile_dir)
+        await service.start()
+        await service.serve_forever()
+
+    asyncio.run(main())
+
+
+def submit(socket_path: Path, job: dict):
+    """Submit a job to a running service
+
+    Args:
+        socket_path: the path of the UNIX socket
+        job: the job
+
+    Yields:
+        The events of the job, up to and including the `done` or `error` event
+    """
+    import socket
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.connect(str(socket_path))
+        s.sendall(json.dumps(job).encode() + b"\n")
+        with s.makefile("r") as f:
+            for line in f:
+                event = json.loads(line)
+                yield event
+                if event["event"] in ("done", "error"):
+                    return
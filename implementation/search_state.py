@@ -1,5 +1,9 @@
 import attr
 
+from output_memo import OutputMemo
+from program_memory import ProgramMemory
+from solution_store import SolutionStore
+
 
 @attr.s(slots=True)
 class SearchState(object):
@@ -7,7 +11,31 @@ class SearchState(object):
     n_runs = attr.ib(default=0, converter=int)
     n_steps = attr.ib(default=0, converter=int)
     space_size = attr.ib(default=0, converter=int)
+    # The runs and the space size including the programs represented by the canonical ones, see `Symmetry`
+    expanded_n_runs = attr.ib(default=0, converter=int)
+    expanded_space_size = attr.ib(default=0, converter=int)
+    # The number of skipped no-op instructions
+    n_no_ops = attr.ib(default=0, converter=int)
+    # The number of programs that were assigned the outcome of a sibling instead of running
+    n_shared = attr.ib(default=0, converter=int)
+    # The number of programs halted on a detected loop
+    n_loops = attr.ib(default=0, converter=int)
     phase = attr.ib(default=0, converter=int)
-    solutions = attr.ib(factory=list)
+    # The solutions, see `SolutionStore`
+    solutions = attr.ib(factory=SolutionStore, repr=False)
     # Programs that HALTED and hence do not benefit from longer run times
-    memory = attr.ib(factory=list, repr=False)
+    memory = attr.ib(factory=ProgramMemory, repr=False)
+    # Called with every solution when it is found
+    on_solution = attr.ib(default=None, repr=False)
+    # Outcomes of programs from earlier runs, see `OutcomeCache`
+    outcome_cache = attr.ib(default=None, repr=False)
+    # Final weights of the halted programs, see `WeightDatabaseWriter`
+    weight_database = attr.ib(default=None, repr=False)
+    # Task verdicts per distinct output
+    outputs = attr.ib(factory=OutputMemo, repr=False)
+    # Canonical argument tuples, see `Symmetry` (default: all argument tuples)
+    symmetry = attr.ib(default=None, repr=False)
+    # Share the outcomes of runs with the siblings that differ only in unread arguments, see `SiblingOutcomes`
+    share_outcomes = attr.ib(default=False, repr=False)
+    # Measures the memory and sheds memory above a soft limit, see `MemoryMonitor`
+    memory_monitor = attr.ib(default=None, repr=False)
@@ -0,0 +1,111 @@
+"""Timeline of a search. Every phase and every top-level subtree of a phase (the programs that extend the same first
+instruction) is a span with its wall time, the number of runs (candidates), steps and solutions during the span and
+the size of the memory of halted programs at its end. The spans are written as JSON lines (`.jsonl`) or in the Chrome
+trace event format (`.json`, for `chrome://tracing` or Perfetto), where the subtrees are nested in their phase.
+
+The spans are recorded when a subtree or phase ends, the runs themselves are not instrumented."""
+import json
+import os
+import time
+from pathlib import Path
+
+import attr
+
+
+@attr.s(slots=True)
+class Span(object):
+    name = attr.ib(type=str)
+    category = attr.ib(type=str)
+    phase = attr.ib(converter=int)
+    start = attr.ib(type=float)
+    # The counters of the search state at the start
+    n_runs = attr.ib(converter=int)
+    n_steps = attr.ib(converter=int)
+    n_solutions = attr.ib(converter=int)
+
+
+class SearchTimeline(object):
+    """Write the spans of a search to a file
+
+    Args:
+        path: the file, JSON lines (.jsonl) or Chrome trace events (.json)
+        primitives: the primitives, for the names of the subtrees
+    """
+
+    def __init__(self, path: Path, primitives):
+        self.path = Path(path)
+        self.chrome_trace = self.path.suffix == ".json"
+        self.op_names = list(primitives.get_op_names())
+        self._start = time.perf_counter()
+        self._n_spans = 0
+
+        self.path.parent.mkdir(exist_ok=True, parents=True)
+        self._f = self.path.open("w")
+        if self.chrome_trace:
+            self._f.write("[\n")
+
+    def begin(self, name: str, category: str, search_state) -> Span:
+        """Start a span
+
+        Args:
+            name: the name of the span
+            category: the kind of span (phase or subtree)
+            search_state: the state of the search
+
+        Returns:
+            The `Span`, see `end`
+        """
+        return Span(
+            name,
+            category,
+            search_state.phase,
+            time.perf_counter(),
+            search_state.n_runs,
+            search_state.n_steps,
+            search_state.solutions.n_found,
+        )
+
+    def begin_subtree(self, program: list, search_state) -> Span:
+        """Start the span of the subtree of the programs that extend the first instruction"""
+        name = " ".join([self.op_names[program[0]]] + [str(a) for a in program[1:]])
+        return self.begin(name, "subtree", search_state)
+
+    def end(self, span: Span, search_state) -> None:
+        """End a span and write it"""
+        end = time.perf_counter()
+        record = {
+            "name": span.name,
+            "category": span.category,
+            "phase": span.phase,
+            "start": span.start - self._start,
+            "duration": end - span.start,
+            "n_runs": search_state.n_runs - span.n_runs,
+            "n_steps": search_state.n_steps - span.n_steps,
+            "n_solutions": search_state.solutions.n_found - span.n_solutions,
+            "memory_size": len(search_state.memory),
+        }
+
+        if self.chrome_trace:
+            name, category = record.pop("name"), record.pop("category")
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": record.pop("start") * 1e6,
+                "dur": record.pop("duration") * 1e6,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": record,
+            }
+            if self._n_spans:
+                self._f.write(",\n")
+            self._f.write(json.dumps(event))
+        else:
+            self._f.write(json.dumps(record))
+            self._f.write("\n")
+        self._n_spans += 1
+
+    def close(self) -> None:
+        if self.chrome_trace:
+            self._f.write("\n]\n")
+        self._f.close()
@@ -0,0 +1,44 @@
+"""Outcomes shared by sibling programs. Siblings in the search differ only in the arguments of their last
+instruction. A run that never looked at some of these arguments (see `Primitives.n_consulted_args`) has the same
+outcome for every sibling that differs only in them, such siblings are not run."""
+
+
+class SiblingOutcomes(object):
+    """The outcomes of the runs of the siblings by the arguments they depend on
+
+    Args:
+        start: the address of the last instruction
+        n_args: the number of arguments of the last instruction
+    """
+
+    def __init__(self, start: int, n_args: int):
+        self.start = start
+        self.n_args = int(n_args)
+        # The positions of the read arguments to the outcomes by the values of the read arguments
+        self._outcomes = {}
+
+    def add(self, args: tuple, status):
+        """Record the outcome of a run
+
+        Args:
+            args: the arguments of the last instruction
+            status: the final state of the run, the read set is required for sharing the outcome
+        """
+        if status.read_set is None:
+            return
+
+        read = tuple(
+            i for i in range(self.n_args) if self.start + 1 + i in status.read_set
+        )
+        if len(read) == self.n_args:
+            return
+
+        self._outcomes.setdefault(read, {})[tuple(args[i] for i in read)] = status
+
+    def get(self, args: tuple):
+        """The final state of a sibling that shares its outcome with the arguments, or None"""
+        for read, outcomes in self._outcomes.items():
+            status = outcomes.get(tuple(args[i] for i in read))
+            if status is not None:
+                return status
+        return None
@@ -4,11 +4,12 @@ import attr
 @attr.s(slots=True)
 class Solution(object):
     program = attr.ib(type=list)
-    found_after = attr.ib(convert=int)
-    time_limit = attr.ib(convert=int)
-    current_runtime = attr.ib(convert=int)
-    phase = attr.ib(convert=int)
+    found_after = attr.ib(converter=int)
+    time_limit = attr.ib(converter=int)
+    current_runtime = attr.ib(converter=int)
+    phase = attr.ib(converter=int)
     space_size = attr.ib(default=None)
     generalizes = attr.ib(default=False, type=bool)
     complexity = attr.ib(default=None, type=float)
+    expanded_space_size = attr.ib(default=None)
 
@@ -0,0 +1,175 @@
+"""Store of the solutions of a search. On permissive tasks most programs of the later phases pass the training samples,
+so the store can be bounded to the best solutions: generalizing solutions first, then by `complexity` (length plus
+log runtime), then by the order in which they were found. The kept solutions are a heap with the worst at the top, a
+better solution replaces it in logarithmic time. The store counts the solutions it discarded.
+
+The space size of a solution is the space size of the search at the end of the last completed phase. It is recorded
+once per phase and filled in when the solutions are read."""
+import heapq
+import sys
+
+import attr
+
+from solution import Solution
+
+
+def _entry(solution: Solution, order: int, number: int) -> tuple:
+    """The heap entry of a solution, the better the solution the larger the entry"""
+    return (
+        bool(solution.generalizes),
+        -float(solution.complexity),
+        -solution.found_after,
+        order,
+        number,
+        solution,
+    )
+
+
+class SolutionStore(object):
+    """The solutions of a search, in the order they were found
+
+    Args:
+        max_size: keep at most this many solutions, the best ones (default: all)
+    """
+
+    def __init__(self, max_size: int = None):
+        self.max_size = max_size
+        self.n_found = 0
+        self.n_discarded = 0
+        self.n_discarded_generalizing = 0
+        # The space sizes at the end of the last completed phase and the number of solutions found until then
+        self.space_size = None
+        self.expanded_space_size = None
+        self._n_recorded = 0
+        # The number of solutions found per phase, for the numbers of the solutions
+        self._n_found_phase = {}
+        # Heap of the entries of the kept solutions (see `_entry`), the worst solution first
+        self._heap = []
+
+    def add(self, solution: Solution) -> bool:
+        """Add a solution that was just found
+
+        Returns:
+            Whether the solution is kept
+        """
+        number = self._n_found_phase.get(solution.phase, 0)
+        self._n_found_phase[solution.phase] = number + 1
+        entry = _entry(solution, self.n_found, number)
+        self.n_found += 1
+
+        if self.max_size is None or len(self._heap) < self.max_size:
+            heapq.heappush(self._heap, entry)
+            return True
+
+        if self._heap and entry > self._heap[0]:
+            # Replaces the worst solution
+            entry = heapq.heapreplace(self._heap, entry)
+        self._discard(entry[-1])
+        return entry[-1] is not solution
+
+    def _discard(self, solution: Solution) -> None:
+        self.n_discarded += 1
+        if solution.generalizes:
+            self.n_discarded_generalizing += 1
+
+    def end_phase(self, space_size: int, expanded_space_size: int) -> None:
+        """Record the space sizes at the end of a phase, for the solutions found so far"""
+        self.space_size = space_size
+        self.expanded_space_size = expanded_space_size
+        self._n_recorded = self.n_found
+
+    def _solution(self, entry) -> Solution:
+        solution = entry[-1]
+        if entry[3] >= self._n_recorded:
+            # Found in the current phase
+            return solution
+        return attr.evolve(
+            solution,
+            space_size=self.space_size,
+            expanded_space_size=self.expanded_space_size,
+        )
+
+    def numbered(self):
+        """The solutions in the order they were found, with their number among the solutions found in their phase
+
+        Yields:
+            Tuples with the number and the solution
+        """
+        for entry in sorted(self._heap, key=lambda e: e[3]):
+            yield entry[4], self._solution(entry)
+
+    def __iter__(self):
+        return (solution for _, solution in self.numbered())
+
+    def best(self) -> list:
+        """The solutions from the best to the worst"""
+        return [self._solution(entry) for entry in sorted(self._heap, reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, SolutionStore):
+            return NotImplemented
+        return list(self) == list(other)
+
+    @property
+    def n_bytes(self) -> int:
+        """The approximate bytes of the solutions"""
+        if not self._heap:
+            return 0
+        entry = self._heap[-1]
+        return sys.getsizeof(self._heap) + len(self._heap) * (
+            sys.getsizeof(entry)
+            + sys.getsizeof(entry[-1])
+            + sys.getsizeof(entry[-1].program)
+        )
+
+    def to_json(self) -> dict:
+        """The solutions with their numbers and the counts, a JSON object, see `from_json`"""
+        return {
+            "solutions": [
+                dict(attr.asdict(s), program=[int(c) for c in s.program], number=n)
+                for n, s in self.numbered()
+            ],
+            "n_found": self.n_found,
+            "n_found_phase": {str(k): n for k, n in self._n_found_phase.items()},
+            "n_discarded": self.n_discarded,
+            "n_discarded_generalizing": self.n_discarded_generalizing,
+        }
+
+    @classmethod
+    def from_json(cls, data, max_size: int = None) -> "SolutionStore":
+        """Restore a store, see `to_json`
+
+        Args:
+            data: the JSON object, or the list of solutions of a checkpoint without counts
+            max_size: the maximum number of solutions of the restored store
+        """
+        if isinstance(data, list):
+            data = {"solutions": data}
+
+        store = cls(max_size)
+        for solution in data["solutions"]:
+            solution = dict(solution)
+            number = solution.pop("number", None)
+            solution = Solution(**solution)
+            if number is None:
+                number = store._n_found_phase.get(solution.phase, 0)
+            store._n_found_phase[solution.phase] = max(
+                store._n_found_phase.get(solution.phase, 0), number + 1
+            )
+            store._heap.append(_entry(solution, store.n_found, number))
+            store.n_found += 1
+        heapq.heapify(store._heap)
+
+        store.n_found = data.get("n_found", store.n_found)
+        store._n_found_phase.update(
+            (int(k), n) for k, n in data.get("n_found_phase", {}).items()
+        )
+        store.n_discarded = data.get("n_discarded", 0)
+        store.n_discarded_generalizing = data.get("n_discarded_generalizing", 0)
+        return store
@@ -0,0 +1,61 @@
+"""Symmetry reduction of the enumerated instructions. Several argument tuples of an instruction behave identically,
+`ADD` and `MULTIPLY` are commutative in their operands, and some instructions do nothing: `MOVE a a` copies a cell
+onto itself and `JUMPLEQ a a t` always jumps (hence it is a longer `JUMP t`). The reduction runs one representative
+per class of equivalent instructions and, optionally, skips the no-ops.
+
+The equivalent instructions have subtrees of the same size, so the counts of the search expanded by the size of the
+classes are the counts of the search without reduction. A program with a no-op is not equivalent to any other program
+(it is longer and takes one more step), skipping the no-ops skips their subtrees, which are not counted.
+
+The instructions are equivalent, the program tapes are not: programs that read their own arguments as data or jump
+into them can behave differently than their representative. The reduction is therefore opt-in."""
+from primitives import Primitives
+
+# Instructions with commutative first two operands
+COMMUTATIVE = ("ADD", "MULTIPLY")
+
+
+class Symmetry(object):
+    """Canonical argument tuples of the instructions
+
+    Args:
+        primitives: the primitives of the universal machine
+        skip_no_ops: skip the no-op instructions together with the programs that extend them
+    """
+
+    def __init__(self, primitives: Primitives, skip_no_ops: bool = False):
+        self.skip_no_ops = skip_no_ops
+        names = list(primitives.get_op_names())
+        self.commutative = {i for i, name in enumerate(names) if name in COMMUTATIVE}
+        self.move = {i for i, name in enumerate(names) if name == "MOVE"}
+        self.jumpleq = {i for i, name in enumerate(names) if name == "JUMPLEQ"}
+
+    def skips(self, instruction: int, args: tuple) -> bool:
+        """Whether the instruction is skipped, a no-op with `skip_no_ops`"""
+        return self.skip_no_ops and self.is_no_op(instruction, args)
+
+    def is_no_op(self, instruction: int, args: tuple) -> bool:
+        """Whether the instruction does not change the state (apart from the instruction pointer)"""
+        if instruction in self.move:
+            return args[0] == args[1]
+        if instruction in self.jumpleq:
+            return args[0] == args[1]
+        return False
+
+    def multiplicity(self, instruction: int, args: tuple) -> int:
+        """The number of argument tuples the arguments represent
+
+        Args:
+            instruction: the instruction
+            args: the arguments of the instruction
+
+        Returns:
+            The size of the class of equivalent argument tuples, 0 if the arguments are not the representative of
+            their class
+        """
+        if instruction in self.commutative:
+            if args[0] > args[1]:
+                return 0
+            if args[0] < args[1]:
+                return 2
+        return 1
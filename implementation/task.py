@@ -1,33 +1,15 @@
-from enum import Enum, auto
-
 import numpy as np
 
+# The task enumeration lives in a module without NumPy to keep the console startup fast
+from tasks import Tasks
 
-class Tasks(Enum):
-    # Because we believe in credit assignment: https://stackoverflow.com/a/46385352/470433
-
-    POSITION = auto()
-    COUNT = auto()
-    EVEN = auto()
-    ODD = auto()
-    FIZZ = auto()
-    FIZZ_COMPLETE = auto()
-    BUZZ = auto()
-    BUZZ_COMPLETE = auto()
-    FIZZBUZZ = auto()
-    FIZZBUZZ_COMPLETE = auto()
-    NEGATIVE_ONE = auto()
-    NEGATIVE_ONE_TWO_THREE = auto()
 
-    def __str__(self):
-        return self.name
-
-    @staticmethod
-    def from_string(s):
-        try:
-            return Tasks[s]
-        except KeyError:
-            raise ValueError()
+# Training examples (as in the paper)
+TRAINING_EXAMPLES = [
+    [5, 17, 86],
+    [13, 55, 58],
+    [40, 87, 94],
+]
 
 
 def short_circuit_check(a, b, n=10):
@@ -113,15 +95,33 @@ class Task(object):
         Returns:
             True if the solution matches all training samples
         """
-        # Training examples (as in the paper)
-        examples = [
-            [5, 17, 86],
-            [13, 55, 58],
-            [40, 87, 94],
-        ]
-
-        for example in examples:
+        for example in TRAINING_EXAMPLES:
             if any(solution[example] != self.solution[example]):
                 return False
 
         return True
+
+    def eval_programs_samples(self, weights: np.ndarray) -> np.ndarray:
+        """Vectorized `eval_program_samples` for many programs at once.
+
+        Args:
+            weights: the predicted solutions, one per row
+
+        Returns:
+            Boolean array, True for the rows that match all training samples
+        """
+        examples = np.ravel(TRAINING_EXAMPLES)
+        return np.all(weights[:, examples] == self.solution[examples], axis=1)
+
+    def eval_programs(self, weights: np.ndarray) -> np.ndarray:
+        """Vectorized `eval_program` for many programs at once.
+
+        Args:
+            weights: the predicted solutions, one per row
+
+        Returns:
+            Boolean array, True for the rows that fully generalize to the task
+        """
+        if weights.shape[1] != len(self.solution):
+            raise ValueError("Number of weights differs from the task size")
+        return np.all(weights == self.solution, axis=1)
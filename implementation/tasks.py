@@ -0,0 +1,29 @@
+"""The tasks. Kept free of heavy imports, such that the console interface can list them without loading NumPy."""
+from enum import Enum, auto
+
+
+class Tasks(Enum):
+    # Because we believe in credit assignment: https://stackoverflow.com/a/46385352/470433
+
+    POSITION = auto()
+    COUNT = auto()
+    EVEN = auto()
+    ODD = auto()
+    FIZZ = auto()
+    FIZZ_COMPLETE = auto()
+    BUZZ = auto()
+    BUZZ_COMPLETE = auto()
+    FIZZBUZZ = auto()
+    FIZZBUZZ_COMPLETE = auto()
+    NEGATIVE_ONE = auto()
+    NEGATIVE_ONE_TWO_THREE = auto()
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def from_string(s):
+        try:
+            return Tasks[s]
+        except KeyError:
+            raise ValueError(f"Unknown task {s!r}")
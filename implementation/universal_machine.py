@@ -1,6 +1,28 @@
 """Discovering neural networks."""
 from halt import HaltingCode
-from logs import get_logger
+from program_trace import open_trace_writer
+
+
+def _loop_state(state):
+    """The part of the state that determines the rest of the run (apart from the time limit)"""
+    return (
+        state.instruction_pointer,
+        state.min,
+        state.weight_pointer,
+        list(state.work_tape),
+        state.weights.copy(),
+    )
+
+
+def _is_loop_state(state, loop_state) -> bool:
+    instruction_pointer, min_, weight_pointer, work_tape, weights = loop_state
+    return (
+        state.instruction_pointer == instruction_pointer
+        and state.min == min_
+        and state.weight_pointer == weight_pointer
+        and state.work_tape == work_tape
+        and (state.weights == weights).all()
+    )
 
 
 class UniversalMachine(object):
@@ -8,8 +30,20 @@ class UniversalMachine(object):
     Universal Machine
     """
 
-    def __init__(self, primitives):
+    def __init__(
+        self,
+        primitives,
+        compiler=None,
+        loop_detection: bool = False,
+        accelerator=None,
+    ):
         self.primitives = primitives
+        # Runs programs in compiled blocks (see `program_compiler.ProgramCompiler`) unless they are traced
+        self.compiler = compiler
+        # Halt programs whose state recurs with `HaltingCode.ERROR_INFINITE_LOOP`
+        self.loop_detection = loop_detection
+        # Fast-forwards counted loops (see `loop_accelerator.LoopAccelerator`), programs are not compiled
+        self.accelerator = accelerator
 
     def _run_operation(self, state, current_time_limit, op_code):
         if not (0 <= op_code < self.primitives.n_ops):
@@ -22,15 +56,26 @@ class UniversalMachine(object):
             state.halt = HaltingCode.ERROR_INVALID_INSTRUCTION_POINTER
             return
 
+        # The arguments are recorded in the read set once it is known which of them the instruction depends on
+        read_set = state.read_set
+        state.read_set = None
         args_contents = [
             state.read(state, state.instruction_pointer + i + 1)
             for i in range(self.primitives.get_n_args(op_code))
         ]
+        state.read_set = read_set
         if state.halt is not None:
             return
 
+        instruction_pointer = state.instruction_pointer
         state.current_runtime += 1
         self.primitives.run_op(op_code, state, args_contents)
+        if read_set is not None:
+            n_args = self.primitives.n_consulted_args(op_code, state, args_contents)
+            # Arguments on the work tape (after a jump into the work tape) are not recorded
+            read_set.update(
+                range(max(instruction_pointer + 1, 0), instruction_pointer + 1 + n_args)
+            )
         if state.halt:
             return
 
@@ -43,12 +88,54 @@ class UniversalMachine(object):
             state.halt = HaltingCode.ERROR_CURRENT_TIME_LIMIT
             return
 
+        # Only a jump moves the instruction pointer back, which closes a loop
+        if (
+            self.accelerator is not None
+            and state.instruction_pointer <= instruction_pointer
+        ):
+            self.accelerator.accelerate(state, instruction_pointer, current_time_limit)
+
     def run(self, state, current_time_limit, log_file=None):
-        logger = get_logger("universal_machine", log_file)
+        if log_file is None:
+            # Compiled blocks do not record the read set
+            if self.loop_detection:
+                self._run_detecting_loops(state, current_time_limit)
+            elif (
+                self.compiler is not None
+                and state.read_set is None
+                and self.accelerator is None
+            ):
+                self.compiler.run(self, state, current_time_limit)
+            else:
+                self._run(state, current_time_limit)
+            return
+
+        with open_trace_writer(log_file) as trace:
+            self._run(state, current_time_limit, trace)
 
+    def _run(self, state, current_time_limit, trace=None):
         while True:
-            logger.debug(state.to_json())
+            if trace is not None:
+                trace.write(state)
+
+            if state.instruction_pointer == state.oracle_address:
+                state.halt = HaltingCode.CONTINUE
+                return
 
+            op_code = state.read(state, state.instruction_pointer)
+            if state.halt is not None:
+                return
+
+            self._run_operation(state, current_time_limit, op_code)
+
+    def _run_detecting_loops(self, state, current_time_limit):
+        """Run the program and halt once the state recurs, which is detected with Brent's algorithm. The final
+        weights are the weights the program has at the time limit and the runtime is the time limit, the steps that
+        were skipped are in `n_skipped_steps`."""
+        # The saved state, the steps since it was saved and the steps until the next state is saved
+        loop_state = _loop_state(state)
+        period = power = 1
+        while True:
             if state.instruction_pointer == state.oracle_address:
                 state.halt = HaltingCode.CONTINUE
                 return
@@ -57,4 +144,29 @@ class UniversalMachine(object):
             if state.halt is not None:
                 return
 
+            current_runtime = state.current_runtime
             self._run_operation(state, current_time_limit, op_code)
+            if state.halt is not None:
+                continue
+
+            if state.current_runtime > current_runtime + 1:
+                # Fast-forwarded by the loop accelerator, the steps are not counted in the period
+                loop_state = _loop_state(state)
+                period = power = 1
+                continue
+
+            if _is_loop_state(state, loop_state):
+                # Skip whole periods until the time limit
+                remaining = (current_time_limit - state.current_runtime) % period
+                if remaining:
+                    self._run(state, state.current_runtime + remaining)
+                state.n_skipped_steps = int(current_time_limit - state.current_runtime)
+                state.current_runtime = int(current_time_limit)
+                state.halt = HaltingCode.ERROR_INFINITE_LOOP
+                return
+
+            if period == power:
+                loop_state = _loop_state(state)
+                power *= 2
+                period = 0
+            period += 1
@@ -0,0 +1,146 @@
+"""Database of the final weights of every halted program of a search. The weights are stored as one int16 row per
+program in a raw file that is memory-mapped when reading, the programs are stored in an index beside it (one JSON
+line per row). New tasks are evaluated against all rows with vectorized comparisons instead of running the machine
+again."""
+import json
+from pathlib import Path
+
+import numpy as np
+
+from task import Task, Tasks
+
+WEIGHTS_FILE = "weights.bin"
+INDEX_FILE = "programs.jsonl"
+META_FILE = "meta.json"
+
+
+class WeightDatabaseWriter(object):
+    """Append the final weights of halted programs to a database directory
+
+    Args:
+        directory: the database directory, created if not exists
+        n_weights: the number of weights of every program
+    """
+
+    def __init__(self, directory: Path, n_weights: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(exist_ok=True, parents=True)
+        self.n_weights = n_weights
+        self.n_rows = 0
+
+        self._weights = (self.directory / WEIGHTS_FILE).open("wb")
+        self._index = (self.directory / INDEX_FILE).open("w")
+
+    def add(self, program: list, status, time_limit: int, phase: int):
+        """Add a halted program
+
+        Args:
+            program: the program
+            status: the final state of the program
+            time_limit: the time limit of the run
+            phase: the search phase
+        """
+        self._weights.write(np.asarray(status.weights, dtype="<i2").tobytes())
+        self._index.write(
+            json.dumps(
+                {
+                    "program": [int(c) for c in program],
+                    "halt": status.halt.name,
+                    "time_limit": int(time_limit),
+                    "current_runtime": int(status.current_runtime),
+                    "phase": int(phase),
+                }
+            )
+        )
+        self._index.write("\n")
+        self.n_rows += 1
+
+    def flush(self):
+        """Make the rows added so far readable"""
+        self._weights.flush()
+        self._index.flush()
+        with (self.directory / META_FILE).open("w") as f:
+            json.dump({"n_rows": self.n_rows, "n_weights": self.n_weights}, f)
+
+    def close(self):
+        self.flush()
+        self._weights.close()
+        self._index.close()
+
+
+class WeightDatabase(object):
+    """Read a database directory written by `WeightDatabaseWriter`
+
+    Args:
+        directory: the database directory
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with (self.directory / META_FILE).open() as f:
+            meta = json.load(f)
+        self.n_rows = meta["n_rows"]
+        self.n_weights = meta["n_weights"]
+
+        if self.n_rows == 0:
+            self.weights = np.zeros((0, self.n_weights), dtype="<i2")
+        else:
+            self.weights = np.memmap(
+                self.directory / WEIGHTS_FILE,
+                dtype="<i2",
+                mode="r",
+                shape=(self.n_rows, self.n_weights),
+            )
+        self._programs = None
+
+    def __len__(self):
+        return self.n_rows
+
+    @property
+    def programs(self) -> list:
+        """The index, one dictionary per row (loaded on first use)"""
+        if self._programs is None:
+            with (self.directory / INDEX_FILE).open() as f:
+                self._programs = [json.loads(line) for line in f]
+        return self._programs
+
+    def query(self, task: Tasks, chunk_size: int = 2 ** 18):
+        """Find the programs that solve a task
+
+        Args:
+            task: the task
+            chunk_size: the number of rows compared at once
+
+        Returns:
+            Tuple with the row numbers that match the training samples and a boolean array whether each of these rows
+            generalizes
+        """
+        return self.query_all([task], chunk_size)[task]
+
+    def query_all(self, tasks=None, chunk_size: int = 2 ** 18) -> dict:
+        """Find the programs that solve each task in a single pass over the weights, see `query`
+
+        Args:
+            tasks: the tasks (default: all tasks)
+            chunk_size: the number of rows compared at once
+
+        Returns:
+            Dictionary with the result of `query` for each task
+        """
+        if tasks is None:
+            tasks = list(Tasks)
+        evaluators = {task: Task(task=task) for task in tasks}
+        rows = {task: [np.zeros(0, dtype=np.int64)] for task in tasks}
+        generalizes = {task: [np.zeros(0, dtype=bool)] for task in tasks}
+
+        for start in range(0, self.n_rows, chunk_size):
+            weights = np.asarray(self.weights[start : start + chunk_size])
+            for task, evaluator in evaluators.items():
+                matches = np.flatnonzero(evaluator.eval_programs_samples(weights))
+                rows[task].append(matches + start)
+                generalizes[task].append(evaluator.eval_programs(weights[matches]))
+
+        return {
+            task: (np.concatenate(rows[task]), np.concatenate(generalizes[task]))
+            for task in tasks
+        }
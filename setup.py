@@ -1,19 +1,44 @@
-from distutils.core import setup
-from distutils.extension import Extension
-
-from Cython.Build import cythonize
-from Cython.Distutils import build_ext
+from setuptools import setup
+from setuptools.extension import Extension
 
+# Install the console scripts using
+# pip install .
+#
 # Compile using
 # python setup.py build_ext --inplace
+try:
+    from Cython.Build import cythonize
+    from Cython.Distutils import build_ext
+except ImportError:
+    cythonize = None
 
-ext_modules = [
-    Extension("*", ["implementation/*.py"]),
-    Extension("*", ["implementation/console/*.py"]),
-]
+if cythonize is None:
+    extension_options = {}
+else:
+    ext_modules = [
+        Extension("*", ["implementation/*.py"]),
+        Extension("*", ["implementation/console/*.py"]),
+    ]
+    extension_options = dict(
+        cmdclass={"build_ext": build_ext},
+        ext_modules=cythonize(
+            ext_modules, compiler_directives={"language_level": "3"}
+        ),
+    )
 
 setup(
     name="Levin Program Search Implementation",
-    cmdclass={"build_ext": build_ext},
-    ext_modules=cythonize(ext_modules, compiler_directives={"language_level": "3"}),
+    packages=["implementation", "implementation.console", "implementation.convert"],
+    package_data={"implementation.convert": ["*.jinja"]},
+    install_requires=["attrs", "tqdm", "numpy", "jinja2"],
+    entry_points={
+        "console_scripts": [
+            "levin-search=implementation.console.cli:levin_search",
+            "levin-run=implementation.console.cli:run_program",
+            "levin-convert=implementation.console.cli:program_convert",
+            "levin-query=implementation.console.cli:query_weights",
+            "levin-service=implementation.console.cli:search_service",
+        ]
+    },
+    **extension_options,
 )
@@ -0,0 +1,85 @@
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+CONSOLE_DIR = Path(__file__).absolute().parent.parent / "implementation" / "console"
+COMMANDS = [
+    "levin_search",
+    "run_program",
+    "program_convert",
+    "query_weights",
+    "search_service",
+]
+HEAVY_MODULES = ["numpy", "attr", "tqdm", "jinja2"]
+# Valid arguments of the commands, parsed without running them
+COMMAND_ARGS = {
+    "levin_search": ["COUNT", "5", "count5", "--search_log", "count5.csv"],
+    "run_program": ["string", "1,0,2,0", "run.jsonl"],
+    "program_convert": ["run.jsonl", "animation", "run.gif"],
+    "query_weights": ["weights", "COUNT", "EVEN"],
+    "search_service": ["service.sock", "serve"],
+}
+
+# Seconds, for `--version` (best of three runs)
+STARTUP_TARGET = 0.5
+
+
+def run(code: str, cwd) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_cli_defers_heavy_imports(command, tmp_path):
+    # Works from any working directory, parsing the arguments loads none of the heavy dependencies
+    result = run(
+        f"import sys; sys.path.insert(0, {str(CONSOLE_DIR)!r}); "
+        f"import {command}; "
+        f"{command}.parse_args({COMMAND_ARGS[command]!r}); "
+        f"print(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules))",
+        tmp_path,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.mark.parametrize("command", COMMANDS)
+def test_cli_startup_time(command, tmp_path):
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(CONSOLE_DIR / f"{command}.py"), "--version"],
+            cwd=tmp_path,
+            capture_output=True,
+            check=True,
+        )
+        timings.append(time.perf_counter() - start)
+
+    assert min(timings) < STARTUP_TARGET
+
+
+def test_cli_checkpoint(tmp_path):
+    def levin_search(*args):
+        subprocess.run(
+            [sys.executable, str(CONSOLE_DIR / "levin_search.py"), "COUNT", *args],
+            cwd=tmp_path,
+            capture_output=True,
+            check=True,
+        )
+
+    # Only saved on request
+    levin_search("3", "count3")
+    assert not (tmp_path / "count3" / "checkpoint.json").exists()
+
+    levin_search("3", "count3_checkpoint", "--checkpoint")
+    assert (tmp_path / "count3_checkpoint" / "checkpoint.json").exists()
+    levin_search("4", "count4", "--from", "count3_checkpoint")
+    assert list((tmp_path / "count4").glob("phase4_*.json"))
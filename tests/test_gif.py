@@ -0,0 +1,93 @@
+import io
+
+import numpy as np
+
+from convert.gif import GifWriter, lzw_encode
+from convert.rasterize_machine_states import (
+    LABEL_HEIGHT,
+    WHITE,
+    Layout,
+    render_state,
+    text_width,
+)
+
+
+def lzw_decode(data: bytes, min_code_size: int):
+    clear_code = 1 << min_code_size
+    end_code = clear_code + 1
+    bits = int.from_bytes(data, "little")
+    position = 0
+    code_size = min_code_size + 1
+    table = None
+    previous = None
+    out = []
+    while True:
+        code = (bits >> position) & ((1 << code_size) - 1)
+        position += code_size
+        if code == clear_code:
+            table = [[i] for i in range(clear_code)] + [None, None]
+            code_size = min_code_size + 1
+            previous = None
+            continue
+        if code == end_code:
+            return out
+
+        if code < len(table):
+            entry = table[code]
+        else:
+            entry = previous + [previous[0]]
+        if previous is not None and len(table) < 4096:
+            table.append(previous + [entry[0]])
+            if len(table) == (1 << code_size) and code_size < 12:
+                code_size += 1
+        out.extend(entry)
+        previous = entry
+
+
+def test_lzw_roundtrip():
+    rng = np.random.RandomState(0)
+    for pixels in [
+        [0],
+        [1, 1, 1, 1, 1, 1, 1, 1],
+        rng.randint(0, 5, 20000).tolist(),
+        ([0] * 500 + [3] * 7) * 40,
+    ]:
+        assert lzw_decode(lzw_encode(bytes(pixels), 3), 3) == pixels
+
+
+def test_gif_writer():
+    f = io.BytesIO()
+    gif = GifWriter(f, 4, 3, [(255, 255, 255), (0, 0, 0)])
+    gif.add_frame(np.zeros((3, 4), dtype=np.uint8))
+    gif.add_frame(np.ones((3, 4), dtype=np.uint8))
+    gif.close()
+
+    data = f.getvalue()
+    assert data.startswith(b"GIF89a")
+    assert data.endswith(b"\x3b")
+    assert data.count(b"\x21\xf9") == 2
+
+
+def test_render_state_short_tape():
+    # The instruction pointer label stays left of the time step on a short program tape
+    layout = Layout(0, 4, 10, 1, 1000)
+    label_width = text_width("Instruction Pointer") + 6
+    for instruction_pointer in range(5):
+        program = {
+            "state": {
+                "instruction_pointer": instruction_pointer,
+                "weight_pointer": 0,
+                "current_runtime": 1000,
+            },
+            "storage": {
+                "work_tape": [],
+                "program_tape": [1, 0, 2, 0],
+                "weights": [0] * 10,
+            },
+        }
+        image = render_state(program, layout)
+
+        rows = slice(layout.ip_label_y, layout.ip_label_y + LABEL_HEIGHT)
+        assert (image[rows, layout.label_x - 10 : layout.label_x] == WHITE).all()
+        # The border of the label is somewhere left of the gap
+        assert (image[rows, : layout.label_x - 10] != WHITE).sum() > label_width
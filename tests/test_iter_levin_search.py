@@ -0,0 +1,33 @@
+from initial_primitives import InitialPrimitives
+from levin_search import iter_levin_search, main_levin_search
+from search_events import ProgressEvent, SolutionEvent
+from task import Tasks
+
+
+def test_iter_levin_search():
+    expected = main_levin_search(Tasks.COUNT, InitialPrimitives(), 1, 1000, 5)
+
+    search = iter_levin_search(
+        Tasks.COUNT, InitialPrimitives(), 1, 1000, 5, progress_interval=50
+    )
+    events = list(search)
+
+    solutions = [e.solution.program for e in events if isinstance(e, SolutionEvent)]
+    assert solutions == [s.program for s in expected.solutions]
+
+    progress = [e for e in events if isinstance(e, ProgressEvent)]
+    assert [e.phase for e in progress if e.phase_finished] == [1, 2, 3, 4, 5]
+    assert any(not e.phase_finished and e.n_runs % 50 == 0 for e in progress)
+    assert progress[-1].n_runs == expected.n_runs
+
+    assert search.search_state.space_size == expected.space_size
+    assert search.search_state.solutions == expected.solutions
+
+
+def test_iter_levin_search_close():
+    search = iter_levin_search(Tasks.COUNT, InitialPrimitives(), 1, 1000, 5)
+    event = next(e for e in search if isinstance(e, SolutionEvent))
+    search.close()
+
+    assert search.search_state.phase == event.solution.phase
+    assert list(search) == []
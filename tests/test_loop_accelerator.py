@@ -0,0 +1,73 @@
+import random
+
+from halt import HaltingCode
+from initial_primitives import InitialPrimitives
+from levin_search import run_program
+from loop_accelerator import LoopAccelerator
+from program import Program
+from universal_machine import UniversalMachine
+
+
+def final_state(state):
+    return (
+        state.halt,
+        state.current_runtime,
+        state.min,
+        state.weight_pointer,
+        state.instruction_pointer,
+        list(state.work_tape),
+        state.weights.tolist(),
+    )
+
+
+def test_loop_accelerator_count():
+    primitives = InitialPrimitives()
+    accelerator = LoopAccelerator(primitives)
+    interpreter = UniversalMachine(primitives)
+    accelerated = UniversalMachine(primitives, accelerator=accelerator)
+    base_program = Program(program_tape_size=100, work_tape_size=6, n_weights=100)
+
+    # ALLOCATE 1, OUTPUT -1, INCREMENT -1, JUMP 2
+    program = [7, 1, 1, -1, 8, -1, 2, 2]
+    expected = run_program(program, 1000, interpreter, base_program)
+    actual = run_program(program, 1000, accelerated, base_program)
+
+    assert actual.halt == HaltingCode.ERROR_WEIGHT_POINTER_OUT_BOUNDS
+    assert actual.weights.tolist() == list(range(100))
+    assert final_state(actual) == final_state(expected)
+    assert accelerator.n_steps > 250
+
+
+def test_loop_accelerator_random_programs():
+    primitives = InitialPrimitives()
+    interpreter = UniversalMachine(primitives)
+    accelerator = LoopAccelerator(primitives)
+    accelerated = UniversalMachine(primitives, accelerator=accelerator)
+
+    rng = random.Random(0)
+    for maxint in [20, 10000]:
+        base_program = Program(
+            program_tape_size=100, work_tape_size=6, n_weights=50, maxint=maxint
+        )
+        for _ in range(1000):
+            # Mostly loop instructions on the first cells
+            program = []
+            length = rng.randint(2, 14)
+            while len(program) < length:
+                op = rng.choice([7, 8, 9, 1, 0, 2, rng.randint(0, 12)])
+                program.append(op)
+                program.extend(
+                    (
+                        rng.randint(-3, -1)
+                        if rng.random() < 0.7
+                        else rng.randint(0, length)
+                    )
+                    for _ in range(primitives.op_args[op])
+                )
+            time_limit = rng.choice([50, 1000])
+
+            expected = run_program(program, time_limit, interpreter, base_program)
+            actual = run_program(program, time_limit, accelerated, base_program)
+            assert final_state(actual) == final_state(expected), program
+
+    assert accelerator.n_loops > 0
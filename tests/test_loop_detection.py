@@ -0,0 +1,94 @@
+import json
+import random
+
+from console.levin_search import main
+from halt import HaltingCode
+from initial_primitives import InitialPrimitives
+from levin_search import main_levin_search, run_program
+from program import Program
+from task import Tasks
+from universal_machine import UniversalMachine
+
+
+def test_loop_detection():
+    primitives = InitialPrimitives()
+    interpreter = UniversalMachine(primitives)
+    detecting = UniversalMachine(primitives, loop_detection=True)
+    base_program = Program(program_tape_size=100, work_tape_size=6, n_weights=10)
+
+    # JUMP 0
+    state = run_program([2, 0], 1000, detecting, base_program)
+    assert state.halt == HaltingCode.ERROR_INFINITE_LOOP
+    assert state.current_runtime == 1000
+    assert state.n_skipped_steps > 990
+
+    rng = random.Random(0)
+    n_loops = 0
+    for _ in range(2000):
+        program = [
+            rng.randint(0, 12) if rng.random() < 0.8 else rng.randint(-8, 25)
+            for _ in range(rng.randint(1, 16))
+        ]
+        time_limit = rng.choice([10, 100, 1000])
+        expected = run_program(program, time_limit, interpreter, base_program)
+        actual = run_program(program, time_limit, detecting, base_program)
+
+        if actual.halt == HaltingCode.ERROR_INFINITE_LOOP:
+            # A loop runs until the time limit, with the same weights
+            n_loops += 1
+            assert expected.halt == HaltingCode.ERROR_CURRENT_TIME_LIMIT
+            assert actual.current_runtime == expected.current_runtime
+        else:
+            assert (actual.halt, actual.current_runtime) == (
+                expected.halt,
+                expected.current_runtime,
+            )
+        assert actual.weights.tolist() == expected.weights.tolist()
+        assert actual.work_tape == expected.work_tape
+
+    assert n_loops > 0
+
+
+def test_loop_detection_steps(tmp_path):
+    def search(**kwargs):
+        search_state = main_levin_search(
+            Tasks.COUNT, InitialPrimitives(), 1, 1000, 5, **kwargs
+        )
+        if search_state.outcome_cache is not None:
+            search_state.outcome_cache.close()
+        return search_state
+
+    expected = search()
+    detecting = search(loop_detection=True)
+    assert detecting.n_loops > 0
+    assert detecting.n_steps < expected.n_steps
+
+    # The cache restores the executed steps of a loop
+    for _ in range(2):
+        cached = search(loop_detection=True, outcome_cache=tmp_path / "outcomes.sqlite")
+        assert cached.n_steps == detecting.n_steps
+
+
+def test_loop_detection_console(tmp_path):
+    # The runtime of a detected loop is a Python int, the search log, checkpoint and timeline are JSON
+    main(
+        [
+            "COUNT",
+            "6",
+            str(tmp_path / "count6"),
+            "--work_tape_size",
+            "5",
+            "--detect_loops",
+            "--search_log",
+            str(tmp_path / "count6.csv"),
+            "--checkpoint",
+            "--timeline",
+            str(tmp_path / "count6.jsonl"),
+        ]
+    )
+
+    summary = json.loads((tmp_path / "count6.json").read_text())
+    assert summary["n_loops"] > 0
+    assert (tmp_path / "count6" / "checkpoint.json").exists()
+    assert list((tmp_path / "count6").glob("phase6_*.json"))
+    assert (tmp_path / "count6.jsonl").read_text()
@@ -0,0 +1,55 @@
+import tracemalloc
+
+from initial_primitives import InitialPrimitives
+from levin_search import iter_levin_search, main_levin_search
+from program_memory import SpillingProgramMemory
+from search_events import MemoryEvent
+from task import Tasks
+
+
+def search(**kwargs):
+    search = iter_levin_search(
+        Tasks.COUNT, InitialPrimitives(), 1, 1000, 6, compile_programs=True, **kwargs
+    )
+    reports = [e.report for e in search if isinstance(e, MemoryEvent)]
+    return search.search_state, reports
+
+
+def test_memory_reports():
+    search_state, reports = search(memory_interval=100)
+
+    # Every 100 runs and at the end of every phase
+    assert len(reports) == search_state.n_runs // 100 + 6
+    assert all(not report.shed for report in reports)
+    assert reports[-1].n_runs == search_state.n_runs
+    assert reports[-1].memory == search_state.memory.n_bytes
+    assert reports[-1].solutions > 0
+    assert reports[-1].caches > 0
+    assert search_state.memory_monitor.peak >= reports[-1].used > 0
+
+
+def test_memory_limit(tmp_path):
+    expected = main_levin_search(
+        Tasks.COUNT, InitialPrimitives(), 1, 1000, 6, compile_programs=True
+    )
+    # Not monitored without a memory option
+    assert expected.memory_monitor is None
+    search_state, reports = search(memory_limit=1, memory_dir=tmp_path)
+
+    # The caches are dropped at every check, the halted programs spill from the second
+    assert reports[0].shed == ("outputs", "compiler")
+    assert "memory" in reports[1].shed
+    assert isinstance(search_state.memory, SpillingProgramMemory)
+    assert search_state.memory.n_spilled > 0
+
+    assert search_state.solutions == expected.solutions
+    assert search_state.n_steps == expected.n_steps
+    assert len(search_state.memory) == len(expected.memory)
+    assert search_state.outputs.n_distinct == expected.outputs.n_distinct
+    search_state.memory.close()
+
+
+def test_trace_memory():
+    _, reports = search(trace_memory=True)
+    assert all(0 < report.used for report in reports)
+    assert not tracemalloc.is_tracing()
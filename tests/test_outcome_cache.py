@@ -0,0 +1,82 @@
+import attr
+import numpy as np
+
+from halt import HaltingCode
+from initial_primitives import InitialPrimitives
+from levin_search import main_levin_search, run_program
+from outcome_cache import OutcomeCache
+from program import Program
+from task import Tasks
+from universal_machine import UniversalMachine
+
+
+def test_outcome_cache_time_limits(tmp_path):
+    cache = OutcomeCache(tmp_path / "outcomes.sqlite", "config")
+    weights = np.arange(4, dtype=np.int16)
+    cache.put([1, 0], 64, HaltingCode.STOP, 10, weights)
+    cache.put([2, 0], 64, HaltingCode.ERROR_CURRENT_TIME_LIMIT, 64, weights)
+    cache.put([3, 0], 64, HaltingCode.CONTINUE, 5, weights)
+
+    # Halted programs halt identically for any time limit above their runtime
+    halt, runtime, cached_weights = cache.get([1, 0], 1024)
+    assert (halt, runtime) == (HaltingCode.STOP, 10)
+    assert (cached_weights == weights).all()
+    assert cache.get([1, 0], 9) is None
+
+    # Reaching the time limit is only known for that time limit
+    assert cache.get([2, 0], 64)[:2] == (HaltingCode.ERROR_CURRENT_TIME_LIMIT, 64)
+    assert cache.get([2, 0], 128) is None
+
+    assert cache.get([3, 0], 64) is None
+    cache.close()
+
+    # Other machine configurations do not share outcomes
+    cache = OutcomeCache(tmp_path / "outcomes.sqlite", "other config")
+    assert cache.get([1, 0], 1024) is None
+    cache.close()
+
+
+def test_outcome_cache_runtime_limit(tmp_path):
+    # JUMP 1 halts with an invalid instruction pointer before its first step is counted
+    universal_machine = UniversalMachine(InitialPrimitives())
+    base_program = Program(program_tape_size=100, work_tape_size=6, n_weights=10)
+    halted = run_program([2, 1], 64, universal_machine, base_program)
+    timed_out = run_program([2, 1], 1, universal_machine, base_program)
+    assert (halted.current_runtime, timed_out.halt) == (
+        1,
+        HaltingCode.ERROR_CURRENT_TIME_LIMIT,
+    )
+
+    cache = OutcomeCache(tmp_path / "outcomes.sqlite", "config")
+    cache.put([2, 1], 64, halted.halt, halted.current_runtime, halted.weights)
+    assert cache.get([2, 1], 1) is None
+    assert cache.get([2, 1], 2)[0] == halted.halt
+
+    # The outcome at exactly the time limit wins
+    cache.put([2, 1], 1, timed_out.halt, 1, timed_out.weights)
+    assert cache.get([2, 1], 1)[0] == HaltingCode.ERROR_CURRENT_TIME_LIMIT
+    cache.close()
+
+
+def test_outcome_cache_search(tmp_path):
+    def search(outcome_cache=None):
+        search_state = main_levin_search(
+            Tasks.COUNT, InitialPrimitives(), 1, 1000, 4, outcome_cache=outcome_cache
+        )
+        if search_state.outcome_cache is not None:
+            search_state.outcome_cache.close()
+        return search_state
+
+    expected = search()
+    cold = search(tmp_path / "outcomes.sqlite")
+    warm = search(tmp_path / "outcomes.sqlite")
+
+    assert cold.outcome_cache.n_hits == 0
+    assert warm.outcome_cache.n_hits == expected.n_runs
+    for search_state in [cold, warm]:
+        assert search_state.n_runs == expected.n_runs
+        assert search_state.n_steps == expected.n_steps
+        assert search_state.space_size == expected.space_size
+        assert [attr.asdict(s) for s in search_state.solutions] == [
+            attr.asdict(s) for s in expected.solutions
+        ]
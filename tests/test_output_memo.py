@@ -0,0 +1,25 @@
+import numpy as np
+
+from output_memo import OutputMemo
+from task import Task, Tasks
+
+
+def test_output_memo():
+    memo = OutputMemo(max_size=2)
+    count = Task(task=Tasks.COUNT)
+    zeros = np.zeros(100, dtype=np.int16)
+
+    assert memo.evaluate(count, zeros) == (False, False)
+    assert memo.evaluate(count, count.solution.copy()) == (True, True)
+    assert memo.evaluate(count, zeros) == (False, False)
+    assert (memo.n_hits, memo.n_misses) == (1, 2)
+
+    # Verdicts are per task
+    assert memo.evaluate(Task(task=Tasks.NEGATIVE_ONE), zeros) == (False, False)
+    assert memo.n_misses == 3
+
+    # The least recently used verdict was evicted, the counts are kept
+    memo.evaluate(count, count.solution.copy())
+    assert memo.n_misses == 4
+    assert memo.n_outputs == 5
+    assert memo.n_distinct == 2
@@ -0,0 +1,35 @@
+from initial_primitives import InitialPrimitives
+from levin_search import estimate_levin_search, iter_levin_search
+from search_events import ProgressEvent
+from task import Tasks
+
+
+def phase_sizes(**kwargs):
+    sizes = []
+    n_runs = n_steps = 0
+    for event in iter_levin_search(
+        Tasks.COUNT, InitialPrimitives(), 1, 1000, 5, **kwargs
+    ):
+        if isinstance(event, ProgressEvent) and event.phase_finished:
+            sizes.append((event.n_runs - n_runs, event.n_steps - n_steps))
+            n_runs, n_steps = event.n_runs, event.n_steps
+    return sizes
+
+
+def test_estimate_levin_search():
+    for symmetry_reduction in [False, True]:
+        sizes = phase_sizes(symmetry_reduction=symmetry_reduction)
+        estimates = estimate_levin_search(
+            InitialPrimitives(),
+            1,
+            1000,
+            5,
+            symmetry_reduction=symmetry_reduction,
+            n_samples=400,
+        )
+
+        assert [e.phase for e in estimates] == [1, 2, 3, 4, 5]
+        assert estimates[0].n_runs == sizes[0][0]
+        for (n_runs, n_steps), estimate in zip(sizes, estimates):
+            assert abs(estimate.n_runs - n_runs) <= 4 * estimate.n_runs_error + 0.5
+            assert abs(estimate.n_steps - n_steps) <= 4 * estimate.n_steps_error + 0.5
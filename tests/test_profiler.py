@@ -0,0 +1,36 @@
+import pstats
+
+from initial_primitives import InitialPrimitives
+from levin_search import main_levin_search
+from profiler import Profiler
+from task import Tasks
+
+
+def test_profiler(tmp_path):
+    def phase_finished(event):
+        if event.phase < 4:
+            profiler.next_section(f"phase{event.phase + 1}")
+
+    with Profiler(tmp_path, "phase1", sample_interval=0.001) as profiler:
+        main_levin_search(
+            Tasks.COUNT,
+            InitialPrimitives(),
+            1,
+            1000,
+            4,
+            on_phase_finished=phase_finished,
+        )
+
+    assert profiler.sections == ["phase1", "phase2", "phase3", "phase4"]
+    for section in profiler.sections:
+        pstats.Stats(str(tmp_path / f"{section}.pstats"))
+
+    with (tmp_path / "stacks.folded").open() as f:
+        stacks = [line.rsplit(" ", 1) for line in f]
+    assert stacks
+    assert all(stack.split(";")[0] in profiler.sections for stack, _ in stacks)
+    assert sum(int(count) for _, count in stacks) == sum(profiler.stacks.values())
+
+    summary = (tmp_path / "summary.txt").read_text()
+    assert "universal_machine.py" in summary
+    assert "profiling overhead" in summary
@@ -0,0 +1,44 @@
+import io
+
+from initial_primitives import InitialPrimitives
+from program_batch import read_programs, run_batch
+from program_trace import read_trace
+from task import Tasks
+
+
+def test_read_programs():
+    lines = io.StringIO('1,0,2,0\n[1, 1, 2, 0]\n\n{"program": [0, 0], "phase": 2}\n')
+    assert list(read_programs(lines)) == [[1, 0, 2, 0], [1, 1, 2, 0], [0, 0]]
+
+    rows = io.StringIO('1,0,2,0\n"1", 1,2,0\n')
+    assert list(read_programs(rows, csv_format=True)) == [[1, 0, 2, 0], [1, 1, 2, 0]]
+
+
+def test_run_batch(tmp_path):
+    programs = [[1, 0, 2, 0], [0, 0], [1, 1, 2, 0]] * 3
+
+    def run(n_workers, trace_dir=None):
+        return list(
+            run_batch(
+                programs,
+                InitialPrimitives(),
+                n_weights=100,
+                tasks=[Tasks.COUNT],
+                trace_dir=trace_dir,
+                n_workers=n_workers,
+                chunk_size=2,
+            )
+        )
+
+    results = run(n_workers=2, trace_dir=tmp_path)
+    assert results == run(n_workers=1, trace_dir=tmp_path)
+    assert [r["index"] for r in results] == list(range(len(programs)))
+    assert [r["tasks"]["COUNT"]["generalizes"] for r in results] == [
+        True,
+        False,
+        True,
+    ] * 3
+    assert results[0]["weights_digest"] == results[2]["weights_digest"]
+
+    states = list(read_trace(results[0]["trace"]))
+    assert states[-1]["state"]["current_runtime"] == results[0]["current_runtime"]
@@ -0,0 +1,84 @@
+import random
+
+import pytest
+
+from initial_primitives import InitialPrimitives
+from levin_search import main_levin_search, run_program
+from program import Program
+from program_compiler import ProgramCompiler
+from task import Tasks
+from universal_machine import UniversalMachine
+
+
+def final_state(state):
+    return (
+        state.halt,
+        state.current_runtime,
+        state.min,
+        state.weight_pointer,
+        state.instruction_pointer,
+        list(state.work_tape),
+        state.weights.tolist(),
+    )
+
+
+def test_program_compiler_random_programs():
+    primitives = InitialPrimitives()
+    interpreter = UniversalMachine(primitives)
+    base_program = Program(program_tape_size=100, work_tape_size=6, n_weights=10)
+
+    rng = random.Random(0)
+    for warmup in [1, 2]:
+        compiler = ProgramCompiler(primitives, warmup=warmup)
+        compiled = UniversalMachine(primitives, compiler)
+        for _ in range(2000):
+            program = [
+                rng.randint(0, 12) if rng.random() < 0.8 else rng.randint(-8, 25)
+                for _ in range(rng.randint(1, 20))
+            ]
+            time_limit = rng.choice([1, 2, 3, 10, 100, 1000])
+            expected = run_program(program, time_limit, interpreter, base_program)
+            actual = run_program(program, time_limit, compiled, base_program)
+            assert final_state(actual) == final_state(expected), program
+
+        assert compiler.n_compiled > 0
+
+    with pytest.raises(ValueError):
+        ProgramCompiler(primitives, warmup=0)
+
+
+def test_program_compiler_bases():
+    # One compiler for several machine configurations
+    primitives = InitialPrimitives()
+    interpreter = UniversalMachine(primitives)
+    compiled = UniversalMachine(primitives, ProgramCompiler(primitives, warmup=1))
+    base_programs = [
+        Program(program_tape_size=100, work_tape_size=w, n_weights=n, maxint=m)
+        for w, n, m in [(3, 10, 10000), (1, 10, 10000), (3, 4, 10000), (3, 10, 5)]
+    ]
+
+    rng = random.Random(1)
+    programs = [[7, 1, 2, 0]] + [
+        [rng.randint(0, 12) for _ in range(rng.randint(1, 12))] for _ in range(300)
+    ]
+    for program in programs:
+        for base_program in base_programs:
+            expected = run_program(program, 1000, interpreter, base_program)
+            actual = run_program(program, 1000, compiled, base_program)
+            assert final_state(actual) == final_state(expected), program
+
+
+def test_program_compiler_search():
+    expected = main_levin_search(Tasks.COUNT, InitialPrimitives(), 1, 1000, 5)
+    actual = main_levin_search(
+        Tasks.COUNT, InitialPrimitives(), 1, 1000, 5, compile_programs=True
+    )
+
+    assert (actual.n_runs, actual.n_steps, actual.space_size) == (
+        expected.n_runs,
+        expected.n_steps,
+        expected.space_size,
+    )
+    assert [s.program for s in actual.solutions] == [
+        s.program for s in expected.solutions
+    ]
@@ -0,0 +1,60 @@
+from program_memory import BloomFilter, ProgramMemory, SpillingProgramMemory
+
+
+def test_program_memory():
+    memory = ProgramMemory()
+    memory.add([1, 0, 2, 0])
+    assert [1, 0, 2, 0] in memory
+    assert [1, 0, 2, 1] not in memory
+    assert len(memory) == 1
+
+
+def test_bloom_filter_no_false_negatives():
+    bloom = BloomFilter(100)
+    keys = [bytes([i, i + 1]) for i in range(100)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+
+
+def test_spilling_program_memory(tmp_path):
+    memory = SpillingProgramMemory(budget=1000, directory=tmp_path)
+    programs = [[i, -1, i % 3] for i in range(200)]
+    for program in programs:
+        memory.add(program)
+
+    assert memory.n_spilled > 0
+    assert memory.n_hot < len(programs)
+    assert len(memory) == len(programs)
+    assert all(program in memory for program in programs)
+    assert [500, -1, 0] not in memory
+
+    # Adding a spilled program again does not duplicate it
+    memory.add(programs[0])
+    assert len(memory) == len(programs)
+    memory.close()
+
+
+def test_spilling_program_memory_false_positives():
+    # A saturated Bloom filter answers positive for everything, the disk confirms exactly
+    memory = SpillingProgramMemory(budget=0, bloom_capacity=1, bloom_error_rate=0.5)
+    for i in range(50):
+        memory.add([i])
+    assert all([i] in memory for i in range(50))
+    assert not any([i] in memory for i in range(50, 100))
+    memory.close()
+
+
+def test_spilling_program_memory_set_budget(tmp_path):
+    memory = SpillingProgramMemory(budget=10**6, directory=tmp_path)
+    programs = [[i, -1, i % 3] for i in range(200)]
+    for program in programs:
+        memory.add(program)
+    assert memory.n_spilled == 0
+
+    n_bytes = memory.n_bytes
+    memory.set_budget(1000)
+    assert memory.n_spilled > 0
+    assert memory.n_bytes < n_bytes
+    assert len(memory) == len(programs)
+    assert all(program in memory for program in programs)
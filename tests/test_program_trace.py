@@ -0,0 +1,108 @@
+import itertools
+import json
+from pathlib import Path
+
+import pytest
+
+from initial_primitives import InitialPrimitives
+from levin_search import main_run_program
+from program_trace import (
+    BinaryTraceWriter,
+    JsonlTraceWriter,
+    TraceReader,
+    index_path,
+    read_trace,
+)
+from program import Program
+from universal_machine import UniversalMachine
+
+
+def run(log_file, program=(7, 2, 8, -1, 8, -2, 9, -1, 1, -2, 0, -1, -2, 4, 12, 5)):
+    return main_run_program(
+        InitialPrimitives(), list(program), 100, 10, 100, log_file, current_runtime=3000
+    )
+
+
+def test_binary_trace_equals_jsonl(tmp_path):
+    run(tmp_path / "run.jsonl")
+    run(tmp_path / "run.trace")
+
+    with (tmp_path / "run.jsonl").open() as f:
+        expected = [json.loads(line) for line in f]
+
+    assert list(read_trace(tmp_path / "run.trace")) == expected
+    assert list(read_trace(tmp_path / "run.jsonl")) == expected
+    assert (tmp_path / "run.trace").stat().st_size < (
+        tmp_path / "run.jsonl"
+    ).stat().st_size
+
+
+def test_binary_trace_work_tape_shrinks(tmp_path):
+    states = [
+        Program(program_tape=[1, 2], work_tape=[3, 4, 5], min=-3, n_weights=4),
+        Program(program_tape=[1, 2], work_tape=[3], min=-1, n_weights=4),
+        Program(program_tape=[1, 2], work_tape=[3, 0], min=-2, n_weights=4),
+    ]
+    with BinaryTraceWriter(tmp_path / "run.trace", keyframe_interval=8) as trace:
+        for state in states:
+            trace.write(state)
+
+    assert list(read_trace(tmp_path / "run.trace")) == [
+        json.loads(state.to_json()) for state in states
+    ]
+
+
+@pytest.mark.parametrize(
+    "file_name,writer",
+    [
+        ("run.jsonl", lambda p: JsonlTraceWriter(p, index_interval=16)),
+        ("run.trace", lambda p: BinaryTraceWriter(p, keyframe_interval=16)),
+    ],
+)
+def test_trace_reader(tmp_path, file_name, writer):
+    path = tmp_path / file_name
+    state = Program(
+        program_tape=[7, 2, 8, -1, 8, -2, 9, -1, 1, -2, 0, -1, -2, 4, 12, 5],
+        work_tape_size=10,
+        n_weights=100,
+    )
+    with writer(path) as trace:
+        UniversalMachine(InitialPrimitives())._run(state, 3000, trace)
+
+    expected = list(read_trace(path))
+    n = len(expected)
+
+    reader = TraceReader(path)
+    assert len(reader) == n
+    assert reader[33] == expected[33]
+    assert reader[-1] == expected[-1]
+    assert list(reader.keyframes()) == expected[::16]
+    for start, stop, stride in itertools.product(
+        [0, 15, 16, 17, n - 1], [None, 33, n], [1, 7, 16, 50]
+    ):
+        assert list(reader.read(start, stop, stride)) == expected[start:stop:stride]
+    assert list(read_trace(path, 3, 300, 33)) == expected[3:300:33]
+
+    # Traces without index (or with an outdated index) are indexed on first use
+    index_path(path).unlink()
+    assert list(read_trace(path, 5, None, 20)) == expected[5::20]
+    assert index_path(path).exists()
+
+
+def test_jsonl_trace_windows_newlines(tmp_path, monkeypatch):
+    # Text files translate the newlines as on Windows, the offsets of the index stay exact
+    open_ = Path.open
+
+    def open_windows(self, mode="r", *args, **kwargs):
+        if "b" not in mode:
+            kwargs.setdefault("newline", "\r\n")
+        return open_(self, mode, *args, **kwargs)
+
+    monkeypatch.setattr(Path, "open", open_windows)
+    path = tmp_path / "run.jsonl"
+    state = Program(program_tape=[1, 0, 2, 0], work_tape_size=10, n_weights=10)
+    with JsonlTraceWriter(path, index_interval=4) as trace:
+        UniversalMachine(InitialPrimitives())._run(state, 100, trace)
+
+    expected = [json.loads(line) for line in path.read_bytes().splitlines()]
+    assert list(TraceReader(path).read(5, None, 4)) == expected[5::4]
@@ -0,0 +1,60 @@
+import pytest
+
+from initial_primitives import InitialPrimitives
+from levin_search import main_levin_search
+from task import Tasks
+
+COUNTERS = ["n_runs", "n_steps", "space_size", "phase", "n_no_ops"]
+
+
+def test_resume_from_checkpoint(tmp_path):
+    expected = main_levin_search(
+        Tasks.COUNT,
+        InitialPrimitives(),
+        1,
+        1000,
+        6,
+        search_log_file=tmp_path / "expected.csv",
+        symmetry_reduction=True,
+    )
+
+    main_levin_search(
+        Tasks.COUNT,
+        InitialPrimitives(),
+        1,
+        1000,
+        4,
+        search_log_file=tmp_path / "checkpoint.csv",
+        symmetry_reduction=True,
+        checkpoint_dir=tmp_path / "checkpoint",
+    )
+    search_state = main_levin_search(
+        Tasks.COUNT,
+        InitialPrimitives(),
+        1,
+        1000,
+        6,
+        search_log_file=tmp_path / "resumed.csv",
+        memory_budget=2000,
+        symmetry_reduction=True,
+        resume_from=tmp_path / "checkpoint",
+    )
+
+    for counter in COUNTERS:
+        assert getattr(search_state, counter) == getattr(expected, counter)
+    assert search_state.solutions == expected.solutions
+    assert len(search_state.memory) == len(expected.memory)
+    assert search_state.outputs.n_distinct == expected.outputs.n_distinct
+    assert (tmp_path / "resumed.csv").read_text() == (
+        tmp_path / "expected.csv"
+    ).read_text()
+
+    with pytest.raises(ValueError):
+        main_levin_search(
+            Tasks.COUNT,
+            InitialPrimitives(),
+            1,
+            1000,
+            6,
+            resume_from=tmp_path / "checkpoint",
+        )
@@ -0,0 +1,130 @@
+import threading
+
+import numpy as np
+
+from halt import HaltingCode
+from initial_primitives import InitialPrimitives
+from levin_search import main_levin_search
+from program import Program
+from search_service import _memoize_args, _Worker, serve, submit
+from task import Tasks
+
+
+def test_search_service(tmp_path):
+    socket_path = tmp_path / "service.sock"
+    service = threading.Thread(target=serve, args=(socket_path, 1))
+    service.start()
+    try:
+        while not socket_path.exists():
+            service.join(0.05)
+
+        expected = main_levin_search(Tasks.COUNT, InitialPrimitives(), 1, 1000, 5)
+
+        job = {
+            "type": "search",
+            "task": "COUNT",
+            "search_length": 5,
+            "progress_interval": 50,
+        }
+        first = list(submit(socket_path, job))
+        assert first[0]["event"] == "queued"
+        assert first[1]["event"] == "started"
+        assert [e["phase"] for e in first if e.get("phase_finished")] == [1, 2, 3, 4, 5]
+        assert [
+            e["solution"]["program"] for e in first if e["event"] == "solution"
+        ] == [s.program for s in expected.solutions]
+
+        done = first[-1]
+        assert done["event"] == "done"
+        assert done["n_runs"] == expected.n_runs
+        assert done["space_size"] == expected.space_size
+        assert [s["space_size"] for s in done["solutions"]] == [
+            s.space_size for s in expected.solutions
+        ]
+
+        # The same worker, with the outcomes of the first search
+        second = list(submit(socket_path, job))
+        assert second[1]["worker"] == first[1]["worker"]
+        assert second[-1]["outcome_cache_hits"] == done["n_runs"]
+        assert second[-1]["outcome_cache_misses"] < done["outcome_cache_misses"]
+        assert second[-1]["solutions"] == done["solutions"]
+
+        run = list(
+            submit(
+                socket_path,
+                {
+                    "type": "run",
+                    "programs": [[1, 0, 2, 0], [0, 0]],
+                    "n_weights": 100,
+                    "tasks": ["COUNT"],
+                },
+            )
+        )
+        results = [e for e in run if e["event"] == "result"]
+        assert [r["tasks"]["COUNT"]["samples"] for r in results] == [True, False]
+        assert run[-1] == {"event": "done", "n_programs": 2, "job": run[0]["job"]}
+
+        error = list(
+            submit(socket_path, {"type": "search", "task": "COUNT", "size": 1})
+        )
+        assert error[-1]["event"] == "error"
+
+        error = list(
+            submit(socket_path, {"type": "search", "task": "X", "search_length": 1})
+        )
+        assert error[-1]["message"] == "ValueError: Unknown task 'X'"
+
+        status = list(submit(socket_path, {"type": "status"}))
+        assert status[-1]["n_workers"] == 1
+        assert status[-1]["n_running"] == 0
+    finally:
+        list(submit(socket_path, {"type": "shutdown"}))
+        service.join()
+
+
+def test_worker_bounds():
+    primitives = _memoize_args(InitialPrimitives(), max_size=2)
+    state = Program(work_tape_size=1)
+    tables = [primitives.args_generator(state, op_id) for op_id in [0, 1, 0, 2]]
+    assert tables[2] is tables[0]
+    # The table of op 1 was evicted, the table of op 0 was used more recently
+    assert primitives.args_generator(state, 0) is tables[0]
+    assert primitives.args_generator(state, 1) is not tables[1]
+
+    worker = _Worker(max_outcome_caches=1, max_cache_bytes=0)
+    options = {"program_tape_size": 1000, "work_tape_size": 1}
+    outcome_cache = worker.outcome_cache(primitives, options)
+    outcome_cache.put([1, 0], 64, HaltingCode.STOP, 10, np.zeros(4))
+    assert worker.outcome_cache(primitives, options) is outcome_cache
+
+    # Over the budget, the outcomes are dropped
+    worker.trim()
+    assert outcome_cache.get([1, 0], 64) is None
+
+    # The least recently used outcome cache is closed
+    other = worker.outcome_cache(primitives, dict(options, work_tape_size=2))
+    assert worker.outcome_cache(primitives, options) is not outcome_cache
+    assert worker.outcome_cache(primitives, options) is not other
+
+
+def test_search_service_profile(tmp_path):
+    socket_path = tmp_path / "service.sock"
+    service = threading.Thread(
+        target=serve, args=(socket_path, 1, tmp_path / "profile")
+    )
+    service.start()
+    try:
+        while not socket_path.exists():
+            service.join(0.05)
+
+        job = {"type": "search", "task": "COUNT", "search_length": 4}
+        events = list(submit(socket_path, job))
+        assert events[-1]["event"] == "done"
+
+        # Stored before the job is done
+        assert (tmp_path / "profile" / "job0" / "run.pstats").exists()
+        summary = (tmp_path / "profile" / "job0" / "summary.txt").read_text()
+        assert "universal_machine.py" in summary
+    finally:
+        list(submit(socket_path, {"type": "shutdown"}))
+        service.join()
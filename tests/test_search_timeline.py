@@ -0,0 +1,61 @@
+import json
+
+from initial_primitives import InitialPrimitives
+from levin_search import main_levin_search
+from task import Tasks
+
+
+def test_search_timeline(tmp_path):
+    expected = main_levin_search(Tasks.COUNT, InitialPrimitives(), 1, 1000, 5)
+    search_state = main_levin_search(
+        Tasks.COUNT,
+        InitialPrimitives(),
+        1,
+        1000,
+        5,
+        timeline_file=tmp_path / "timeline.jsonl",
+    )
+    assert search_state.n_runs == expected.n_runs
+    assert search_state.solutions == expected.solutions
+
+    with (tmp_path / "timeline.jsonl").open() as f:
+        spans = [json.loads(line) for line in f]
+    phases = [s for s in spans if s["category"] == "phase"]
+    assert [s["phase"] for s in phases] == [1, 2, 3, 4, 5]
+    assert sum(s["n_runs"] for s in phases) == expected.n_runs
+    assert sum(s["n_solutions"] for s in phases) == len(expected.solutions)
+    assert phases[-1]["memory_size"] == len(expected.memory)
+    for phase in phases:
+        subtrees = [
+            s
+            for s in spans
+            if s["category"] == "subtree" and s["phase"] == phase["phase"]
+        ]
+        assert sum(s["n_runs"] for s in subtrees) <= phase["n_runs"]
+        assert all(s["duration"] <= phase["duration"] for s in subtrees)
+
+    # The solutions 1,0,2,0 and 1,1,2,0 start with OUTPUT
+    solved = [
+        s["name"] for s in spans if s["category"] == "subtree" and s["n_solutions"]
+    ]
+    assert solved == ["OUTPUT 0", "OUTPUT 1"]
+
+
+def test_search_timeline_chrome_trace(tmp_path):
+    main_levin_search(
+        Tasks.COUNT,
+        InitialPrimitives(),
+        1,
+        1000,
+        4,
+        timeline_file=tmp_path / "timeline.json",
+    )
+    with (tmp_path / "timeline.json").open() as f:
+        events = json.load(f)
+    assert all(e["ph"] == "X" for e in events)
+    assert [e["name"] for e in events if e["cat"] == "phase"] == [
+        "phase 1",
+        "phase 2",
+        "phase 3",
+        "phase 4",
+    ]
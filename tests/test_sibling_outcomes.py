@@ -0,0 +1,56 @@
+import random
+
+from initial_primitives import InitialPrimitives
+from levin_search import main_levin_search, run_program
+from program import Program
+from task import Tasks
+from universal_machine import UniversalMachine
+
+
+def outcome(state):
+    return (
+        state.halt,
+        state.current_runtime,
+        state.weights.tolist(),
+        list(state.work_tape),
+    )
+
+
+def test_read_set():
+    universal_machine = UniversalMachine(InitialPrimitives())
+    base_program = Program(program_tape_size=100, work_tape_size=6, n_weights=10)
+
+    rng = random.Random(0)
+    for _ in range(1000):
+        program = [
+            rng.randint(0, 12) if rng.random() < 0.8 else rng.randint(-8, 25)
+            for _ in range(rng.randint(1, 12))
+        ]
+        state = run_program(
+            program, 100, universal_machine, base_program, track_reads=True
+        )
+
+        # Changing the cells that were not read does not change the run
+        for i in set(range(len(program))) - state.read_set:
+            sibling = program.copy()
+            sibling[i] = rng.randint(-8, 25)
+            assert outcome(
+                run_program(sibling, 100, universal_machine, base_program)
+            ) == outcome(state), (program, i)
+
+
+def test_share_outcomes_search():
+    expected = main_levin_search(Tasks.COUNT, InitialPrimitives(), 3, 1000, 6)
+    actual = main_levin_search(
+        Tasks.COUNT, InitialPrimitives(), 3, 1000, 6, share_outcomes=True
+    )
+
+    assert actual.n_shared > 0
+    assert (actual.n_runs, actual.n_steps, actual.space_size) == (
+        expected.n_runs,
+        expected.n_steps,
+        expected.space_size,
+    )
+    assert [s.program for s in actual.solutions] == [
+        s.program for s in expected.solutions
+    ]
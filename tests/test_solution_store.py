@@ -0,0 +1,82 @@
+from initial_primitives import InitialPrimitives
+from levin_search import main_levin_search
+from solution import Solution
+from solution_store import SolutionStore
+from task import Tasks
+
+
+def solution(found_after, phase, complexity, generalizes=False):
+    return Solution(
+        program=[found_after],
+        found_after=found_after,
+        time_limit=1,
+        current_runtime=1,
+        phase=phase,
+        generalizes=generalizes,
+        complexity=complexity,
+    )
+
+
+def test_solution_store():
+    store = SolutionStore(max_size=2)
+    assert store.add(solution(1, 1, 5.0))
+    assert store.add(solution(2, 1, 4.0))
+    store.end_phase(10, 20)
+    # Worse than the kept ones
+    assert not store.add(solution(3, 2, 6.0))
+    # Generalizing solutions are preferred
+    assert store.add(solution(4, 2, 7.0, generalizes=True))
+    assert store.add(solution(5, 2, 3.0))
+
+    assert len(store) == 2
+    assert store.n_found == 5
+    assert store.n_discarded == 3
+    assert store.n_discarded_generalizing == 0
+    assert [s.found_after for s in store] == [4, 5]
+    assert [s.found_after for s in store.best()] == [4, 5]
+    assert [n for n, _ in store.numbered()] == [1, 2]
+    # The space sizes are only known for the solutions of completed phases
+    assert [s.space_size for s in store] == [None, None]
+    store.end_phase(30, 40)
+    assert [s.space_size for s in store] == [30, 30]
+    assert [s.expanded_space_size for s in store] == [40, 40]
+
+    restored = SolutionStore.from_json(store.to_json(), max_size=2)
+    restored.end_phase(30, 40)
+    assert restored == store
+    assert list(restored.numbered()) == list(store.numbered())
+    assert restored.n_discarded == store.n_discarded
+
+
+def test_max_solutions(tmp_path):
+    expected = main_levin_search(Tasks.COUNT, InitialPrimitives(), 1, 1000, 5)
+    search_state = main_levin_search(
+        Tasks.COUNT,
+        InitialPrimitives(),
+        1,
+        1000,
+        5,
+        max_solutions=1,
+        checkpoint_dir=tmp_path,
+    )
+
+    assert len(expected.solutions) > 1
+    assert search_state.solutions.n_found == len(expected.solutions)
+    assert search_state.solutions.n_discarded == len(expected.solutions) - 1
+    assert search_state.solutions.best() == expected.solutions.best()[:1]
+    assert all(s.space_size == expected.space_size for s in search_state.solutions)
+
+    resumed = main_levin_search(
+        Tasks.COUNT,
+        InitialPrimitives(),
+        1,
+        1000,
+        6,
+        max_solutions=1,
+        resume_from=tmp_path,
+    )
+    deeper = main_levin_search(
+        Tasks.COUNT, InitialPrimitives(), 1, 1000, 6, max_solutions=1
+    )
+    assert resumed.solutions == deeper.solutions
+    assert resumed.solutions.n_discarded == deeper.solutions.n_discarded
@@ -0,0 +1,68 @@
+import pytest
+
+from initial_primitives import InitialPrimitives
+from levin_search import main_levin_search
+from symmetry import Symmetry
+from task import Tasks
+
+
+def test_symmetry():
+    symmetry = Symmetry(InitialPrimitives())
+    add, move, jumpleq, subtract = 4, 6, 0, 10
+
+    assert symmetry.multiplicity(add, (-1, 2, -1)) == 2
+    assert symmetry.multiplicity(add, (2, -1, -1)) == 0
+    assert symmetry.multiplicity(add, (2, 2, -1)) == 1
+    assert symmetry.multiplicity(subtract, (2, -1, -1)) == 1
+
+    assert symmetry.is_no_op(move, (-1, -1))
+    assert not symmetry.is_no_op(move, (0, -1))
+    assert symmetry.is_no_op(jumpleq, (3, 3, 0))
+    assert not symmetry.is_no_op(add, (3, 3, -1))
+
+
+def test_symmetry_reduction_search():
+    full = main_levin_search(
+        Tasks.COUNT, InitialPrimitives(), 3, 1000, 7, compile_programs=True
+    )
+    reduced = main_levin_search(
+        Tasks.COUNT,
+        InitialPrimitives(),
+        3,
+        1000,
+        7,
+        compile_programs=True,
+        symmetry_reduction=True,
+    )
+
+    assert full.expanded_space_size == full.space_size
+    # The equivalent programs have subtrees of the same size
+    assert reduced.space_size < reduced.expanded_space_size == full.space_size
+    assert reduced.expanded_n_runs == full.n_runs
+    assert reduced.n_no_ops == 0
+    # The shortest solution uses neither ADD nor MULTIPLY nor no-ops
+    assert reduced.solutions[0].program == full.solutions[0].program
+    assert reduced.solutions[0].expanded_space_size == reduced.expanded_space_size
+
+
+def test_skip_no_ops_search():
+    full = main_levin_search(Tasks.COUNT, InitialPrimitives(), 1, 1000, 6)
+    skipped = main_levin_search(
+        Tasks.COUNT,
+        InitialPrimitives(),
+        1,
+        1000,
+        6,
+        symmetry_reduction=True,
+        skip_no_ops=True,
+    )
+
+    # The subtrees of the no-ops are not counted
+    assert skipped.n_no_ops > 0
+    assert skipped.expanded_space_size < full.space_size
+    assert skipped.solutions[0].program == full.solutions[0].program
+
+    with pytest.raises(ValueError):
+        main_levin_search(
+            Tasks.COUNT, InitialPrimitives(), 1, 1000, 6, skip_no_ops=True
+        )
@@ -0,0 +1,48 @@
+import numpy as np
+
+from initial_primitives import InitialPrimitives
+from levin_search import main_levin_search
+from task import Task, Tasks
+from weight_database import WeightDatabase
+
+
+def test_vectorized_task_evaluation():
+    rng = np.random.default_rng(0)
+    weights = rng.integers(-2, 3, size=(50, 100)).astype(np.int16)
+    weights[3] = Task(task=Tasks.COUNT).solution
+    weights[7] = Task(task=Tasks.NEGATIVE_ONE).solution
+    weights[7, 0] = 5
+
+    for task in Tasks:
+        task = Task(task=task)
+        assert task.eval_programs_samples(weights).tolist() == [
+            task.eval_program_samples(w) for w in weights
+        ]
+        assert task.eval_programs(weights).tolist() == [
+            task.eval_program(w) for w in weights
+        ]
+
+
+def test_weight_database_query(tmp_path):
+    search_state = main_levin_search(
+        Tasks.COUNT,
+        InitialPrimitives(),
+        1,
+        1000,
+        5,
+        weight_database=tmp_path / "weights",
+    )
+    search_state.weight_database.close()
+
+    database = WeightDatabase(tmp_path / "weights")
+    assert len(database) == search_state.n_runs
+
+    rows, generalizes = database.query(Tasks.COUNT, chunk_size=7)
+    assert [database.programs[row]["program"] for row in rows] == [
+        list(s.program) for s in search_state.solutions
+    ]
+    assert generalizes.tolist() == [s.generalizes for s in search_state.solutions]
+
+    results = database.query_all()
+    assert set(results) == set(Tasks)
+    assert results[Tasks.COUNT][0].tolist() == rows.tolist()